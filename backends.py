@@ -0,0 +1,161 @@
+import asyncio
+import itertools
+import os
+import random
+import weakref
+from typing import List, Optional, Protocol, runtime_checkable
+
+from packing import MARKER_PATTERN
+
+
+class BackendError(Exception):
+    """Raised when a backend fails to translate a batch of chunks."""
+
+
+@runtime_checkable
+class TranslationBackend(Protocol):
+    """
+    Anything that can translate a batch of text chunks.
+
+    Implementations return one translation per chunk, in the same order.
+    """
+
+    name: str
+    version: str
+
+    async def translate_batch(self, chunks: List[str], source_lang: str, target_lang: str) -> List[str]:
+        ...
+
+
+def local_translate(chunk: str, source_lang: str, target_lang: str) -> str:
+    """
+    Deterministic stand-in translation: every line of the chunk tagged with the target language.
+
+    Blank lines and lines holding only a packing marker are left alone, like
+    a real translation would, so every packed item comes back tagged.
+    """
+    lines = []
+    for line in chunk.splitlines(keepends=True):
+        text = line.strip()
+        if text and not MARKER_PATTERN.fullmatch(text):
+            indent = len(line) - len(line.lstrip())
+            line = f"{line[:indent]}[{target_lang}] {line[indent:]}"
+        lines.append(line)
+    return "".join(lines)
+
+
+class LocalBackend:
+    """
+    In-process backend for benchmarks and offline runs.
+
+    Translations are produced by `local_translate`, so results are stable
+    across runs. Latency and failures can be injected to exercise the rest
+    of the pipeline.
+
+    Args:
+        latency (float): Seconds to wait per chunk
+        jitter (float): Extra random wait of up to this many seconds per chunk
+        failure_rate (float): Probability that a chunk raises BackendError
+        seed (int): Seed for jitter and failure injection
+    """
+
+    name = "local"
+    version = "1"
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+    async def translate_batch(self, chunks: List[str], source_lang: str, target_lang: str) -> List[str]:
+        translations = []
+        for chunk in chunks:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.failure_rate and self._random.random() < self.failure_rate:
+                raise BackendError(f"Injected failure for chunk of {len(chunk)} characters")
+            translations.append(local_translate(chunk, source_lang, target_lang))
+        return translations
+
+
+class HttpBackend:
+    """
+    Backend that calls a LibreTranslate-compatible translation service over HTTP.
+
+    Requests go through httpx AsyncClients with pools of keep-alive
+    connections, so a node can run many more chunks at once than with one
+    browser per chunk. httpx scans its whole pool for every request, which
+    gets slow with many connections, so the connections are spread over
+    several small clients used in turn. `local_server.py` speaks the same
+    API for tests.
+
+    Args:
+        url (str): Translate endpoint (default: $TRANSLATE_HTTP_URL or http://127.0.0.1:5000/translate)
+        api_key (str): Sent as `api_key` when set (default: $TRANSLATE_HTTP_API_KEY)
+        timeout (float): Seconds to wait for one request
+        max_connections (int): Maximum open connections to the service
+        connections_per_client (int): Connections in each client's pool
+    """
+
+    name = "http"
+    version = "1"
+
+    def __init__(self, url: Optional[str] = None, api_key: Optional[str] = None, timeout: float = 30.0, max_connections: int = 64,
+                 connections_per_client: int = 8):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("The http backend needs httpx, install it with: pip install httpx")
+
+        self.url = url or os.environ.get("TRANSLATE_HTTP_URL", "http://127.0.0.1:5000/translate")
+        self.api_key = api_key or os.environ.get("TRANSLATE_HTTP_API_KEY")
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.connections_per_client = min(connections_per_client, max_connections)
+        self._httpx = httpx
+        # Connections belong to the event loop that opened them, so each loop gets its own client
+        self._clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        clients = self._clients.get(loop)
+        if clients is None:
+            size = self.connections_per_client
+            limits = self._httpx.Limits(max_connections=size, max_keepalive_connections=size)
+            count = max(1, -(-self.max_connections // size))
+            clients = [self._httpx.AsyncClient(timeout=self.timeout, limits=limits) for _ in range(count)]
+            self._clients[loop] = (clients, itertools.cycle(clients))
+        return next(self._clients[loop][1])
+
+    async def translate_batch(self, chunks: List[str], source_lang: str, target_lang: str) -> List[str]:
+        payload = {"q": list(chunks), "source": source_lang, "target": target_lang, "format": "text"}
+        if self.api_key:
+            payload["api_key"] = self.api_key
+
+        try:
+            response = await self._client().post(self.url, json=payload)
+        except self._httpx.HTTPError as e:
+            raise BackendError(f"Request to {self.url} failed: {e!r}") from e
+        if response.status_code >= 400:
+            raise BackendError(f"{self.url} answered {response.status_code}: {response.text[:200]}")
+
+        try:
+            data = response.json()
+        except ValueError as e:
+            raise BackendError(f"Unexpected response from {self.url}: {response.text[:200]}") from e
+        translations = data.get("translatedText") if isinstance(data, dict) else None
+        if isinstance(translations, str):
+            translations = [translations]
+        if not isinstance(translations, list) or not all(isinstance(translation, str) for translation in translations):
+            raise BackendError(f"Unexpected response from {self.url}: {response.text[:200]}")
+        if len(translations) != len(chunks):
+            raise BackendError(f"Expected {len(chunks)} translations from {self.url}, got {len(translations)}")
+        return translations
+
+    async def aclose(self):
+        """Close the clients of the running event loop, call it before the loop stops."""
+        clients, _ = self._clients.pop(asyncio.get_running_loop(), ([], None))
+        for client in clients:
+            await client.aclose()
@@ -0,0 +1,88 @@
+import http.client
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from benchmarks.common import percentile, result
+from benchmarks.corpus import make_corpus
+
+
+class Client(threading.local):
+    """One keep-alive connection per thread."""
+
+    def __init__(self, port: int):
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+
+    def request(self, method: str, path: str, body=None) -> Tuple[int, bytes, float]:
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        start = time.perf_counter()
+        self.connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        return response.status, data, time.perf_counter() - start
+
+
+def load(client: Client, calls: List[Tuple[str, str, object]], concurrency: int) -> Tuple[List, float]:
+    """Run calls from `concurrency` threads. Returns the (status, body, seconds) of each and the wall time."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        responses = list(pool.map(lambda call: client.request(*call), calls))
+    return responses, time.perf_counter() - start
+
+
+def summarize(prefix: str, responses: List, wall: float) -> Dict[str, Dict]:
+    latencies = [seconds for _, _, seconds in responses]
+    return {
+        f"{prefix}.requests_per_s": result(len(responses) / wall, "req/s", "higher"),
+        f"{prefix}.p50_ms": result(percentile(latencies, 50) * 1000, "ms"),
+        f"{prefix}.p99_ms": result(percentile(latencies, 99) * 1000, "ms"),
+        f"{prefix}.errors": result(sum(1 for status, _, _ in responses if status >= 400), "requests"),
+    }
+
+
+def run(quick: bool = False) -> Dict[str, Dict]:
+    """
+    Throughput and latency of POST /translate and GET /translate/{job_id} under concurrent load.
+
+    Starts the API with uvicorn on a free port, using the local backend and a
+    temporary working directory for job results.
+    """
+    import uvicorn
+
+    requests = 200 if quick else 2000
+    concurrency = 16
+    text = make_corpus("latin", 1 << 10)
+
+    workdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            import translate_api
+
+            server = uvicorn.Server(uvicorn.Config(translate_api.app, host="127.0.0.1", port=0, log_level="warning"))
+            thread = threading.Thread(target=server.run, daemon=True)
+            thread.start()
+            while not server.started:
+                time.sleep(0.05)
+            port = server.servers[0].sockets[0].getsockname()[1]
+            client = Client(port)
+
+            # Every request has its own text, so each one creates a job instead of coalescing onto the first
+            bodies = [{"text": f"{text} {i}", "source_language": "en", "target_language": "hi"} for i in range(requests)]
+            responses, wall = load(client, [("POST", "/translate", body) for body in bodies], concurrency)
+            results = summarize("api.post_translate", responses, wall)
+
+            job_ids = [json.loads(data)["job_id"] for status, data, _ in responses if status == 200]
+            responses, wall = load(client, [("GET", f"/translate/{job_id}", None) for job_id in job_ids], concurrency)
+            results.update(summarize("api.get_status", responses, wall))
+
+            server.should_exit = True
+            thread.join()
+        finally:
+            os.chdir(workdir)
+
+    return results
@@ -0,0 +1,19 @@
+from typing import Dict
+
+from benchmarks.common import best_of, result
+from benchmarks.corpus import SCRIPTS, SIZES, make_corpus
+from chunker import chunk_spans
+
+
+def run(quick: bool = False) -> Dict[str, Dict]:
+    """Chunking throughput for each script from 1 KB to 100 MB (1 MB in quick mode)."""
+    sizes = ["1KB", "100KB", "1MB"] if quick else list(SIZES)
+    results = {}
+    for script in SCRIPTS:
+        for size_name in sizes:
+            text = make_corpus(script, SIZES[size_name])
+            repeat = 1 if len(text) >= SIZES["10MB"] else 3
+            seconds = best_of(lambda: chunk_spans(text, 4000), repeat)
+            results[f"chunker.{script}.{size_name}.mb_per_s"] = result(len(text) / (1 << 20) / seconds, "MB/s", "higher")
+            del text
+    return results
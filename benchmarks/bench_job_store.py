@@ -0,0 +1,54 @@
+import gc
+import os
+import tempfile
+import tracemalloc
+import uuid
+from datetime import datetime
+from typing import Dict
+
+from benchmarks.common import result
+from job_store import MemoryJobStore, SQLiteJobStore
+
+
+def make_job(i: int) -> Dict:
+    return {
+        "job_id": str(uuid.UUID(int=i)),
+        "status": "completed",
+        "created_at": datetime.now().isoformat(),
+        "completed_at": datetime.now().isoformat(),
+        "text_length": 10000,
+        "chunks": 3,
+        "result": None,
+        "result_file": f"translations/{i}.txt",
+    }
+
+
+def memory_per_job(store, count: int) -> float:
+    """Bytes of Python memory the store grows by per job."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(count):
+        store.create(make_job(i))
+        store.update(str(uuid.UUID(int=i)), unique_chunks=3, dedup_ratio=0.0)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    grown = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return grown / count
+
+
+def run(quick: bool = False) -> Dict[str, Dict]:
+    """Memory growth per stored job, for each job store."""
+    count = 2000 if quick else 20000
+    results = {}
+
+    store = MemoryJobStore(max_jobs=count * 2, ttl_seconds=None)
+    results["job_store.memory.bytes_per_job"] = result(memory_per_job(store, count), "B")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteJobStore(os.path.join(directory, "jobs.sqlite"), ttl_seconds=None)
+        results["job_store.sqlite.bytes_per_job"] = result(memory_per_job(store, count), "B")
+        store.close()
+
+    return results
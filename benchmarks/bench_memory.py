@@ -0,0 +1,59 @@
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.common import percentile, result
+from translation_memory import TranslationMemory
+
+
+def make_sentences(count: int, seed: int = 0) -> List[str]:
+    """Distinct sentences of 6-20 words from a 5000 word vocabulary, with an order number and a date."""
+    rng = random.Random(seed)
+    syllables = [a + b for a in "bdfgklmnprstv" for b in "aeiou"]
+    words = sorted({"".join(rng.choice(syllables) for _ in range(rng.randint(1, 4))) for _ in range(6000)})[:5000]
+    sentences = set()
+    while len(sentences) < count:
+        body = " ".join(rng.choice(words) for _ in range(rng.randint(6, 20)))
+        sentences.add(f"Order {rng.randint(1, 99999)} {body} on 2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}.")
+    return list(sentences)
+
+
+def latencies(func, queries: List[str]) -> List[float]:
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run(quick: bool = False) -> Dict[str, Dict]:
+    """Lookup and search latency of a translation memory holding 20k sentences (200k in full mode)."""
+    count = 20000 if quick else 200000
+    sentences = make_sentences(count)
+    rng = random.Random(1)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        memory = TranslationMemory(os.path.join(directory, "memory.sqlite"))
+        start = time.perf_counter()
+        for i in range(0, count, 1000):
+            memory.add_many(((s, f"[hi] {s}") for s in sentences[i:i + 1000]), "en", "hi")
+        results["memory.add.sentences_per_s"] = result(count / (time.perf_counter() - start), "sentences/s", "higher")
+
+        # Stored sentences with other numbers hit, unseen word orders miss
+        hits = [s.replace("Order ", "Order 1", 1) for s in rng.sample(sentences, 2000)]
+        misses = [" ".join(reversed(s.split())) for s in rng.sample(sentences, 2000)]
+        for name, queries in (("hit", hits), ("miss", misses)):
+            times = latencies(lambda q: memory.lookup(q, "en", "hi"), queries)
+            results[f"memory.lookup.{name}.p50_ms"] = result(percentile(times, 50) * 1000, "ms")
+            results[f"memory.lookup.{name}.p99_ms"] = result(percentile(times, 99) * 1000, "ms")
+
+        times = latencies(lambda q: memory.search(q, "en", "hi"), misses[:500])
+        results["memory.search.p50_ms"] = result(percentile(times, 50) * 1000, "ms")
+        results["memory.search.p99_ms"] = result(percentile(times, 99) * 1000, "ms")
+        memory.close()
+
+    return results
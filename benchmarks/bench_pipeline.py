@@ -0,0 +1,60 @@
+import asyncio
+import os
+import tempfile
+import time
+from typing import Dict
+
+from backends import LocalBackend
+from benchmarks.common import best_of, result
+from benchmarks.corpus import make_corpus
+from chunker import chunk_spans
+from google_translate import save_translation, translate_spans, translate_text
+from translation_cache import TranslationCache
+
+
+def run(quick: bool = False) -> Dict[str, Dict]:
+    """
+    Latency breakdown of translate_text against the local backend.
+
+    Each stage is timed on its own: chunking, translating with a cold and a
+    warm cache, and saving, then the whole call end to end. The backend
+    answers after `latency` seconds per chunk, like a fast remote service.
+    """
+    size = 100 << 10 if quick else 250 << 10
+    text = make_corpus("latin", size, seed=1)
+    latency = 0.002
+    workers = 4
+    results = {}
+
+    seconds = best_of(lambda: chunk_spans(text, 4000))
+    spans = chunk_spans(text, 4000)
+    results["pipeline.chunk_seconds"] = result(seconds, "s")
+    results["pipeline.chunks"] = result(len(spans), "chunks", "lower")
+
+    def translate(cache):
+        return asyncio.run(translate_spans(text, spans, "en", "hi", LocalBackend(latency=latency), cache, workers=workers))
+
+    cache = TranslationCache(memory_size=100000)
+    start = time.perf_counter()
+    translation = translate(cache)
+    results["pipeline.translate_cold_seconds"] = result(time.perf_counter() - start, "s")
+    results["pipeline.translate_warm_seconds"] = result(best_of(lambda: translate(cache)), "s")
+    cache.close()
+
+    # Per-chunk overhead of the pipeline itself, with a backend that answers instantly
+    seconds = best_of(lambda: asyncio.run(translate_spans(
+        text, spans, "en", "hi", LocalBackend(), TranslationCache(memory_size=0), workers=workers
+    )))
+    results["pipeline.overhead_ms_per_chunk"] = result(seconds / len(spans) * 1000, "ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "out.txt")
+        results["pipeline.save_seconds"] = result(best_of(lambda: save_translation(translation, output_file)), "s")
+
+        seconds = best_of(lambda: translate_text(
+            text, output_file, "en", "hi", backend=LocalBackend(latency=latency),
+            cache=TranslationCache(memory_size=0), workers=workers
+        ))
+        results["pipeline.end_to_end_seconds"] = result(seconds, "s")
+
+    return results
@@ -0,0 +1,25 @@
+import statistics
+import time
+from typing import Callable, Dict, List
+
+
+def result(value: float, unit: str, better: str = "lower") -> Dict:
+    """One benchmark measurement. `better` is 'lower' or 'higher', used for baseline comparison."""
+    return {"value": value, "unit": unit, "better": better}
+
+
+def best_of(func: Callable[[], object], repeat: int = 3) -> float:
+    """Run func `repeat` times and return the fastest run in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """The q-th percentile (0-100) of values, interpolated."""
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[max(0, min(98, int(q) - 1))]
@@ -0,0 +1,51 @@
+import random
+from typing import Dict
+
+# Words of each script, sentences end with the script's own punctuation
+SCRIPTS: Dict[str, Dict] = {
+    "latin": {
+        "words": "the of translation browser chunk session language page result quickly between sentence paragraph".split(),
+        "join": " ",
+        "end": ". ",
+    },
+    "devanagari": {
+        "words": "अनुवाद भाषा पृष्ठ परिणाम वाक्य अनुच्छेद सत्र ब्राउज़र जल्दी बीच में और".split(),
+        "join": " ",
+        "end": "। ",
+    },
+    "cjk": {
+        "words": list("翻译语言页面结果句子段落会话浏览器快速之间和的"),
+        "join": "",
+        "end": "。",
+    },
+}
+
+SIZES = {"1KB": 1 << 10, "100KB": 100 << 10, "1MB": 1 << 20, "10MB": 10 << 20, "100MB": 100 << 20}
+
+
+def make_corpus(script: str, size: int, seed: int = 0) -> str:
+    """
+    Build a deterministic text of about `size` characters in a script.
+
+    Sentences of 5-25 words are grouped into paragraphs of 2-8 sentences,
+    so the chunker sees the same mix of breaks on every run.
+    """
+    spec = SCRIPTS[script]
+    rng = random.Random(seed)
+    words, join, end = spec["words"], spec["join"], spec["end"]
+
+    # Build one paragraph block and repeat it, generating 100 MB word by word is slow
+    paragraphs = []
+    block_size = 0
+    while block_size < min(size, 256 << 10):
+        sentences = []
+        for _ in range(rng.randint(2, 8)):
+            sentence = join.join(rng.choice(words) for _ in range(rng.randint(5, 25)))
+            sentences.append(sentence + end)
+        paragraph = "".join(sentences).strip()
+        paragraphs.append(paragraph)
+        block_size += len(paragraph) + 2
+    block = "\n\n".join(paragraphs) + "\n\n"
+
+    text = block * (size // len(block) + 1)
+    return text[:size]
@@ -0,0 +1,100 @@
+"""
+Run the benchmark suite and compare it with a baseline.
+
+    python -m benchmarks.run --output benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+
+No baseline is committed: timings depend on the machine, so record one
+on the machine that runs the comparison, before making the change.
+
+Every benchmark runs against the local backend, so no browser or network
+is needed. Exits with status 1 when a result is more than --threshold
+worse than the baseline.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+# Nothing here may touch a browser or the shared on-disk cache
+os.environ.setdefault("TRANSLATE_BACKEND", "local")
+os.environ.setdefault("TRANSLATE_CACHE_PATH", "")
+os.environ.setdefault("TRANSLATE_MEMORY_PATH", "")
+os.environ.setdefault("TRANSLATE_JOB_STORE", "memory")
+os.environ.setdefault("TRANSLATE_MAX_QUEUE", "100000")
+
+SUITES = ("chunker", "pipeline", "api", "job_store", "memory")
+
+
+def run_suites(names: List[str], quick: bool) -> Dict[str, Dict]:
+    results = {}
+    for name in names:
+        print(f"Running {name} benchmarks...", file=sys.stderr)
+        module = importlib.import_module(f"benchmarks.bench_{name}")
+        results.update(module.run(quick=quick))
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """
+    Return a message for every result worse than its baseline by more than `threshold`.
+
+    A result counts as worse when it moved in the wrong direction for its
+    `better` field by more than the given fraction of the baseline value.
+    """
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None or not previous["value"]:
+            continue
+        change = (current["value"] - previous["value"]) / abs(previous["value"])
+        if current["better"] == "higher":
+            change = -change
+        if change > threshold:
+            regressions.append(
+                f"{name}: {previous['value']:.4g} -> {current['value']:.4g} {current['unit']} ({change:+.0%} worse)"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the translation pipeline against the local backend")
+    parser.add_argument("--only", nargs="+", choices=SUITES, default=list(SUITES), help="Suites to run")
+    parser.add_argument("--quick", action="store_true", help="Smaller corpora and fewer requests")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with results from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Fraction a result may get worse before it counts as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": run_suites(args.only, args.quick),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(report["results"], baseline, args.threshold)
+        for message in regressions:
+            print(f"Regression: {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import re
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+# Blank line between paragraphs
+PARAGRAPH_BREAK = re.compile(r"\n[ \t\r\f\v]*\n\s*")
+
+# End of a sentence or a line. Covers Latin punctuation, the Devanagari danda
+# and double danda, and CJK full-width punctuation, which needs no trailing space.
+SENTENCE_BREAK = re.compile(
+    r"[.!?…]+[\"'”’)\]]*\s+"
+    r"|[。！？｡]+[」』”’）]*\s*"
+    r"|[।॥]+\s*"
+    r"|\n\s*"
+)
+
+WHITESPACE = re.compile(r"\s+")
+
+# Boundaries to try, best first
+BREAK_PATTERNS = (PARAGRAPH_BREAK, SENTENCE_BREAK, WHITESPACE)
+
+Span = Tuple[int, int]
+
+
+def iter_chunk_spans(text: str, chunk_size: int = 4000, min_fill: float = 0.5) -> Iterator[Span]:
+    """
+    Split text into chunks of at most chunk_size characters, lazily.
+
+    Each chunk ends at the last paragraph break in its window, or failing
+    that the last sentence end, or failing that the last whitespace. A break
+    is only used if it leaves the chunk at least `min_fill` full, which keeps
+    chunks large and the whole pass linear in the length of the text. Words
+    longer than chunk_size are cut.
+
+    Whitespace around chunks is left out of the spans, so the text between
+    two spans is the separator to put back between their translations.
+
+    Args:
+        text (str): The text to split
+        chunk_size (int): Maximum size of each chunk
+        min_fill (float): Minimum fraction of chunk_size a chunk must use before a break is accepted
+
+    Yields:
+        tuple: (offset, length) of each chunk in text
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+
+    length = len(text)
+    pos = _skip_whitespace(text, 0, length)
+
+    while pos < length:
+        window_end = pos + chunk_size
+        if window_end >= length:
+            cut = length
+        else:
+            cut = _find_break(text, pos + max(1, int(chunk_size * min_fill)), window_end)
+
+        end = cut
+        while end > pos and text[end - 1].isspace():
+            end -= 1
+        if end > pos:
+            yield pos, end - pos
+
+        pos = _skip_whitespace(text, cut, length)
+
+
+def chunk_spans(text: str, chunk_size: int = 4000, min_fill: float = 0.5) -> List[Span]:
+    """Split text into chunks, see iter_chunk_spans. Returns a list of (offset, length)."""
+    return list(iter_chunk_spans(text, chunk_size, min_fill))
+
+
+def iter_file_chunks(path: str, chunk_size: int = 4000, block_size: int = 1 << 20) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Read a text file incrementally and split it into chunks lazily.
+
+    Produces the same chunks as iter_chunk_spans on the whole file while only
+    holding about one block in memory. A chunk is only emitted once its whole
+    window has been read, so chunk boundaries don't depend on block_size.
+
+    Args:
+        path (str): UTF-8 text file to read
+        chunk_size (int): Maximum size of each chunk
+        block_size (int): Characters to read at a time
+
+    Yields:
+        tuple: (separator, chunk) with the whitespace before each chunk and the
+            chunk itself. The last item has chunk None and carries any trailing whitespace.
+    """
+    buffer = ""
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            block = f.read(block_size)
+            eof = not block
+            buffer += block
+
+            consumed = 0
+            for offset, length in iter_chunk_spans(buffer, chunk_size):
+                # The rest of this window isn't read yet, wait for the next block
+                if not eof and offset + chunk_size >= len(buffer):
+                    break
+                yield buffer[consumed:offset], buffer[offset:offset + length]
+                consumed = offset + length
+            buffer = buffer[consumed:]
+
+            if eof:
+                yield buffer, None
+                return
+
+
+def sentence_spans(text: str) -> List[Span]:
+    """
+    Split text into sentences at SENTENCE_BREAK.
+
+    Like chunk spans, whitespace around sentences is left out, so
+    join_translations can put a text back together from its sentences.
+
+    Args:
+        text (str): The text to split
+
+    Returns:
+        list: (offset, length) of each sentence in text
+    """
+    spans = []
+    length = len(text)
+    pos = _skip_whitespace(text, 0, length)
+    for match in SENTENCE_BREAK.finditer(text, pos):
+        end = match.end()
+        while end > pos and text[end - 1].isspace():
+            end -= 1
+        if end > pos:
+            spans.append((pos, end - pos))
+        pos = _skip_whitespace(text, match.end(), length)
+
+    end = length
+    while end > pos and text[end - 1].isspace():
+        end -= 1
+    if end > pos:
+        spans.append((pos, end - pos))
+    return spans
+
+
+def span_texts(text: str, spans: Sequence[Span]) -> List[str]:
+    """Return the text of each span."""
+    return [text[offset:offset + size] for offset, size in spans]
+
+
+def join_translations(text: str, spans: Sequence[Span], translations: Sequence[str]) -> str:
+    """
+    Reassemble translated chunks, keeping the original whitespace between them.
+
+    Args:
+        text (str): The original text
+        spans (list): Spans the text was split into
+        translations (list): One translation per span
+
+    Returns:
+        str: The translated text
+    """
+    if not spans:
+        return text
+
+    parts = []
+    previous_end = 0
+    for (offset, size), translation in zip(spans, translations):
+        parts.append(text[previous_end:offset])
+        parts.append(translation)
+        previous_end = offset + size
+    parts.append(text[previous_end:])
+    return "".join(parts)
+
+
+def _find_break(text: str, lo: int, hi: int) -> int:
+    """Position just after the best boundary in text[lo:hi], or hi if there is none."""
+    for pattern in BREAK_PATTERNS:
+        cut = None
+        for match in pattern.finditer(text, lo, hi):
+            cut = match.end()
+        if cut is not None:
+            return cut
+    return hi
+
+
+def _skip_whitespace(text: str, pos: int, length: int) -> int:
+    while pos < length and text[pos].isspace():
+        pos += 1
+    return pos
@@ -3,13 +3,34 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 import time
 import argparse
+import json
 import os
 import random
-import textwrap
-import re
+import atexit
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import BackendError, HttpBackend, LocalBackend
+from chunker import chunk_spans, iter_file_chunks, join_translations, span_texts
+from markup import PARSERS, detect_format, parse_document
+from packing import pack_items, restore_whitespace, unpack
+from pacing import AdaptivePacing, ConcurrencyLimiter, RetryPolicy
+from session_pool import SessionPool
+from translation_cache import TranslationCache, cache_key, create_translation_cache
+from translation_memory import ChunkPlan, TranslationMemory
+import metrics
+from logs import configure_logging
+
+logger = logging.getLogger("google_translate")
 
 # List of user agents to rotate through
 USER_AGENTS = [
@@ -33,8 +54,8 @@ def add_random_delay(min_seconds=1, max_seconds=3):
 
 def chunk_text(text, chunk_size=4000):
     """
-    Split text into chunks of approximately chunk_size characters.
-    Try to split at sentence endings for more natural breaks.
+    Split text into chunks of at most chunk_size characters.
+    Prefers paragraph breaks, then sentence endings, then whitespace.
     
     Args:
         text (str): The text to split
@@ -43,51 +64,15 @@ def chunk_text(text, chunk_size=4000):
     Returns:
         list: List of text chunks
     """
-    # If text is smaller than chunk size, return it as is
-    if len(text) <= chunk_size:
-        return [text]
-    
-    # Use textwrap for initial chunking
-    chunks = textwrap.wrap(text, width=chunk_size, replace_whitespace=False, break_long_words=False)
-    
-    # Refine chunks to try to end at sentences (., !, ?)
-    refined_chunks = []
-    current_chunk = ""
-    
-    for chunk in chunks:
-        if not current_chunk:
-            current_chunk = chunk
-        else:
-            # If adding this chunk exceeds size limit, store current and start new
-            if len(current_chunk + chunk) > chunk_size:
-                refined_chunks.append(current_chunk)
-                current_chunk = chunk
-            else:
-                current_chunk += chunk
-    
-    # Add the last chunk if there's anything left
-    if current_chunk:
-        refined_chunks.append(current_chunk)
-        
-    return refined_chunks
+    return span_texts(text, chunk_spans(text, chunk_size))
 
-def translate_text(text_to_translate, output_file="translated_output.txt", source_lang="gu", target_lang="en"):
-    """
-    Translates text using Google Translate and saves to a file.
-    Handles text in chunks if longer than 4000 characters.
-    
-    Args:
-        text_to_translate (str): The text to translate
-        output_file (str): The filename to save the translation to
-        source_lang (str): Source language code (default: 'gu' for Gujarati)
-        target_lang (str): Target language code (default: 'en' for English)
-    """
-    # Split text into chunks of max 4000 characters
-    text_chunks = chunk_text(text_to_translate, chunk_size=4000)
-    print(f"Split text into {len(text_chunks)} chunks")
-    
-    all_translations = []
-    
+@functools.lru_cache(maxsize=None)
+def get_chromedriver_path():
+    """Install chromedriver once per process and return its path."""
+    return ChromeDriverManager().install()
+
+def create_driver():
+    """Start a headless Chrome driver with anti-detection measures."""
     # Set up the Chrome driver with anti-detection measures
     options = webdriver.ChromeOptions()
     
@@ -103,7 +88,7 @@ def translate_text(text_to_translate, output_file="translated_output.txt", sourc
     options.add_argument('--disable-dev-shm-usage')
     
     # Initialize the driver
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    driver = webdriver.Chrome(service=Service(get_chromedriver_path()), options=options)
     
     # Execute CDP commands to prevent detection
     driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
@@ -113,87 +98,1030 @@ def translate_text(text_to_translate, output_file="translated_output.txt", sourc
         })
         """
     })
+    return driver
+
+def open_translate_page(driver, source_lang, target_lang):
+    """Navigate to Google Translate for a language pair and dismiss the cookie prompt."""
+    url = f"https://translate.google.co.in/?sl={source_lang}&tl={target_lang}&op=translate"
+    driver.get(url)
+    logger.info(f"Opened Google Translate ({source_lang} to {target_lang})")
+    
+    # Add random delay after loading page
+    add_random_delay(2, 4)
+    
+    # Accept cookies if prompt appears
+    try:
+        cookie_button = WebDriverWait(driver, 5).until(
+            EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Accept all')]"))
+        )
+        cookie_button.click()
+        logger.info("Accepted cookies")
+        add_random_delay(1, 2)
+    except:
+        logger.info("No cookie prompt found")
+        pass
+
+def start_translate_session(key):
+    """
+    Create a browser session with Google Translate open for a language pair.
     
+    Args:
+        key (tuple): (source_lang, target_lang)
+        
+    Returns:
+        WebDriver: A driver sitting on the translate page
+    """
+    source_lang, target_lang = key
+    with metrics.BROWSER_STARTUP_SECONDS.time():
+        driver = create_driver()
     try:
-        # Navigate to Google Translate with specified languages - only once
-        url = f"https://translate.google.co.in/?sl={source_lang}&tl={target_lang}&op=translate"
-        driver.get(url)
-        print(f"Opened Google Translate ({source_lang} to {target_lang})")
+        with metrics.PAGE_LOAD_SECONDS.time():
+            open_translate_page(driver, source_lang, target_lang)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+def read_output_text(driver):
+    """Return the current text of the translation output, or an empty string."""
+    elements = driver.find_elements(By.CSS_SELECTOR, "div.lRu31")
+    return elements[0].text if elements else ""
+
+async def wait_for_translation(driver, previous_text="", timeout=15, stable_seconds=0.5, poll_interval=0.1, timings=None, run=None):
+    """
+    Wait until the translation output is complete.
+    
+    The output counts as complete once it is non-empty, differs from what was
+    shown before the chunk was entered and has not changed for `stable_seconds`.
+    Only reading the output blocks, the waits between reads are awaited.
+    
+    Args:
+        driver (WebDriver): Driver sitting on the translate page
+        previous_text (str): Output text before the chunk was entered
+        timeout (float): Maximum seconds to wait
+        stable_seconds (float): How long the output must stay unchanged
+        poll_interval (float): Seconds between checks of the output
+        timings (dict): If given, filled with the seconds until the output first changed
+            ('wait') and from then until it settled ('extract')
+        run (callable): Awaits a blocking driver call (default: run_blocking)
         
-        # Add random delay after loading page
-        add_random_delay(2, 4)
+    Returns:
+        tuple: (translated text, seconds waited)
         
-        # Accept cookies if prompt appears - only once
+    Raises:
+        TimeoutException: If the output didn't settle within `timeout`
+    """
+    run = run or run_blocking
+    start = time.monotonic()
+    text, since, changed = None, start, None
+    
+    while True:
+        current = await run(read_output_text, driver)
+        now = time.monotonic()
+        if current != text:
+            text, since = current, now
+            if changed is None and text and text != previous_text:
+                changed = now
+        elif text and text != previous_text and now - since >= stable_seconds:
+            break
+        
+        if now - start >= timeout:
+            # A chunk that translates to the same text as the previous one never looks
+            # different, accept it as long as the output has settled
+            if not text or now - since < stable_seconds:
+                raise TimeoutException(f"Translation output did not settle within {timeout} seconds")
+            break
+        await asyncio.sleep(poll_interval)
+    
+    end = time.monotonic()
+    if timings is not None:
+        changed = changed or since
+        timings["wait"] = changed - start
+        timings["extract"] = end - changed
+    return text, end - start
+
+def is_session_healthy(driver):
+    """Check that a pooled browser is still alive and on the translate page."""
+    return "translate.google" in driver.current_url
+
+def close_driver(driver):
+    """Quit a pooled browser."""
+    driver.quit()
+    logger.info("Browser closed")
+
+# Warm browser sessions shared by the CLI and the API
+SESSION_POOL = SessionPool(
+    factory=start_translate_session,
+    close=close_driver,
+    health_check=is_session_healthy,
+    max_size=int(os.environ.get("TRANSLATE_MAX_SESSIONS", "4")),
+    max_idle_seconds=float(os.environ.get("TRANSLATE_SESSION_IDLE_SECONDS", "300")),
+    max_uses=int(os.environ.get("TRANSLATE_SESSION_MAX_USES", "50")),
+)
+
+# Threads for blocking browser calls, so a slow page never holds up the event loop
+BROWSER_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("TRANSLATE_BROWSER_THREADS", str(2 * SESSION_POOL.max_size))),
+    thread_name_prefix="browser",
+)
+
+async def run_blocking(func, *args, executor=None):
+    """
+    Run a blocking browser call on a thread and await its result.
+    
+    Args:
+        func (callable): The blocking call
+        *args: Arguments for func
+        executor (Executor): Threads to run it on (default: BROWSER_EXECUTOR)
+        
+    Returns:
+        Whatever func returns
+    """
+    # Copy the context so log records from the thread keep the job's id
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(executor or BROWSER_EXECUTOR, context.run, func, *args)
+
+def run_async(main, backend):
+    """
+    Run a coroutine on a new event loop, for the synchronous wrappers.
+    
+    Connections the backend opened on the loop can't be used from any other
+    loop, so they are closed before it stops.
+    
+    Args:
+        main (coroutine): The coroutine to run
+        backend (TranslationBackend): Backend the coroutine translates with
+        
+    Returns:
+        Whatever main returns
+    """
+    async def run():
         try:
-            cookie_button = WebDriverWait(driver, 5).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Accept all')]"))
-            )
-            cookie_button.click()
-            print("Accepted cookies")
-            add_random_delay(1, 2)
-        except:
-            print("No cookie prompt found")
-            pass
-        
-        # Find the input text area - only once
-        input_area = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "textarea"))
+            return await main
+        finally:
+            aclose = getattr(backend, "aclose", None)
+            if aclose is not None:
+                await aclose()
+    return asyncio.run(run())
+
+async def gather_or_cancel(*aws):
+    """
+    Run awaitables concurrently and return their results in order.
+    
+    Unlike asyncio.gather, the first failure cancels the others and waits
+    for them to stop before it is raised, so a failed job doesn't keep
+    spending backend calls in the background.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+def find_input_area(driver):
+    """Return the text area of the translate page."""
+    return WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "textarea"))
+    )
+
+class SeleniumBackend:
+    """
+    Backend that drives the Google Translate web page with Selenium.
+    
+    Browser sessions are taken from a SessionPool so the page stays warm
+    between batches. Concurrent batches each get their own session, and
+    chunks on the same session are spaced out by the pacing policy, which
+    by default adapts to how fast the page answers and backs off on errors.
+    Browser errors and timeouts are raised as BackendError so they can be retried.
+    
+    Waiting for a session, pacing and polling the page are awaited, and only
+    the Selenium calls themselves run on `executor`, so many batches can be
+    in flight with a few threads.
+    
+    Args:
+        pool (SessionPool): Pool to take browser sessions from (default: SESSION_POOL)
+        pacing (PacingPolicy): Delay between chunks on one session (default: AdaptivePacing)
+        translation_timeout (float): Maximum seconds to wait for one chunk's output
+        executor (Executor): Threads for blocking browser calls (default: BROWSER_EXECUTOR)
+    """
+    
+    name = "selenium"
+    # Bump when the page interaction changes in a way that affects results
+    version = "1"
+    
+    def __init__(self, pool=None, pacing=None, translation_timeout=15, executor=None):
+        self.pool = pool or SESSION_POOL
+        self.pacing = pacing or AdaptivePacing()
+        self.translation_timeout = translation_timeout
+        self.executor = executor or BROWSER_EXECUTOR
+        # Seconds each recent chunk took from entering the text to a settled output
+        self.chunk_timings = deque(maxlen=1000)
+    
+    async def translate_batch(self, chunks, source_lang, target_lang):
+        """Translate chunks in order on one browser session."""
+        run = functools.partial(run_blocking, executor=self.executor)
+        translations = []
+        
+        try:
+            # Reuse a warm browser for this language pair instead of starting Chrome. A session
+            # that fails anywhere in the block is checked back in as unhealthy and closed.
+            async with self.pool.asession((source_lang, target_lang), executor=self.executor) as session:
+                driver = session.resource
+                
+                # Find the input text area
+                input_area = await run(find_input_area, driver)
+                logger.debug("Found input area")
+                
+                # Process each chunk
+                for chunk in chunks:
+                    # Give this session a break since its previous chunk
+                    delay = await self.pacing.wait_async(session)
+                    if delay:
+                        logger.debug(f"Waited {delay:.2f} seconds before processing next chunk")
+                    
+                    try:
+                        with metrics.CHUNK_STAGE_SECONDS.labels("input").time():
+                            # Clear previous text with a small delay
+                            await run(input_area.clear)
+                            await asyncio.sleep(random.uniform(0.5, 1))
+                            
+                            # Paste entire chunk at once
+                            previous_text = await run(read_output_text, driver)
+                            await run(input_area.send_keys, chunk)
+                        logger.debug("Entered text chunk", extra={"characters": len(chunk)})
+                        
+                        # Wait until the translation stops changing
+                        timings = {}
+                        translated_text, wait_time = await wait_for_translation(
+                            driver, previous_text, timeout=self.translation_timeout, timings=timings, run=run
+                        )
+                        metrics.CHUNK_STAGE_SECONDS.labels("wait").observe(timings["wait"])
+                        metrics.CHUNK_STAGE_SECONDS.labels("extract").observe(timings["extract"])
+                    except WebDriverException:
+                        # Slow down this language pair
+                        self.pacing.record(session, failed=True)
+                        self.pacing.mark(session)
+                        raise
+                    self.chunk_timings.append(wait_time)
+                    self.pacing.record(session, latency=wait_time)
+                    logger.debug("Got translated text", extra={"characters": len(translated_text), "seconds": round(wait_time, 3)})
+                    
+                    # Add the translated chunk to our collection
+                    translations.append(translated_text)
+                    self.pacing.mark(session)
+        except WebDriverException as e:
+            # Starting the browser, loading the page and translating all fail the same way, so all can be retried
+            raise BackendError(f"Browser failed to translate chunk: {e.msg or type(e).__name__}") from e
+        
+        return translations
+
+# Chunk translations shared by the CLI and the API, TRANSLATE_CACHE_PATH="" keeps it in memory
+# and TRANSLATE_CACHE_STORE=redis shares it between nodes
+TRANSLATION_CACHE = create_translation_cache()
+
+# Sentence translations reused across chunks and jobs, TRANSLATE_MEMORY_PATH="" keeps it in memory
+TRANSLATION_MEMORY = TranslationMemory(
+    path=os.environ.get("TRANSLATE_MEMORY_PATH", "translation_memory.sqlite") or None,
+    min_similarity=float(os.environ.get("TRANSLATE_MEMORY_MIN_SIMILARITY", "1.0")),
+)
+
+# How often a failing chunk is tried before its job fails
+RETRY_POLICY = RetryPolicy(attempts=int(os.environ.get("TRANSLATE_RETRIES", "4")))
+
+BACKENDS = {
+    "selenium": SeleniumBackend,
+    "local": LocalBackend,
+    "http": HttpBackend,
+}
+
+def create_backend(name=None, **options):
+    """
+    Create a translation backend by name.
+    
+    Args:
+        name (str): One of BACKENDS (default: $TRANSLATE_BACKEND or 'selenium')
+        **options: Passed to the backend constructor
+        
+    Returns:
+        TranslationBackend: The backend instance
+    """
+    name = name or os.environ.get("TRANSLATE_BACKEND", "selenium")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}', expected one of: {', '.join(BACKENDS)}")
+    return BACKENDS[name](**options)
+
+def get_cached(cache, keys):
+    """
+    Look several keys up in the cache, meant to run in a worker thread.
+    
+    Args:
+        cache (TranslationCache): Cache to look in
+        keys (list): Cache keys
+        
+    Returns:
+        list: Cached translation of each key, None for misses
+    """
+    return [cache.get(key) for key in keys]
+
+def put_cached(cache, pairs):
+    """
+    Store several (key, translation) pairs in the cache, meant to run in a worker thread.
+    
+    Args:
+        cache (TranslationCache): Cache to store in
+        pairs (list): (key, translation) pairs
+    """
+    for key, translation in pairs:
+        cache.put(key, translation)
+
+async def translate_chunks(backend, chunks, source_lang, target_lang, workers=1, on_result=None, retry=None, on_start=None, errors=None, on_error=None):
+    """
+    Translate chunks with up to `workers` concurrent backend calls.
+    
+    Chunks that raise BackendError are retried with jittered exponential backoff.
+    Failures also lower the number of chunks in flight, which climbs back to
+    `workers` as chunks succeed again.
+    
+    Args:
+        backend (TranslationBackend): Backend to translate with
+        chunks (list): Text chunks to translate
+        source_lang (str): Source language code
+        target_lang (str): Target language code
+        workers (int): Number of chunks in flight at once
+        on_result (callable): Called with (index, translation) as each chunk completes, in any order.
+            A coroutine function is awaited before the worker takes its next chunk
+        retry (RetryPolicy): How often and how long to retry failed chunks (default: RETRY_POLICY)
+        on_start (callable): Called with the index of each chunk when it's first sent to the backend
+        errors (dict): If given, chunks that still fail after the last attempt are recorded here as
+            index to error message and left as None, instead of failing the whole call
+        on_error (callable): Called with (index, error message) as each chunk is recorded in `errors`
+        
+    Returns:
+        list: Translations in the same order as `chunks`
+        
+    Raises:
+        BackendError: If a chunk still fails after the last attempt and `errors` is not given
+    """
+    retry = retry or RETRY_POLICY
+    limiter = ConcurrencyLimiter(workers)
+    results = [None] * len(chunks)
+    pending = iter(range(len(chunks)))
+    
+    async def translate_one(i):
+        for attempt in range(retry.attempts):
+            try:
+                async with limiter:
+                    start = time.perf_counter()
+                    translations = await backend.translate_batch([chunks[i]], source_lang, target_lang)
+                    metrics.CHUNK_SECONDS.labels(backend.name).observe(time.perf_counter() - start)
+            except BackendError as e:
+                limiter.record(failed=True)
+                if attempt + 1 >= retry.attempts:
+                    raise
+                delay = retry.delay(attempt)
+                metrics.RETRIES.labels(backend.name).inc()
+                logger.warning(f"Chunk failed ({e}), retrying in {delay:.2f} seconds", extra={"chunk": i, "attempt": attempt + 1})
+                await asyncio.sleep(delay)
+            else:
+                limiter.record(failed=False)
+                return translations[0]
+    
+    async def worker():
+        # Workers share one iterator, so every chunk is taken exactly once
+        for i in pending:
+            logger.info(f"Processing chunk {i+1}/{len(chunks)}", extra={"chunk": i, "characters": len(chunks[i])})
+            metrics.CHARACTERS.labels(backend.name).inc(len(chunks[i]))
+            if on_start:
+                on_start(i)
+            try:
+                results[i] = await translate_one(i)
+            except BackendError as e:
+                metrics.FAILURES.labels(backend.name).inc()
+                if errors is None:
+                    raise
+                logger.error(f"Chunk failed after {retry.attempts} attempts: {e}", extra={"chunk": i})
+                errors[i] = str(e)
+                if on_error:
+                    on_error(i, errors[i])
+                continue
+            if on_result:
+                done = on_result(i, results[i])
+                if inspect.isawaitable(done):
+                    await done
+    
+    await gather_or_cancel(*(worker() for _ in range(max(1, min(workers, len(chunks))))))
+    return results
+
+async def translate_chunk_list(text_chunks, source_lang, target_lang, backend, cache, workers=1, stats=None, on_chunk=None, states=None, memory=None):
+    """
+    Translate a list of chunks, using the cache and translating identical chunks once.
+    
+    With a translation memory, chunks the cache misses are split into
+    sentences. Chunks whose sentences are all in memory are not sent to the
+    backend, and of the other chunks only the sentences not in memory are.
+    
+    When `states` is given, each chunk's progress is tracked there, chunks it
+    already has as done are not translated again, and chunks that still fail
+    after their retries are marked failed and returned as None instead of
+    failing the whole list.
+    
+    Args:
+        text_chunks (list): Text chunks to translate
+        source_lang (str): Source language code
+        target_lang (str): Target language code
+        backend (TranslationBackend): Backend to translate with
+        cache (TranslationCache): Cache consulted before the backend
+        workers (int): Number of chunks to translate in parallel
+        stats (dict): If given, filled with chunk, unique chunk, cache and dedup counts
+        on_chunk (callable): Called with (index, translation) for every chunk, in order, as soon as
+            it and all chunks before it are translated or have failed. Failed chunks get None.
+        states (ChunkStates): Per-chunk states to update and resume from
+        memory (TranslationMemory): Sentence memory consulted after the cache
+        
+    Returns:
+        list: Translation of each chunk
+    """
+    # Each distinct chunk is handled once, chunks that only differ in whitespace may still share a cache entry
+    backend_version = f"{backend.name}:{backend.version}"
+    positions = {}
+    for i, chunk in enumerate(text_chunks):
+        positions.setdefault(chunk, []).append(i)
+    keys = {chunk: cache_key(chunk, source_lang, target_lang, backend_version) for chunk in positions}
+    logger.info(f"Found {len(positions)} distinct chunks", extra={"target_lang": target_lang})
+    
+    all_translations = [None] * len(text_chunks)
+    settled = [False] * len(text_chunks)
+    emitted = 0
+    
+    def settle(chunk, translation):
+        nonlocal emitted
+        for i in positions[chunk]:
+            all_translations[i] = translation
+            settled[i] = True
+        # Report the settled prefix of the text, in order, so a failed chunk doesn't hold back the ones after it
+        while emitted < len(settled) and settled[emitted]:
+            if on_chunk:
+                on_chunk(emitted, all_translations[emitted])
+            emitted += 1
+    
+    def resolve(chunk, translation):
+        # Fan the translation back out to every copy of the chunk
+        if states is not None:
+            for i in positions[chunk]:
+                states.done(i, translation)
+        settle(chunk, translation)
+    
+    def fail(j, error):
+        # Failed chunks keep their place so they can be retried later
+        chunk = text_chunks[missing[j]]
+        for i in positions[chunk]:
+            states.fail(i, error)
+        settle(chunk, None)
+    
+    # Look up every distinct chunk before touching the backend
+    missing = []
+    already_done = 0
+    lookup = []
+    for chunk, indices in positions.items():
+        if states is not None and states.is_done(indices[0]):
+            resolve(chunk, states.translations[indices[0]])
+            already_done += 1
+        else:
+            lookup.append(chunk)
+    cached = await asyncio.to_thread(get_cached, cache, [keys[chunk] for chunk in lookup])
+    for chunk, translation in zip(lookup, cached):
+        if translation is not None:
+            resolve(chunk, translation)
+        else:
+            missing.append(positions[chunk][0])
+    logger.info(f"Found {len(positions) - len(missing)} of {len(positions)} distinct chunks in cache", extra={"target_lang": target_lang})
+    metrics.CACHE_LOOKUPS.labels("hit").inc(len(positions) - len(missing) - already_done)
+    metrics.CACHE_LOOKUPS.labels("miss").inc(len(missing))
+    metrics.CHUNKS.labels("cache").inc(len(positions) - len(missing) - already_done)
+    metrics.CHUNKS.labels("dedup").inc(len(text_chunks) - len(positions))
+    
+    # Serve chunks whose sentences are all in memory, the rest only send their new sentences
+    plans = {}
+    from_memory = 0
+    if memory is not None:
+        remaining = []
+        found = []
+        new_plans = await asyncio.to_thread(
+            lambda: [ChunkPlan(memory, text_chunks[i], source_lang, target_lang, backend_version) for i in missing]
+        )
+        for i, plan in zip(missing, new_plans):
+            if plan.request is None:
+                found.append((text_chunks[i], plan.translation))
+            else:
+                plans[i] = plan
+                remaining.append(i)
+        await asyncio.to_thread(put_cached, cache, [(keys[chunk], translation) for chunk, translation in found])
+        for chunk, translation in found:
+            resolve(chunk, translation)
+        from_memory = len(found)
+        missing = remaining
+        logger.info(f"Found {from_memory} more distinct chunks in translation memory", extra={"target_lang": target_lang})
+        metrics.CHUNKS.labels("memory").inc(from_memory)
+    reused_sentences = sum(plan.reused for plan in plans.values())
+    
+    lost = []
+    
+    async def store(j, translation):
+        i = missing[j]
+        if i in plans:
+            translation = await asyncio.to_thread(plans[i].finish, translation)
+            if translation is None:
+                lost.append(j)
+                return
+        metrics.CHUNKS.labels("backend").inc()
+        await asyncio.to_thread(cache.put, keys[text_chunks[i]], translation)
+        resolve(text_chunks[i], translation)
+    
+    def start(j):
+        for i in positions[text_chunks[missing[j]]]:
+            states.start(i)
+    
+    # Translate the remaining chunks with the selected backend
+    errors = {} if states is not None else None
+    if missing:
+        await translate_chunks(
+            backend, [plans[i].request if i in plans else text_chunks[i] for i in missing], source_lang, target_lang,
+            workers=workers, on_result=store, on_start=start if states is not None else None, errors=errors,
+            on_error=fail if states is not None else None
+        )
+    
+    # Chunks whose sentence markers were lost are sent again whole
+    if lost:
+        logger.warning(f"Retrying {len(lost)} chunks whose sentence markers were lost")
+        retried = list(lost)
+        for j in retried:
+            plans[missing[j]].resend_whole()
+        retry_errors = {} if errors is not None else None
+        await translate_chunks(
+            backend, [text_chunks[missing[j]] for j in retried], source_lang, target_lang, workers=workers,
+            on_result=lambda k, translation: store(retried[k], translation),
+            on_start=(lambda k: start(retried[k])) if states is not None else None, errors=retry_errors,
+            on_error=(lambda k, error: fail(retried[k], error)) if states is not None else None
+        )
+        if retry_errors:
+            errors.update((retried[k], error) for k, error in retry_errors.items())
+    
+    if stats is not None:
+        stats.update({
+            "chunks": len(text_chunks),
+            "unique_chunks": len(positions),
+            "cached_chunks": len(positions) - len(missing) - from_memory,
+            "memory_chunks": from_memory,
+            "memory_sentences": reused_sentences,
+            "translated_chunks": len(missing),
+            "dedup_ratio": 1 - len(positions) / len(text_chunks) if text_chunks else 0.0,
+            "failed_chunks": sum(len(positions[text_chunks[missing[j]]]) for j in errors or {}),
+        })
+    
+    return all_translations
+
+async def translate_spans(text, spans, source_lang, target_lang, backend, cache, workers=1, stats=None, on_chunk=None, text_chunks=None, states=None, memory=None):
+    """
+    Translate already chunked text, see translate_chunk_list.
+    
+    Chunks that failed are left in the source language.
+    
+    Args:
+        text (str): The text to translate
+        spans (list): (offset, length) chunk spans of the text
+        text_chunks (list): Text of each span, computed if not given
+        Other arguments are passed to translate_chunk_list.
+        
+    Returns:
+        str: The translated text
+    """
+    if text_chunks is None:
+        text_chunks = span_texts(text, spans)
+    
+    all_translations = await translate_chunk_list(
+        text_chunks, source_lang, target_lang, backend, cache, workers=workers, stats=stats, on_chunk=on_chunk, states=states,
+        memory=memory
+    )
+    all_translations = [
+        translation if translation is not None else chunk for translation, chunk in zip(all_translations, text_chunks)
+    ]
+    
+    # Combine all translated chunks, keeping the original breaks between them
+    return join_translations(text, spans, all_translations)
+
+def save_translation(translation, output_file):
+    """Write a translation to a file, creating its directory if needed."""
+    # Ensure directory exists
+    os.makedirs(os.path.dirname(output_file) if os.path.dirname(output_file) else '.', exist_ok=True)
+    
+    # Save to file
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(translation)
+        
+    logger.info(f"Translation saved to {output_file}")
+
+async def translate_text_async(text_to_translate, output_file="translated_output.txt", source_lang="gu", target_lang="en", backend=None, cache=None, workers=1, chunk_size=4000, spans=None, stats=None, on_chunk=None, states=None, memory=None):
+    """Async version of translate_text, for callers that already run an event loop."""
+    backend = backend or create_backend()
+    cache = cache if cache is not None else TRANSLATION_CACHE
+    memory = TRANSLATION_MEMORY if memory is None else memory or None
+    
+    # Split text into chunks of at most chunk_size characters
+    if spans is None:
+        spans = chunk_spans(text_to_translate, chunk_size)
+    logger.info(f"Split text into {len(spans)} chunks")
+    
+    complete_translation = await translate_spans(
+        text_to_translate, spans, source_lang, target_lang, backend, cache,
+        workers=workers, stats=stats, on_chunk=on_chunk, states=states, memory=memory
+    )
+    logger.info(f"Combined all translations (total length: {len(complete_translation)} characters)")
+    
+    # Writing a large result shouldn't hold up the event loop
+    await asyncio.to_thread(save_translation, complete_translation, output_file)
+    return complete_translation
+
+def translate_text(text_to_translate, output_file="translated_output.txt", source_lang="gu", target_lang="en", backend=None, cache=None, workers=1, chunk_size=4000, spans=None, stats=None, on_chunk=None, states=None, memory=None):
+    """
+    Translates text using Google Translate and saves to a file.
+    Handles text in chunks if longer than 4000 characters.
+    
+    Args:
+        text_to_translate (str): The text to translate
+        output_file (str): The filename to save the translation to
+        source_lang (str): Source language code (default: 'gu' for Gujarati)
+        target_lang (str): Target language code (default: 'en' for English)
+        backend (TranslationBackend): Backend to translate with (default: create_backend())
+        cache (TranslationCache): Cache consulted before the backend (default: TRANSLATION_CACHE)
+        workers (int): Number of chunks to translate in parallel, each on its own browser session
+        chunk_size (int): Maximum characters per chunk
+        spans (list): Precomputed (offset, length) chunk spans of the text, computed if not given
+        stats (dict): If given, filled with chunk, unique chunk, cache and dedup counts
+        on_chunk (callable): Called with (index, translation) for every chunk, in order, as soon as
+            it and all chunks before it are translated
+        states (ChunkStates): Per-chunk states, see translate_chunk_list. Failed chunks stay
+            in the source language in the saved translation
+        memory (TranslationMemory): Sentence memory consulted after the cache (default: TRANSLATION_MEMORY,
+            False to translate without one)
+    """
+    backend = backend or create_backend()
+    return run_async(translate_text_async(
+        text_to_translate, output_file, source_lang, target_lang, backend, cache, workers, chunk_size, spans, stats, on_chunk, states, memory
+    ), backend)
+
+async def translate_text_multi_async(text_to_translate, output_files=None, source_lang="gu", target_langs=("en",), backend=None, cache=None, workers=1, chunk_size=4000, spans=None, stats=None, parallel_targets=4, memory=None):
+    """Async version of translate_text_multi, for callers that already run an event loop."""
+    backend = backend or create_backend()
+    cache = cache if cache is not None else TRANSLATION_CACHE
+    memory = TRANSLATION_MEMORY if memory is None else memory or None
+    target_langs = list(dict.fromkeys(target_langs))
+    
+    # Chunk once for all targets
+    if spans is None:
+        spans = chunk_spans(text_to_translate, chunk_size)
+    text_chunks = span_texts(text_to_translate, spans)
+    logger.info(f"Split text into {len(spans)} chunks for {len(target_langs)} target languages")
+    
+    async def translate_all():
+        # Limit how many language pairs hold browser sessions at once, so
+        # pairs don't keep evicting each other's warm sessions
+        limit = asyncio.Semaphore(max(1, parallel_targets))
+        
+        async def translate_target(target_lang):
+            async with limit:
+                target_stats = {} if stats is not None else None
+                translation = await translate_spans(
+                    text_to_translate, spans, source_lang, target_lang, backend, cache,
+                    workers=workers, stats=target_stats, text_chunks=text_chunks, memory=memory
+                )
+                if stats is not None:
+                    stats[target_lang] = target_stats
+                return translation
+        
+        translations = await gather_or_cancel(*(translate_target(lang) for lang in target_langs))
+        return dict(zip(target_langs, translations))
+    
+    results = await translate_all()
+    
+    for target_lang, output_file in (output_files or {}).items():
+        if target_lang in results:
+            await asyncio.to_thread(save_translation, results[target_lang], output_file)
+    return results
+
+def translate_text_multi(text_to_translate, output_files=None, source_lang="gu", target_langs=("en",), backend=None, cache=None, workers=1, chunk_size=4000, spans=None, stats=None, parallel_targets=4, memory=None):
+    """
+    Translates text into several target languages in one go.
+    
+    The text is chunked once and the chunk texts are shared by every target.
+    Up to `parallel_targets` language pairs are translated at the same time,
+    each keeping its own warm browser session for all of its chunks.
+    
+    Args:
+        text_to_translate (str): The text to translate
+        output_files (dict): Target language code to the filename to save its translation to
+        source_lang (str): Source language code (default: 'gu' for Gujarati)
+        target_langs (list): Target language codes
+        backend (TranslationBackend): Backend to translate with (default: create_backend())
+        cache (TranslationCache): Cache consulted before the backend (default: TRANSLATION_CACHE)
+        workers (int): Number of chunks of one target to translate in parallel
+        chunk_size (int): Maximum characters per chunk
+        spans (list): Precomputed (offset, length) chunk spans of the text, computed if not given
+        stats (dict): If given, filled with the chunk counts of each target language
+        parallel_targets (int): Number of target languages translated at the same time
+        memory (TranslationMemory): Sentence memory consulted after the cache (default: TRANSLATION_MEMORY,
+            False to translate without one)
+        
+    Returns:
+        dict: Target language code to translated text
+    """
+    backend = backend or create_backend()
+    return run_async(translate_text_multi_async(
+        text_to_translate, output_files, source_lang, target_langs, backend, cache, workers, chunk_size, spans, stats, parallel_targets, memory
+    ), backend)
+
+async def translate_items_async(items, source_lang="gu", target_lang="en", backend=None, cache=None, workers=1, chunk_size=4000, stats=None, memory=None):
+    """Async version of translate_items, for callers that already run an event loop."""
+    backend = backend or create_backend()
+    cache = cache if cache is not None else TRANSLATION_CACHE
+    memory = TRANSLATION_MEMORY if memory is None else memory or None
+    
+    # Identical items share a key, look each one up once
+    backend_version = f"{backend.name}:{backend.version}"
+    keys = [cache_key(item, source_lang, target_lang, backend_version) for item in items]
+    positions = {}
+    for i, key in enumerate(keys):
+        positions.setdefault(key, []).append(i)
+    
+    # Blank items need no translation, they come back as they are
+    translations_by_key = {key: "" for key, indices in positions.items() if not items[indices[0]].strip()}
+    lookup = [key for key in positions if key not in translations_by_key]
+    for key, translation in zip(lookup, await asyncio.to_thread(get_cached, cache, lookup)):
+        if translation is not None:
+            translations_by_key[key] = translation
+    todo = [indices[0] for key, indices in positions.items() if key not in translations_by_key]
+    logger.info(f"Found {len(positions) - len(todo)} of {len(positions)} distinct items in cache", extra={"target_lang": target_lang})
+    cached = len(positions) - len(todo)
+    
+    # Items made only of sentences in memory need no backend call
+    if memory is not None:
+        remaining = []
+        found = []
+        memory_translations = await asyncio.to_thread(
+            lambda: [ChunkPlan(memory, items[i], source_lang, target_lang, backend_version).translation for i in todo]
+        )
+        for i, translation in zip(todo, memory_translations):
+            if translation is not None:
+                translations_by_key[keys[i]] = translation
+                found.append((keys[i], translation))
+            else:
+                remaining.append(i)
+        await asyncio.to_thread(put_cached, cache, found)
+        logger.info(f"Found {len(todo) - len(remaining)} more distinct items in translation memory", extra={"target_lang": target_lang})
+        todo = remaining
+    
+    # Pack the remaining items into shared chunks
+    packs = pack_items([items[i] for i in todo], chunk_size)
+    logger.info(f"Packed {len(todo)} items into {len(packs)} chunks")
+    
+    recovered = {}
+    if packs:
+        translated = await translate_chunks(
+            backend, [pack.text for pack in packs], source_lang, target_lang, workers=workers
+        )
+        
+        # Split packed chunks back into items and reassemble long items from their parts
+        long_parts = {}
+        for pack, translation in zip(packs, translated):
+            if pack.span is None:
+                recovered.update(unpack(translation, pack.items))
+            else:
+                long_parts.setdefault(pack.items[0], []).append((pack.span, translation))
+        for j, parts in long_parts.items():
+            recovered[j] = join_translations(items[todo[j]], [span for span, _ in parts], [t for _, t in parts])
+    
+    # Translate items whose markers were lost on their own
+    lost = [j for j in range(len(todo)) if j not in recovered]
+    if lost:
+        logger.warning(f"Retrying {len(lost)} items whose markers were lost")
+        retried = await translate_chunks(
+            backend, [items[todo[j]] for j in lost], source_lang, target_lang, workers=workers
         )
-        print("Found input area")
-        
-        # Process each chunk
-        for i, chunk in enumerate(text_chunks):
-            print(f"Processing chunk {i+1}/{len(text_chunks)}")
-            
-            # Add a longer delay between chunks if not first chunk
-            if i > 0:
-                delay = add_random_delay(3, 5)
-                print(f"Waiting {delay:.2f} seconds before processing next chunk...")
-            
-            # Clear previous text with a small delay
-            input_area.clear()
-            add_random_delay(0.5, 1)
-            
-            # Paste entire chunk at once
-            input_area.send_keys(chunk)
-            print(f"Entered text chunk (length: {len(chunk)} characters)")
-            
-            # Wait for translation to appear with random timing
-            print("Waiting for translation...")
-            wait_time = add_random_delay(4, 6)
-            print(f"Waited {wait_time:.2f} seconds for translation")
-            
-            # Get the translation output
-            output_area = WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.lRu31"))
+        recovered.update(zip(lost, retried))
+    
+    for j, translation in recovered.items():
+        translations_by_key[keys[todo[j]]] = translation
+    await asyncio.to_thread(put_cached, cache, [(keys[todo[j]], translation) for j, translation in recovered.items()])
+    if memory is not None:
+        def learn_all():
+            for j, translation in recovered.items():
+                memory.learn(items[todo[j]], translation, source_lang, target_lang, backend_version)
+        await asyncio.to_thread(learn_all)
+    
+    if stats is not None:
+        stats.update({
+            "items": len(items),
+            "unique_items": len(positions),
+            "cached_items": cached,
+            "memory_items": len(positions) - len(todo) - cached,
+            "chunks": len(packs),
+            "retried_items": len(lost),
+        })
+    
+    # Items were translated without their surrounding whitespace, which the cache key ignores too
+    return [restore_whitespace(item, translations_by_key.get(key)) for item, key in zip(items, keys)]
+
+def translate_items(items, source_lang="gu", target_lang="en", backend=None, cache=None, workers=1, chunk_size=4000, stats=None, memory=None):
+    """
+    Translates many short texts, packing them into as few chunks as possible.
+    
+    Items are looked up in the cache and then in the translation memory one
+    by one, identical items are translated once, and the rest are packed
+    behind numbered markers into shared chunks. Items whose markers don't
+    survive translation are retried on their own.
+    
+    Args:
+        items (list): The texts to translate
+        source_lang (str): Source language code (default: 'gu' for Gujarati)
+        target_lang (str): Target language code (default: 'en' for English)
+        backend (TranslationBackend): Backend to translate with (default: create_backend())
+        cache (TranslationCache): Cache consulted before the backend (default: TRANSLATION_CACHE)
+        workers (int): Number of chunks to translate in parallel
+        chunk_size (int): Maximum characters per chunk
+        stats (dict): If given, filled with item, chunk and cache counts
+        memory (TranslationMemory): Sentence memory consulted after the cache (default: TRANSLATION_MEMORY,
+            False to translate without one)
+        
+    Returns:
+        list: Translation of each item, in order
+    """
+    backend = backend or create_backend()
+    return run_async(translate_items_async(
+        items, source_lang, target_lang, backend, cache, workers, chunk_size, stats, memory
+    ), backend)
+
+async def translate_document_async(content, fmt, source_lang="gu", target_lang="en", backend=None, cache=None, workers=1, chunk_size=4000, stats=None, memory=None):
+    """Async version of translate_document, for callers that already run an event loop."""
+    # Only the segments a reader sees are sent, packed like a batch
+    document = parse_document(content, fmt)
+    sent = sum(len(segment) for segment in document.segments)
+    logger.info(f"Extracted {len(document.segments)} segments from {fmt} ({sent} of {len(content)} characters)")
+    
+    translations = await translate_items_async(
+        document.segments, source_lang, target_lang, backend, cache, workers, chunk_size, stats, memory
+    )
+    if stats is not None:
+        stats.update({"segments": len(document.segments), "source_characters": len(content), "segment_characters": sent})
+    return document.render(translations)
+
+def translate_document(content, fmt, source_lang="gu", target_lang="en", backend=None, cache=None, workers=1, chunk_size=4000, stats=None, memory=None):
+    """
+    Translates an HTML, Markdown, JSON, PO or YAML document, keeping its structure.
+    
+    The document is split into the segments a reader sees, with tags, code,
+    URLs, placeholders and numbers inside them replaced by tokens. Segments
+    are translated in one pass like translate_items, then put back into the
+    document with every protected value restored.
+    
+    Args:
+        content (str): The document to translate
+        fmt (str): 'html', 'markdown', 'json', 'po' or 'yaml'
+        source_lang (str): Source language code (default: 'gu' for Gujarati)
+        target_lang (str): Target language code (default: 'en' for English)
+        backend (TranslationBackend): Backend to translate with (default: create_backend())
+        cache (TranslationCache): Cache consulted before the backend (default: TRANSLATION_CACHE)
+        workers (int): Number of chunks to translate in parallel
+        chunk_size (int): Maximum characters per chunk
+        stats (dict): If given, filled with segment, character, chunk and cache counts
+        memory (TranslationMemory): Sentence memory consulted after the cache (default: TRANSLATION_MEMORY,
+            False to translate without one)
+        
+    Returns:
+        str: The translated document
+    """
+    backend = backend or create_backend()
+    return run_async(translate_document_async(
+        content, fmt, source_lang, target_lang, backend, cache, workers, chunk_size, stats, memory
+    ), backend)
+
+def manifest_path(output_file):
+    """Checkpoint file that records how far the translation of output_file got."""
+    return f"{output_file}.manifest.json"
+
+def save_manifest(path, manifest):
+    """Atomically write a checkpoint manifest."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(temp_path, path)
+
+def translate_file(input_file, output_file="translated_output.txt", source_lang="gu", target_lang="en", backend=None, cache=None, workers=1, chunk_size=4000, resume=False, batch_size=None, memory=None):
+    """
+    Translates a file of any size with constant memory, writing the output as it goes.
+    
+    The input is read and chunked lazily. Each translated chunk is appended to the
+    output file as soon as it and every chunk before it are done, and a manifest
+    next to the output file records the progress. If the run is interrupted, calling
+    again with resume=True skips the chunks that are already written.
+    
+    Args:
+        input_file (str): The file to translate
+        output_file (str): The filename to save the translation to
+        source_lang (str): Source language code (default: 'gu' for Gujarati)
+        target_lang (str): Target language code (default: 'en' for English)
+        backend (TranslationBackend): Backend to translate with (default: create_backend())
+        cache (TranslationCache): Cache consulted before the backend (default: TRANSLATION_CACHE)
+        workers (int): Number of chunks to translate in parallel
+        chunk_size (int): Maximum characters per chunk
+        resume (bool): Continue from the manifest of an earlier run
+        batch_size (int): Chunks read ahead at a time (default: 4 per worker)
+        memory (TranslationMemory): Sentence memory consulted after the cache (default: TRANSLATION_MEMORY,
+            False to translate without one)
+        
+    Returns:
+        int: Number of chunks in the file
+    """
+    backend = backend or create_backend()
+    cache = cache if cache is not None else TRANSLATION_CACHE
+    memory = TRANSLATION_MEMORY if memory is None else memory or None
+    batch_size = batch_size or max(1, workers) * 4
+    
+    # The manifest is only valid for the same input and settings
+    manifest_file = manifest_path(output_file)
+    settings = {
+        "input_file": os.path.abspath(input_file),
+        "input_size": os.path.getsize(input_file),
+        "source_lang": source_lang,
+        "target_lang": target_lang,
+        "chunk_size": chunk_size,
+    }
+    
+    done = 0
+    output_bytes = 0
+    if resume and os.path.exists(manifest_file) and os.path.exists(output_file):
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["settings"] != settings:
+            raise ValueError(f"{manifest_file} belongs to a different input or settings, run without --resume to start over")
+        done = manifest["chunks_done"]
+        output_bytes = manifest["output_bytes"]
+        logger.info(f"Resuming after {done} chunks")
+    
+    # Ensure directory exists
+    os.makedirs(os.path.dirname(output_file) if os.path.dirname(output_file) else '.', exist_ok=True)
+    
+    with open(output_file, "r+b" if done else "wb") as out:
+        # Drop anything written after the last checkpoint
+        out.truncate(output_bytes)
+        out.seek(output_bytes)
+        
+        def write(separator, translation):
+            nonlocal done, output_bytes
+            data = (separator + (translation or "")).encode("utf-8")
+            out.write(data)
+            out.flush()
+            output_bytes += len(data)
+            if translation is not None:
+                done += 1
+            save_manifest(manifest_file, {"settings": settings, "chunks_done": done, "output_bytes": output_bytes})
+        
+        async def translate_batch(batch):
+            await translate_chunk_list(
+                [chunk for _, chunk in batch], source_lang, target_lang, backend, cache,
+                workers=workers, on_chunk=lambda i, translation: write(batch[i][0], translation), memory=memory
             )
-            print("Found output area using the working selector")
-            
-            # Get the translated text
-            translated_text = output_area.text
-            print(f"Got translated text (length: {len(translated_text)} characters)")
-            
-            # Add the translated chunk to our collection
-            all_translations.append(translated_text)
-        
-        # Combine all translated chunks
-        complete_translation = " ".join(all_translations)
-        print(f"Combined all translations (total length: {len(complete_translation)} characters)")
-        
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(output_file) if os.path.dirname(output_file) else '.', exist_ok=True)
-        
-        # Save to file
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(complete_translation)
-            
-        print(f"Translation saved to {output_file}")
-        return complete_translation
-            
-    finally:
-        # Close the browser
-        driver.quit()
-        print("Browser closed")
+        
+        async def translate_all():
+            index = 0
+            batch = []
+            for separator, chunk in iter_file_chunks(input_file, chunk_size):
+                if chunk is None:
+                    await translate_batch(batch)
+                    write(separator, None)
+                    return index
+                
+                # Chunks up to the checkpoint are already in the output file
+                if index >= done:
+                    batch.append((separator, chunk))
+                index += 1
+                
+                if len(batch) >= batch_size:
+                    await translate_batch(batch)
+                    batch = []
+                    logger.info(f"Translated {done} chunks so far")
+        
+        total = run_async(translate_all(), backend)
+    
+    # Finished, nothing left to resume
+    os.remove(manifest_file)
+    logger.info(f"Translation saved to {output_file}")
+    return total
+
+def output_file_for(output_file, target_lang):
+    """Name of the output file for one of several targets, e.g. out.txt -> out.hi.txt"""
+    base, ext = os.path.splitext(output_file)
+    return f"{base}.{target_lang}{ext}"
 
 def read_input_file(file_path):
     """Read text from input file."""
@@ -215,24 +1143,102 @@ if __name__ == "__main__":
                         help='Source language code (default: gu for Gujarati)')
     parser.add_argument('--target-lang', type=str, default='en', 
                         help='Target language code (default: en for English)')
+    parser.add_argument('--target-langs', type=str, default=None,
+                        help='Comma-separated target language codes, each saved to <output-file>.<code>.txt')
     parser.add_argument('--chunk-size', type=int, default=4000,
                         help='Maximum characters per chunk (default: 4000)')
+    parser.add_argument('--backend', type=str, choices=list(BACKENDS), default=None,
+                        help='Translation backend (default: $TRANSLATE_BACKEND or selenium)')
+    parser.add_argument('--backend-url', type=str, default=None,
+                        help='Translate endpoint of a LibreTranslate-compatible service for --backend http (default: $TRANSLATE_HTTP_URL)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of chunks to translate in parallel (default: 1)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Translate every chunk even if a cached translation exists')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Translate every sentence even if the translation memory has it')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted --input-file translation from its checkpoint')
+    parser.add_argument('--format', type=str, choices=['auto', 'text', *PARSERS], default='auto',
+                        help='Structure of the input, only its text is translated (default: auto, from the --input-file extension)')
     
     args = parser.parse_args()
+    configure_logging()
+    backend_options = {"url": args.backend_url} if args.backend_url else {}
     
-    # Get the text to translate
+    # Structured documents are parsed whole, plain single-target files are streamed instead of read at once
+    document_format = args.format if args.format != 'auto' else detect_format(args.input_file) if args.input_file else 'text'
+    stream_file = args.input_file and not args.target_langs and document_format == 'text'
     if args.text:
         text_to_translate = args.text
-    else:
+    elif not stream_file:
         text_to_translate = read_input_file(args.input_file)
     
+    # Close pooled browsers when the script exits
+    atexit.register(SESSION_POOL.close_all)
+    
+    # Every worker needs its own browser
+    SESSION_POOL.max_size = max(SESSION_POOL.max_size, args.workers)
+    
     try:
-        result = translate_text(
-            text_to_translate=text_to_translate,
-            output_file=args.output_file,
-            source_lang=args.source_lang,
-            target_lang=args.target_lang
-        )
-        print(f"Translation complete: {result[:100]}..." if len(result) > 100 else f"Translation complete: {result}")
+        if document_format != 'text':
+            target_langs = [lang.strip() for lang in args.target_langs.split(',') if lang.strip()] if args.target_langs else [args.target_lang]
+            results = {}
+            for lang in target_langs:
+                output_file = output_file_for(args.output_file, lang) if args.target_langs else args.output_file
+                results[lang] = translate_document(
+                    content=text_to_translate,
+                    fmt=document_format,
+                    source_lang=args.source_lang,
+                    target_lang=lang,
+                    backend=create_backend(args.backend, **backend_options),
+                    cache=TranslationCache(memory_size=0) if args.no_cache else None,
+                    memory=False if args.no_memory else None,
+                    workers=args.workers,
+                    chunk_size=args.chunk_size
+                )
+                save_translation(results[lang], output_file)
+        elif stream_file:
+            total = translate_file(
+                input_file=args.input_file,
+                output_file=args.output_file,
+                source_lang=args.source_lang,
+                target_lang=args.target_lang,
+                backend=create_backend(args.backend, **backend_options),
+                cache=TranslationCache(memory_size=0) if args.no_cache else None,
+                memory=False if args.no_memory else None,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                resume=args.resume
+            )
+            print(f"Translation complete: {total} chunks saved to {args.output_file}")
+            results = {}
+        elif args.target_langs:
+            target_langs = [lang.strip() for lang in args.target_langs.split(',') if lang.strip()]
+            results = translate_text_multi(
+                text_to_translate=text_to_translate,
+                output_files={lang: output_file_for(args.output_file, lang) for lang in target_langs},
+                source_lang=args.source_lang,
+                target_langs=target_langs,
+                backend=create_backend(args.backend, **backend_options),
+                cache=TranslationCache(memory_size=0) if args.no_cache else None,
+                memory=False if args.no_memory else None,
+                workers=args.workers,
+                chunk_size=args.chunk_size
+            )
+        else:
+            results = {args.target_lang: translate_text(
+                text_to_translate=text_to_translate,
+                output_file=args.output_file,
+                source_lang=args.source_lang,
+                target_lang=args.target_lang,
+                backend=create_backend(args.backend, **backend_options),
+                cache=TranslationCache(memory_size=0) if args.no_cache else None,
+                memory=False if args.no_memory else None,
+                workers=args.workers,
+                chunk_size=args.chunk_size
+            )}
+        for lang, result in results.items():
+            print(f"Translation complete ({lang}): {result[:100]}..." if len(result) > 100 else f"Translation complete ({lang}): {result}")
     except Exception as e:
         print(f"Script failed with error: {e}")
@@ -0,0 +1,401 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+import metrics
+from redis_client import create_redis_client
+
+logger = logging.getLogger("job_queue")
+
+# Lower numbers run first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted to a scheduler whose queue is full."""
+
+
+class JobQueue(ABC):
+    """
+    Queue of jobs waiting for a worker, highest priority first.
+
+    A job is a JSON-serializable dict. `put` stamps it with `enqueued_at`,
+    a wall-clock time, so waits can be measured on whichever node runs it.
+
+    Args:
+        max_queue (int): Maximum number of jobs waiting to run
+    """
+
+    # True if other processes take jobs from the same queue, so waiting jobs outlive this one
+    shared = False
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+
+    @abstractmethod
+    def put(self, job: Dict, priority: str = "normal"):
+        """
+        Add a job to the queue.
+
+        Raises:
+            QueueFullError: If max_queue jobs are already waiting
+        """
+
+    @abstractmethod
+    async def get(self) -> Dict:
+        """Wait for the next job and take it off the queue."""
+
+    @abstractmethod
+    def depth(self) -> int:
+        """Return the number of jobs waiting."""
+
+    @abstractmethod
+    def oldest(self) -> Optional[float]:
+        """Return when the longest waiting job was queued, or None if the queue is empty."""
+
+    def close(self):
+        """Release connections held by the queue."""
+
+    def _full(self) -> QueueFullError:
+        return QueueFullError(f"Translation queue is full ({self.max_queue} jobs waiting)")
+
+
+class LocalJobQueue(JobQueue):
+    """Queue in process memory, only seen by the workers of this process."""
+
+    def __init__(self, max_queue: int = 100):
+        super().__init__(max_queue)
+        self._queue: "asyncio.PriorityQueue" = asyncio.PriorityQueue(maxsize=max_queue)
+        self._sequence = itertools.count()
+        # Enqueue time of every waiting job, by sequence number
+        self._waiting: Dict[int, float] = {}
+
+    def put(self, job: Dict, priority: str = "normal"):
+        sequence = next(self._sequence)
+        job = {**job, "enqueued_at": time.time()}
+        try:
+            self._queue.put_nowait((PRIORITIES[priority], sequence, job))
+        except asyncio.QueueFull:
+            raise self._full()
+        self._waiting[sequence] = job["enqueued_at"]
+
+    async def get(self) -> Dict:
+        _, sequence, job = await self._queue.get()
+        self._waiting.pop(sequence, None)
+        self._queue.task_done()
+        return job
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def oldest(self) -> Optional[float]:
+        return min(self._waiting.values(), default=None)
+
+
+class SharedJobQueue(JobQueue):
+    """
+    Base class for queues that several processes take jobs from.
+
+    Only one worker task per process waits on the shared queue at a time,
+    on one thread, so idle workers don't each hold a thread or a connection.
+    A job taken off the queue by a worker that was cancelled meanwhile is
+    put back at the front.
+
+    Delivery is at most once: a job leaves the queue when a worker takes it
+    and is not handed out again if that node stops. The job's lease in the
+    job store runs out instead and the job is marked failed, see
+    translate_api.fail_orphaned_jobs, so a resubmitted request starts it over.
+    """
+
+    # Longest a blocking pop waits before checking again, bounds how long shutdown takes
+    poll_seconds = 1.0
+    shared = True
+
+    def __init__(self, max_queue: int = 100):
+        super().__init__(max_queue)
+        self._getter = asyncio.Lock()
+
+    async def get(self) -> Dict:
+        async with self._getter:
+            while True:
+                future = asyncio.get_running_loop().run_in_executor(None, self._pop, self.poll_seconds)
+                try:
+                    job = await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    future.add_done_callback(self._return_popped)
+                    raise
+                if job is not None:
+                    return job
+
+    def _return_popped(self, future):
+        if not future.cancelled() and future.exception() is None and future.result() is not None:
+            job = future.result()
+            # Done callbacks run on the event loop, the push goes to the store like the pop did
+            asyncio.get_running_loop().run_in_executor(None, self._push_front, job, job.get("priority", "normal"))
+
+    @abstractmethod
+    def _pop(self, timeout: float) -> Optional[Dict]:
+        """Take the next job off the queue, waiting up to `timeout` seconds. Runs on a thread."""
+
+    @abstractmethod
+    def _push_front(self, job: Dict, priority: str):
+        """Put a job back at the front of its priority."""
+
+
+class SQLiteJobQueue(SharedJobQueue):
+    """
+    Queue in a SQLite file, shared by every process on a node that opens it.
+
+    Jobs are claimed by deleting their row in one statement, so each job
+    runs once. Workers poll, backing off to `poll_seconds` while idle.
+
+    Args:
+        path (str): SQLite database file
+        max_queue (int): Maximum number of jobs waiting to run
+    """
+
+    def __init__(self, path: str = "translations/queue.sqlite", max_queue: int = 100):
+        super().__init__(max_queue)
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS queue ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, priority INTEGER NOT NULL, enqueued_at REAL NOT NULL, job TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS queue_order ON queue (priority, seq)")
+
+    def put(self, job: Dict, priority: str = "normal"):
+        job = {**job, "enqueued_at": time.time(), "priority": priority}
+        with self._lock:
+            # Check and insert in one write transaction, so processes can't overfill the queue together
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if self._db.execute("SELECT COUNT(*) FROM queue").fetchone()[0] >= self.max_queue:
+                    raise self._full()
+                self._db.execute(
+                    "INSERT INTO queue (priority, enqueued_at, job) VALUES (?, ?, ?)",
+                    (PRIORITIES[priority], job["enqueued_at"], json.dumps(job))
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM queue").fetchone()[0]
+
+    def oldest(self) -> Optional[float]:
+        with self._lock:
+            return self._db.execute("SELECT MIN(enqueued_at) FROM queue").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _pop(self, timeout: float) -> Optional[Dict]:
+        deadline = time.monotonic() + timeout
+        delay = 0.01
+        while True:
+            with self._lock:
+                row = self._db.execute(
+                    "DELETE FROM queue WHERE seq = (SELECT seq FROM queue ORDER BY priority, seq LIMIT 1) RETURNING job"
+                ).fetchone()
+            if row is not None:
+                return json.loads(row[0])
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            delay = min(delay * 2, 0.25)
+
+    def _push_front(self, job: Dict, priority: str):
+        with self._lock:
+            first = self._db.execute("SELECT MIN(seq) FROM queue").fetchone()[0]
+            self._db.execute(
+                "INSERT INTO queue (seq, priority, enqueued_at, job) VALUES (?, ?, ?, ?)",
+                ((first or 1) - 1, PRIORITIES[priority], job["enqueued_at"], json.dumps(job))
+            )
+
+
+class RedisJobQueue(SharedJobQueue):
+    """
+    Queue in Redis, shared by the API nodes of every machine.
+
+    Each priority is a list and BLPOP checks them highest priority first,
+    so a pop is one blocking round-trip however many nodes are waiting.
+    A put pushes the job and counts the queue in one MULTI transaction and
+    takes the job back out if that overfilled it, so nodes submitting at
+    the same time never leave more than `max_queue` jobs waiting.
+
+    Args:
+        client (RedisClient): Connection to the server
+        prefix (str): Prefix of every key
+        max_queue (int): Maximum number of jobs waiting to run
+    """
+
+    def __init__(self, client, prefix: str = "translate:", max_queue: int = 100):
+        super().__init__(max_queue)
+        self.client = client
+        self._keys = [f"{prefix}queue:{priority}" for priority in PRIORITIES]
+
+    def put(self, job: Dict, priority: str = "normal"):
+        job = {**job, "enqueued_at": time.time(), "priority": priority}
+        key, payload = self._keys[PRIORITIES[priority]], json.dumps(job)
+        replies = self.client.pipeline([("MULTI",), ("RPUSH", key, payload), *[("LLEN", k) for k in self._keys], ("EXEC",)])
+        results = replies[-1]
+        for reply in replies[:-1] + (results if isinstance(results, list) else [results]):
+            if isinstance(reply, Exception):
+                raise reply
+        if sum(results[1:]) > self.max_queue:
+            # A worker may have taken the job meanwhile, then it was accepted after all
+            if self.client.execute("LREM", key, 1, payload):
+                raise self._full()
+
+    def depth(self) -> int:
+        return sum(self.client.pipeline([("LLEN", key) for key in self._keys]))
+
+    def oldest(self) -> Optional[float]:
+        heads = self.client.pipeline([("LINDEX", key, 0) for key in self._keys])
+        return min((json.loads(head)["enqueued_at"] for head in heads if head is not None), default=None)
+
+    def close(self):
+        self.client.close()
+
+    def _pop(self, timeout: float) -> Optional[Dict]:
+        reply = self.client.execute("BLPOP", *self._keys, timeout, timeout=timeout + self.client.timeout)
+        return json.loads(reply[1]) if reply is not None else None
+
+    def _push_front(self, job: Dict, priority: str):
+        self.client.execute("LPUSH", self._keys[PRIORITIES[priority]], json.dumps(job))
+
+
+def create_job_queue(name: Optional[str] = None, max_queue: int = 100) -> JobQueue:
+    """
+    Create a job queue by name.
+
+    Args:
+        name (str): 'local', 'sqlite' or 'redis' (default: $TRANSLATE_QUEUE or 'local').
+            The SQLite file is taken from $TRANSLATE_QUEUE_DB and the Redis server from $TRANSLATE_REDIS_URL.
+        max_queue (int): Maximum number of jobs waiting to run
+
+    Returns:
+        JobQueue: The job queue
+    """
+    name = name or os.environ.get("TRANSLATE_QUEUE", "local")
+    if name == "local":
+        return LocalJobQueue(max_queue)
+    if name == "sqlite":
+        return SQLiteJobQueue(os.environ.get("TRANSLATE_QUEUE_DB", "translations/queue.sqlite"), max_queue)
+    if name == "redis":
+        return RedisJobQueue(create_redis_client(), max_queue=max_queue)
+    raise ValueError(f"Unknown job queue '{name}', expected 'local', 'sqlite' or 'redis'")
+
+
+class JobScheduler:
+    """
+    Runs jobs from a bounded priority queue on worker tasks.
+
+    `slots` worker tasks take jobs off the queue and run `handler(job)`
+    for each, so at most that many jobs run at once in this process. Jobs
+    await their backends and blocking browser calls run on a bounded
+    thread pool, so a running job costs a task rather than a thread and
+    slots can go into the hundreds. Submitting to a full queue raises
+    QueueFullError instead of piling up work.
+
+    With a shared queue, every process that runs a scheduler on it takes
+    jobs from it, and a process with no slots only submits.
+
+    Args:
+        handler (callable): Coroutine function run with each job dict
+        slots (int): Number of jobs that run at the same time
+        queue (JobQueue): Queue to take jobs from (default: a LocalJobQueue of max_queue jobs)
+        max_queue (int): Maximum number of jobs waiting to run, for the default queue
+    """
+
+    def __init__(self, handler: Callable[[Dict], Awaitable], slots: int = 32, queue: Optional[JobQueue] = None, max_queue: int = 100):
+        self.handler = handler
+        self.slots = slots
+        self.queue = queue if queue is not None else LocalJobQueue(max_queue)
+
+        self._tasks: List[asyncio.Task] = []
+        self._busy: Set[asyncio.Task] = set()
+        self._stopping = False
+        self._waits: deque = deque(maxlen=100)
+
+    @property
+    def max_queue(self) -> int:
+        return self.queue.max_queue
+
+    def start(self):
+        """Start the worker tasks on the running event loop."""
+        self._stopping = False
+        for i in range(self.slots):
+            self._tasks.append(asyncio.create_task(self._work(), name=f"translation-worker-{i}"))
+
+    async def shutdown(self, wait: bool = True):
+        """Stop taking jobs from the queue. Running jobs are allowed to finish when `wait` is True, otherwise cancelled."""
+        self._stopping = True
+        for task in self._tasks:
+            if not wait or task not in self._busy:
+                task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.queue.close()
+
+    def submit(self, job: Dict, priority: str = "normal"):
+        """
+        Queue a job for `handler`.
+
+        Args:
+            job (dict): JSON-serializable description of the job
+            priority (str): 'high', 'normal' or 'low'
+
+        Raises:
+            QueueFullError: If max_queue jobs are already waiting
+        """
+        self.queue.put(job, priority)
+
+    def stats(self) -> Dict:
+        """Return queue depth, running jobs and recent queue wait times."""
+        oldest = self.queue.oldest()
+        waits = list(self._waits)
+        return {
+            "queue_depth": self.queue.depth(),
+            "max_queue": self.max_queue,
+            "active": len(self._busy),
+            "slots": self.slots,
+            "oldest_wait_seconds": max(time.time() - oldest, 0.0) if oldest is not None else 0.0,
+            "average_wait_seconds": sum(waits) / len(waits) if waits else 0.0,
+            "max_wait_seconds": max(waits, default=0.0),
+        }
+
+    async def _work(self):
+        task = asyncio.current_task()
+        while not self._stopping:
+            job = await self.queue.get()
+
+            wait = max(time.time() - job["enqueued_at"], 0.0)
+            metrics.QUEUE_WAIT_SECONDS.observe(wait)
+            self._waits.append(wait)
+            self._busy.add(task)
+            try:
+                await self.handler(job)
+            except Exception as e:
+                # Jobs record their own failures, this only keeps the worker alive
+                logger.exception(f"Job failed in worker: {e}")
+            finally:
+                self._busy.discard(task)
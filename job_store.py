@@ -0,0 +1,692 @@
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from redis_client import create_redis_client
+from result_store import FileResultStore, ResultStore
+
+# Jobs in these states are done running and may be evicted. Partial and failed
+# jobs can still be retried, which puts them back into a running state.
+FINISHED_STATUSES = {"completed", "partial", "failed"}
+
+# Fields jobs can be looked up by with JobStore.find
+INDEXED_FIELDS = ("request_key", "idempotency_key")
+
+# Position of a job in listing order, (created_at, job_id)
+Cursor = Tuple[str, str]
+
+
+def load_result(job: Dict, results: ResultStore) -> Dict:
+    """Fill in `result` from the job's result file, and `results` from its per-target result files."""
+    if job.get("result") is None:
+        job["result"] = results.read(job.get("result_file"))
+    if job.get("result_files") and job.get("results") is None:
+        job["results"] = {target: results.read(path) for target, path in job["result_files"].items()}
+    return job
+
+
+def remove_result(job: Dict, results: ResultStore):
+    """Delete the job's result and chunk files, if it has any."""
+    for path in [job.get("result_file"), job.get("chunk_file"), *(job.get("result_files") or {}).values()]:
+        results.delete(path)
+
+
+def cursor_of(job: Dict) -> Cursor:
+    """Return the position of a job in listing order."""
+    return job["created_at"], job["job_id"]
+
+
+def matches(job: Dict, after: Optional[Cursor], statuses: Optional[Sequence[str]],
+            created_after: Optional[str], created_before: Optional[str]) -> bool:
+    """Check a job against the filters of JobStore.page."""
+    if after is not None and cursor_of(job) <= tuple(after):
+        return False
+    if statuses and job["status"] not in statuses:
+        return False
+    if created_after is not None and job["created_at"] < created_after:
+        return False
+    if created_before is not None and job["created_at"] >= created_before:
+        return False
+    return True
+
+
+class JobStore(ABC):
+    """
+    Storage for translation job records.
+
+    A job is a dict with at least `job_id`, `status` and `created_at`.
+    Translation results stay in the job's `result_file` in the store's
+    `results` and are only read when a caller asks for them.
+    """
+
+    results: ResultStore
+
+    @abstractmethod
+    def create(self, job: Dict) -> Optional[Dict]:
+        """
+        Store a new job, unless another job already holds one of its INDEXED_FIELDS values.
+
+        The check and the insert are atomic, so of several identical requests
+        racing on any number of nodes only one creates a job.
+
+        Returns:
+            dict: The job holding the value, without its result, or None once the new job is stored
+        """
+
+    @abstractmethod
+    def get(self, job_id: str, include_result: bool = True) -> Optional[Dict]:
+        """Return a copy of the job, or None if it doesn't exist."""
+
+    @abstractmethod
+    def update(self, job_id: str, **fields) -> bool:
+        """Update fields of a job. Returns False if the job doesn't exist."""
+
+    @abstractmethod
+    def delete(self, job_id: str) -> Optional[Dict]:
+        """Remove a job and its result file. Returns the removed job, or None."""
+
+    @abstractmethod
+    def list(self, include_result: bool = True) -> List[Dict]:
+        """Return all jobs, oldest first."""
+
+    def page(self, after: Optional[Cursor] = None, limit: int = 100, statuses: Optional[Sequence[str]] = None,
+             created_after: Optional[str] = None, created_before: Optional[str] = None,
+             include_result: bool = False) -> List[Dict]:
+        """
+        Return one page of jobs in (created_at, job_id) order.
+
+        Args:
+            after (tuple): (created_at, job_id) of the last job of the previous page, None for the first page
+            limit (int): Maximum number of jobs to return
+            statuses (list): Only return jobs in one of these states
+            created_after (str): Only return jobs created at or after this ISO timestamp
+            created_before (str): Only return jobs created before this ISO timestamp
+            include_result (bool): Read each job's result from its result file
+
+        Returns:
+            list: Up to `limit` jobs, oldest first
+        """
+        jobs = [job for job in self.list(include_result=False) if matches(job, after, statuses, created_after, created_before)]
+        jobs.sort(key=cursor_of)
+        jobs = jobs[:limit]
+        if include_result:
+            for job in jobs:
+                load_result(job, self.results)
+        return jobs
+
+    @abstractmethod
+    def find(self, field: str, value: str) -> Optional[Dict]:
+        """Return the job holding `value` for `field`, one of INDEXED_FIELDS, without its result."""
+
+    @abstractmethod
+    def release(self, field: str, value: str, job_id: str):
+        """Let a new job take `value` for `field` if job `job_id` holds it, the job itself is kept."""
+
+    def __contains__(self, job_id: str) -> bool:
+        return self.get(job_id, include_result=False) is not None
+
+
+class MemoryJobStore(JobStore):
+    """
+    Job store kept in process memory.
+
+    Holds at most `max_jobs` jobs. Finished jobs are evicted once they are
+    older than `ttl_seconds`, or oldest first when the store is full.
+
+    Args:
+        max_jobs (int): Maximum number of jobs to keep
+        ttl_seconds (float): How long finished jobs are kept, None to keep them until evicted for space
+        results (ResultStore): Where result files are kept (default: local files)
+    """
+
+    def __init__(self, max_jobs: int = 10000, ttl_seconds: Optional[float] = 24 * 3600, results: Optional[ResultStore] = None):
+        self.max_jobs = max_jobs
+        self.ttl_seconds = ttl_seconds
+        self.results = results or FileResultStore()
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._finished_at: Dict[str, float] = {}
+        self._index: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: Dict) -> Optional[Dict]:
+        with self._lock:
+            for field in INDEXED_FIELDS:
+                holder = self._jobs.get(self._index.get((field, job.get(field))))
+                if job.get(field) is not None and holder is not None and holder["job_id"] != job["job_id"]:
+                    return dict(holder)
+            self._jobs[job["job_id"]] = dict(job)
+            for field in INDEXED_FIELDS:
+                if job.get(field) is not None:
+                    self._index[(field, job[field])] = job["job_id"]
+            evicted = self._evict()
+        for old in evicted:
+            remove_result(old, self.results)
+        return None
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            job = dict(job) if job is not None else None
+        if job is not None and include_result:
+            load_result(job, self.results)
+        return job
+
+    def update(self, job_id: str, **fields) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            job.update(fields)
+            if job.get("status") in FINISHED_STATUSES:
+                self._finished_at.setdefault(job_id, time.monotonic())
+            else:
+                self._finished_at.pop(job_id, None)
+            return True
+
+    def delete(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._pop(job_id)
+        if job is not None:
+            remove_result(job, self.results)
+        return job
+
+    def list(self, include_result: bool = True) -> List[Dict]:
+        with self._lock:
+            evicted = self._evict()
+            jobs = [dict(job) for job in self._jobs.values()]
+        for old in evicted:
+            remove_result(old, self.results)
+        if include_result:
+            for job in jobs:
+                load_result(job, self.results)
+        return jobs
+
+    def page(self, after: Optional[Cursor] = None, limit: int = 100, statuses: Optional[Sequence[str]] = None,
+             created_after: Optional[str] = None, created_before: Optional[str] = None,
+             include_result: bool = False) -> List[Dict]:
+        # Only the jobs on the page are copied, not the whole store
+        with self._lock:
+            evicted = self._evict()
+            found = heapq.nsmallest(
+                limit,
+                (job for job in self._jobs.values() if matches(job, after, statuses, created_after, created_before)),
+                key=cursor_of
+            )
+            jobs = [dict(job) for job in found]
+        for old in evicted:
+            remove_result(old, self.results)
+        if include_result:
+            for job in jobs:
+                load_result(job, self.results)
+        return jobs
+
+    def find(self, field: str, value: str) -> Optional[Dict]:
+        with self._lock:
+            job_id = self._index.get((field, value))
+            job = self._jobs.get(job_id) if job_id else None
+            return dict(job) if job is not None else None
+
+    def release(self, field: str, value: str, job_id: str):
+        with self._lock:
+            if self._index.get((field, value)) == job_id:
+                del self._index[(field, value)]
+
+    def _pop(self, job_id: str) -> Optional[Dict]:
+        """Remove a job and its index entries. Caller must hold the lock."""
+        job = self._jobs.pop(job_id, None)
+        self._finished_at.pop(job_id, None)
+        if job is not None:
+            for field in INDEXED_FIELDS:
+                if self._index.get((field, job.get(field))) == job_id:
+                    del self._index[(field, job[field])]
+        return job
+
+    def _evict(self) -> List[Dict]:
+        """Drop expired finished jobs and trim to max_jobs. Caller must hold the lock."""
+        evicted = []
+        now = time.monotonic()
+
+        if self.ttl_seconds is not None:
+            for job_id, finished_at in list(self._finished_at.items()):
+                if now - finished_at > self.ttl_seconds:
+                    evicted.append(self._pop(job_id))
+
+        # Only finished jobs are dropped for space, running jobs still need their record
+        if len(self._jobs) > self.max_jobs:
+            for job_id in list(self._finished_at):
+                if len(self._jobs) <= self.max_jobs:
+                    break
+                evicted.append(self._pop(job_id))
+
+        return evicted
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Job store backed by a SQLite file.
+
+    Every uvicorn worker that opens the same file sees the same jobs, and
+    jobs survive restarts. Finished jobs older than `ttl_seconds` are removed
+    together with their result files.
+
+    Args:
+        path (str): SQLite database file
+        ttl_seconds (float): How long finished jobs are kept, None to keep them forever
+        results (ResultStore): Where result files are kept (default: local files)
+    """
+
+    # Columns stored as-is, everything else goes into the `extra` JSON column
+    COLUMNS = ("job_id", "status", "created_at", "completed_at", "text_length", "chunks", "error", "result_file")
+
+    def __init__(self, path: str = "translations/jobs.sqlite", ttl_seconds: Optional[float] = 7 * 24 * 3600,
+                 results: Optional[ResultStore] = None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.results = results or FileResultStore()
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at TEXT NOT NULL, completed_at TEXT, "
+            "text_length INTEGER, chunks INTEGER, error TEXT, result_file TEXT, extra TEXT, finished_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_created_at_job_id ON jobs (created_at, job_id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)")
+        # The primary key makes each value of an indexed field belong to one job, across processes
+        migrate = self._db.execute("SELECT 1 FROM sqlite_master WHERE name = 'job_keys'").fetchone() is None
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS job_keys ("
+            "field TEXT NOT NULL, value TEXT NOT NULL, job_id TEXT NOT NULL, PRIMARY KEY (field, value))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS job_keys_job_id ON job_keys (job_id)")
+        if migrate:
+            # Files from before job_keys existed: the newest job with a value holds it
+            for field in INDEXED_FIELDS:
+                self._db.execute(
+                    f"INSERT OR IGNORE INTO job_keys (field, value, job_id) SELECT ?, json_extract(extra, '$.{field}'), job_id "
+                    f"FROM jobs WHERE json_extract(extra, '$.{field}') IS NOT NULL ORDER BY created_at DESC", (field,)
+                )
+        self._db.commit()
+
+    def create(self, job: Dict) -> Optional[Dict]:
+        columns, extra = self._split(job)
+        columns["extra"] = json.dumps(extra)
+        columns["finished_at"] = time.time() if job.get("status") in FINISHED_STATUSES else None
+        names = ", ".join(columns)
+        placeholders = ", ".join("?" for _ in columns)
+        with self._lock:
+            # Claiming the keys starts the write transaction, so other processes wait until it commits
+            for field in INDEXED_FIELDS:
+                if job.get(field) is None:
+                    continue
+                claimed = self._db.execute(
+                    "INSERT OR IGNORE INTO job_keys (field, value, job_id) VALUES (?, ?, ?)", (field, job[field], job["job_id"])
+                ).rowcount
+                if claimed:
+                    continue
+                row = self._db.execute(
+                    f"SELECT {', '.join(self.COLUMNS)}, extra FROM job_keys JOIN jobs USING (job_id) "
+                    "WHERE field = ? AND value = ? AND job_id != ?", (field, job[field], job["job_id"])
+                ).fetchone()
+                if row is not None:
+                    self._db.rollback()
+                    return self._to_job(row)
+                # The holder is gone or is this job, take the value over
+                self._db.execute(
+                    "UPDATE job_keys SET job_id = ? WHERE field = ? AND value = ?", (job["job_id"], field, job[field])
+                )
+            self._db.execute(f"INSERT OR REPLACE INTO jobs ({names}) VALUES ({placeholders})", list(columns.values()))
+            self._db.commit()
+        self._sweep()
+        return None
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(self.COLUMNS)}, extra FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = self._to_job(row)
+        if include_result:
+            load_result(job, self.results)
+        return job
+
+    def update(self, job_id: str, **fields) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT extra FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return False
+            columns, extra = self._split(fields)
+            if extra:
+                merged = json.loads(row[0] or "{}")
+                merged.update(extra)
+                columns["extra"] = json.dumps(merged)
+            if fields.get("status") in FINISHED_STATUSES:
+                columns["finished_at"] = time.time()
+            elif "status" in fields:
+                columns["finished_at"] = None
+            if columns:
+                assignments = ", ".join(f"{name} = ?" for name in columns)
+                self._db.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", [*columns.values(), job_id])
+                self._db.commit()
+            return True
+
+    def delete(self, job_id: str) -> Optional[Dict]:
+        job = self.get(job_id, include_result=False)
+        if job is None:
+            return None
+        with self._lock:
+            self._db.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            self._db.execute("DELETE FROM job_keys WHERE job_id = ?", (job_id,))
+            self._db.commit()
+        remove_result(job, self.results)
+        return job
+
+    def list(self, include_result: bool = True) -> List[Dict]:
+        self._sweep()
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(self.COLUMNS)}, extra FROM jobs ORDER BY created_at"
+            ).fetchall()
+        jobs = [self._to_job(row) for row in rows]
+        if include_result:
+            for job in jobs:
+                load_result(job, self.results)
+        return jobs
+
+    def page(self, after: Optional[Cursor] = None, limit: int = 100, statuses: Optional[Sequence[str]] = None,
+             created_after: Optional[str] = None, created_before: Optional[str] = None,
+             include_result: bool = False) -> List[Dict]:
+        self._sweep()
+        conditions, params = [], []
+        if after is not None:
+            conditions.append("(created_at > ? OR (created_at = ? AND job_id > ?))")
+            params.extend([after[0], after[0], after[1]])
+        if statuses:
+            conditions.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        if created_after is not None:
+            conditions.append("created_at >= ?")
+            params.append(created_after)
+        if created_before is not None:
+            conditions.append("created_at < ?")
+            params.append(created_before)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(self.COLUMNS)}, extra FROM jobs {where}ORDER BY created_at, job_id LIMIT ?",
+                [*params, limit]
+            ).fetchall()
+        jobs = [self._to_job(row) for row in rows]
+        if include_result:
+            for job in jobs:
+                load_result(job, self.results)
+        return jobs
+
+    def find(self, field: str, value: str) -> Optional[Dict]:
+        if field not in INDEXED_FIELDS:
+            raise ValueError(f"Jobs can't be looked up by '{field}'")
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(self.COLUMNS)}, extra FROM job_keys JOIN jobs USING (job_id) WHERE field = ? AND value = ?",
+                (field, value)
+            ).fetchone()
+        return self._to_job(row) if row is not None else None
+
+    def release(self, field: str, value: str, job_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM job_keys WHERE field = ? AND value = ? AND job_id = ?", (field, value, job_id))
+            self._db.commit()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
+
+    def _split(self, fields: Dict):
+        columns = {name: value for name, value in fields.items() if name in self.COLUMNS}
+        # Results live in files, never in the database
+        extra = {name: value for name, value in fields.items() if name not in self.COLUMNS and name not in ("result", "results")}
+        return columns, extra
+
+    def _to_job(self, row) -> Dict:
+        job = dict(zip(self.COLUMNS, row[:-1]))
+        job.update(json.loads(row[-1] or "{}"))
+        job.setdefault("result", None)
+        return job
+
+    def _sweep(self):
+        """Remove expired finished jobs, at most once a minute."""
+        now = time.time()
+        if self.ttl_seconds is None or now - self._last_sweep < 60:
+            return
+        self._last_sweep = now
+        cutoff = now - self.ttl_seconds
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT result_file, extra FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,)
+            ).fetchall()
+            self._db.execute(
+                "DELETE FROM job_keys WHERE job_id IN (SELECT job_id FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?)",
+                (cutoff,)
+            )
+            self._db.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,))
+            self._db.commit()
+        for path, extra in rows:
+            remove_result({"result_file": path, **json.loads(extra or "{}")}, self.results)
+
+
+class RedisJobStore(JobStore):
+    """
+    Job store kept in Redis, shared by every API node.
+
+    Each job is a hash of JSON-encoded fields, so nodes updating different
+    fields of the same job never overwrite each other. A sorted set orders
+    jobs by (created_at, job_id) for paging and small index keys find jobs
+    by INDEXED_FIELDS. A new job takes its index keys with SET NX after its
+    hash is written, so a job found through an index key always exists.
+    Finished jobs expire after `ttl_seconds`; entries they leave in the
+    sorted set are dropped when a listing comes across them.
+
+    Args:
+        client (RedisClient): Connection to the server
+        prefix (str): Prefix of every key
+        ttl_seconds (int): How long finished jobs are kept, None to keep them forever
+        results (ResultStore): Where result files are kept (default: local files)
+    """
+
+    def __init__(self, client, prefix: str = "translate:", ttl_seconds: Optional[int] = 7 * 24 * 3600,
+                 results: Optional[ResultStore] = None):
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self.results = results or FileResultStore()
+        self._order_key = f"{prefix}jobs"
+
+    def create(self, job: Dict) -> Optional[Dict]:
+        key = self._key(job["job_id"])
+        fields = [item for name, value in job.items() if name not in ("result", "results") for item in (name, json.dumps(value))]
+        self._run([("DEL", key), ("HSET", key, *fields), ("ZADD", self._order_key, 0, self._member(job))])
+
+        for field in INDEXED_FIELDS:
+            if job.get(field) is None:
+                continue
+            index_key = self._index_key(field, job[field])
+            if self.client.execute("SET", index_key, job["job_id"], "NX") is not None:
+                continue
+            holder_id = self.client.execute("GET", index_key)
+            holder = self.get(holder_id.decode(), include_result=False) if holder_id is not None else None
+            if holder is not None and holder["job_id"] != job["job_id"]:
+                # Another request got there first, drop this job and the keys it took
+                self.delete(job["job_id"])
+                return holder
+            # The holder is gone or is this job, take the value over
+            self.client.execute("SET", index_key, job["job_id"])
+
+        if job.get("status") in FINISHED_STATUSES:
+            self._run(self._expire(job, "EXPIRE"))
+        return None
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[Dict]:
+        job = self._to_job(self.client.execute("HGETALL", self._key(job_id)))
+        if job is not None and include_result:
+            load_result(job, self.results)
+        return job
+
+    def update(self, job_id: str, **fields) -> bool:
+        key = self._key(job_id)
+        indexed = self.client.execute("HMGET", key, "job_id", *INDEXED_FIELDS)
+        if indexed[0] is None:
+            return False
+        job = {name: json.loads(value) for name, value in zip(("job_id", *INDEXED_FIELDS), indexed) if value is not None}
+
+        # Results live in the result store, never in the job record
+        pairs = [item for name, value in fields.items() if name not in ("result", "results") for item in (name, json.dumps(value))]
+        commands = [("HSET", key, *pairs)] if pairs else []
+        if fields.get("status") in FINISHED_STATUSES:
+            commands.extend(self._expire(job, "EXPIRE"))
+        elif "status" in fields:
+            commands.extend(self._expire(job, "PERSIST"))
+        self._run(commands)
+        return True
+
+    def delete(self, job_id: str) -> Optional[Dict]:
+        job = self.get(job_id, include_result=False)
+        if job is None:
+            return None
+        commands = [("DEL", self._key(job_id)), ("ZREM", self._order_key, self._member(job))]
+        for field in INDEXED_FIELDS:
+            if job.get(field) is not None and self.client.execute("GET", self._index_key(field, job[field])) == job_id.encode():
+                commands.append(("DEL", self._index_key(field, job[field])))
+        self._run(commands)
+        remove_result(job, self.results)
+        return job
+
+    def list(self, include_result: bool = True) -> List[Dict]:
+        members = self.client.execute("ZRANGE", self._order_key, 0, -1)
+        jobs = self._load(members)
+        if include_result:
+            for job in jobs:
+                load_result(job, self.results)
+        return jobs
+
+    def page(self, after: Optional[Cursor] = None, limit: int = 100, statuses: Optional[Sequence[str]] = None,
+             created_after: Optional[str] = None, created_before: Optional[str] = None,
+             include_result: bool = False) -> List[Dict]:
+        # Members sort like (created_at, job_id) because they are joined with a NUL byte
+        bounds = []
+        if created_after is not None:
+            bounds.append((created_after.encode(), b"["))
+        if after is not None:
+            bounds.append((self._member({"created_at": after[0], "job_id": after[1]}), b"("))
+        low = b"-"
+        if bounds:
+            value, prefix = max(bounds, key=lambda bound: (bound[0], bound[1] == b"("))
+            low = prefix + value
+        high = b"(" + created_before.encode() if created_before is not None else b"+"
+
+        # Status filters may skip many jobs, so read the index in batches until the page is full
+        jobs = []
+        batch_size = max(limit, 100) if statuses else limit
+        while len(jobs) < limit:
+            members = self.client.execute("ZRANGEBYLEX", self._order_key, low, high, "LIMIT", 0, batch_size)
+            jobs.extend(job for job in self._load(members) if not statuses or job["status"] in statuses)
+            if len(members) < batch_size:
+                break
+            low = b"(" + members[-1]
+        jobs = jobs[:limit]
+
+        if include_result:
+            for job in jobs:
+                load_result(job, self.results)
+        return jobs
+
+    def find(self, field: str, value: str) -> Optional[Dict]:
+        if field not in INDEXED_FIELDS:
+            raise ValueError(f"Jobs can't be looked up by '{field}'")
+        job_id = self.client.execute("GET", self._index_key(field, value))
+        return self.get(job_id.decode(), include_result=False) if job_id is not None else None
+
+    def release(self, field: str, value: str, job_id: str):
+        index_key = self._index_key(field, value)
+        if self.client.execute("GET", index_key) == job_id.encode():
+            self.client.execute("DEL", index_key)
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}job:{job_id}"
+
+    def _index_key(self, field: str, value: str) -> str:
+        return f"{self.prefix}job-index:{field}:{value}"
+
+    def _member(self, job: Dict) -> bytes:
+        return f"{job['created_at']}\0{job['job_id']}".encode()
+
+    def _expire(self, job: Dict, command: str) -> List[tuple]:
+        """EXPIRE or PERSIST commands for a job and its index keys."""
+        if self.ttl_seconds is None:
+            return []
+        keys = [self._key(job["job_id"])]
+        keys += [self._index_key(field, job[field]) for field in INDEXED_FIELDS if job.get(field) is not None]
+        return [(command, key, self.ttl_seconds) if command == "EXPIRE" else (command, key) for key in keys]
+
+    def _load(self, members: List[bytes]) -> List[Dict]:
+        """Read the jobs behind sorted set members, dropping members whose job has expired."""
+        job_ids = [member.split(b"\0", 1)[1].decode() for member in members]
+        replies = self.client.pipeline([("HGETALL", self._key(job_id)) for job_id in job_ids])
+        jobs, expired = [], []
+        for member, reply in zip(members, replies):
+            job = self._to_job(reply)
+            if job is None:
+                expired.append(member)
+            else:
+                jobs.append(job)
+        if expired:
+            self.client.execute("ZREM", self._order_key, *expired)
+        return jobs
+
+    def _to_job(self, reply) -> Optional[Dict]:
+        if not reply or isinstance(reply, Exception):
+            return None
+        job = {name.decode(): json.loads(value) for name, value in zip(reply[::2], reply[1::2])}
+        job.setdefault("result", None)
+        return job
+
+    def _run(self, commands: List[tuple]):
+        for reply in self.client.pipeline(commands):
+            if isinstance(reply, Exception):
+                raise reply
+
+
+def create_job_store(name: Optional[str] = None, results: Optional[ResultStore] = None) -> JobStore:
+    """
+    Create a job store by name.
+
+    Args:
+        name (str): 'memory', 'sqlite' or 'redis' (default: $TRANSLATE_JOB_STORE or 'memory').
+            The SQLite file is taken from $TRANSLATE_JOB_DB and the Redis server from $TRANSLATE_REDIS_URL.
+        results (ResultStore): Where result files are kept (default: local files)
+
+    Returns:
+        JobStore: The job store
+    """
+    name = name or os.environ.get("TRANSLATE_JOB_STORE", "memory")
+    if name == "memory":
+        return MemoryJobStore(max_jobs=int(os.environ.get("TRANSLATE_MAX_JOBS", "10000")), results=results)
+    if name == "sqlite":
+        return SQLiteJobStore(os.environ.get("TRANSLATE_JOB_DB", "translations/jobs.sqlite"), results=results)
+    if name == "redis":
+        return RedisJobStore(create_redis_client(), results=results)
+    raise ValueError(f"Unknown job store '{name}', expected 'memory', 'sqlite' or 'redis'")
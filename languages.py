@@ -0,0 +1,267 @@
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+# Language data: name to ISO code mapping
+SUPPORTED_LANGUAGES = {
+    "Abkhaz": "ab",
+    "Acehnese": "ace",
+    "Acholi": "ach",
+    "Afrikaans": "af",
+    "Albanian": "sq",
+    "Alur": "alz",
+    "Amharic": "am",
+    "Arabic": "ar",
+    "Armenian": "hy",
+    "Assamese": "as",
+    "Awadhi": "awa",
+    "Aymara": "ay",
+    "Azerbaijani": "az",
+    "Balinese": "ban",
+    "Bambara": "bm",
+    "Bashkir": "ba",
+    "Basque": "eu",
+    "Batak Karo": "btx",
+    "Batak Simalungun": "bts",
+    "Batak Toba": "bbc",
+    "Belarusian": "be",
+    "Bemba": "bem",
+    "Bengali": "bn",
+    "Betawi": "bew",
+    "Bhojpuri": "bho",
+    "Bikol": "bik",
+    "Bosnian": "bs",
+    "Breton": "br",
+    "Bulgarian": "bg",
+    "Buryat": "bua",
+    "Cantonese": "yue",
+    "Catalan": "ca",
+    "Cebuano": "ceb",
+    "Chichewa (Nyanja)": "ny",
+    "Chinese (Simplified)": "zh-CN",
+    "Chinese (Traditional)": "zh-TW",
+    "Chuvash": "cv",
+    "Corsican": "co",
+    "Crimean Tatar": "crh",
+    "Croatian": "hr",
+    "Czech": "cs",
+    "Danish": "da",
+    "Dinka": "din",
+    "Divehi": "dv",
+    "Dogri": "doi",
+    "Dombe": "dov",
+    "Dutch": "nl",
+    "Dzongkha": "dz",
+    "English": "en",
+    "Esperanto": "eo",
+    "Estonian": "et",
+    "Ewe": "ee",
+    "Fijian": "fj",
+    "Filipino (Tagalog)": "fil",
+    "Finnish": "fi",
+    "French": "fr",
+    "French (French)": "fr-FR",
+    "French (Canadian)": "fr-CA",
+    "Frisian": "fy",
+    "Fulfulde": "ff",
+    "Ga": "gaa",
+    "Galician": "gl",
+    "Ganda (Luganda)": "lg",
+    "Georgian": "ka",
+    "German": "de",
+    "Greek": "el",
+    "Guarani": "gn",
+    "Gujarati": "gu",
+    "Haitian Creole": "ht",
+    "Hakha Chin": "cnh",
+    "Hausa": "ha",
+    "Hawaiian": "haw",
+    "Hebrew": "he",
+    "Hiligaynon": "hil",
+    "Hindi": "hi",
+    "Hmong": "hmn",
+    "Hungarian": "hu",
+    "Hunsrik": "hrx",
+    "Icelandic": "is",
+    "Igbo": "ig",
+    "Iloko": "ilo",
+    "Indonesian": "id",
+    "Irish": "ga",
+    "Italian": "it",
+    "Japanese": "ja",
+    "Javanese": "jv",
+    "Kannada": "kn",
+    "Kapampangan": "pam",
+    "Kazakh": "kk",
+    "Khmer": "km",
+    "Kiga": "cgg",
+    "Kinyarwanda": "rw",
+    "Kituba": "ktu",
+    "Konkani": "gom",
+    "Korean": "ko",
+    "Krio": "kri",
+    "Kurdish (Kurmanji)": "ku",
+    "Kurdish (Sorani)": "ckb",
+    "Kyrgyz": "ky",
+    "Lao": "lo",
+    "Latgalian": "ltg",
+    "Latin": "la",
+    "Latvian": "lv",
+    "Ligurian": "lij",
+    "Limburgan": "li",
+    "Lingala": "ln",
+    "Lithuanian": "lt",
+    "Lombard": "lmo",
+    "Luo": "luo",
+    "Luxembourgish": "lb",
+    "Macedonian": "mk",
+    "Maithili": "mai",
+    "Makassar": "mak",
+    "Malagasy": "mg",
+    "Malay": "ms",
+    "Malay (Jawi)": "ms-Arab",
+    "Malayalam": "ml",
+    "Maltese": "mt",
+    "Maori": "mi",
+    "Marathi": "mr",
+    "Meadow Mari": "chm",
+    "Meiteilon (Manipuri)": "mni-Mtei",
+    "Minang": "min",
+    "Mizo": "lus",
+    "Mongolian": "mn",
+    "Myanmar (Burmese)": "my",
+    "Ndebele (South)": "nr",
+    "Nepalbhasa (Newari)": "new",
+    "Nepali": "ne",
+    "Northern Sotho (Sepedi)": "nso",
+    "Norwegian": "no",
+    "Nuer": "nus",
+    "Occitan": "oc",
+    "Odia (Oriya)": "or",
+    "Oromo": "om",
+    "Pangasinan": "pag",
+    "Papiamento": "pap",
+    "Pashto": "ps",
+    "Persian": "fa",
+    "Polish": "pl",
+    "Portuguese": "pt",
+    "Portuguese (Portugal)": "pt-PT",
+    "Portuguese (Brazil)": "pt-BR",
+    "Punjabi": "pa",
+    "Punjabi (Shahmukhi)": "pa-Arab",
+    "Quechua": "qu",
+    "Romani": "rom",
+    "Romanian": "ro",
+    "Rundi": "rn",
+    "Russian": "ru",
+    "Samoan": "sm",
+    "Sango": "sg",
+    "Sanskrit": "sa",
+    "Scots Gaelic": "gd",
+    "Serbian": "sr",
+    "Sesotho": "st",
+    "Seychellois Creole": "crs",
+    "Shan": "shn",
+    "Shona": "sn",
+    "Sicilian": "scn",
+    "Silesian": "szl",
+    "Sindhi": "sd",
+    "Sinhala (Sinhalese)": "si",
+    "Slovak": "sk",
+    "Slovenian": "sl",
+    "Somali": "so",
+    "Spanish": "es",
+    "Sundanese": "su",
+    "Swahili": "sw",
+    "Swati": "ss",
+    "Swedish": "sv",
+    "Tajik": "tg",
+    "Tamil": "ta",
+    "Tatar": "tt",
+    "Telugu": "te",
+    "Tetum": "tet",
+    "Thai": "th",
+    "Tigrinya": "ti",
+    "Tsonga": "ts",
+    "Tswana": "tn",
+    "Turkish": "tr",
+    "Turkmen": "tk",
+    "Twi (Akan)": "ak",
+    "Ukrainian": "uk",
+    "Urdu": "ur",
+    "Uyghur": "ug",
+    "Uzbek": "uz",
+    "Vietnamese": "vi",
+    "Welsh": "cy",
+    "Xhosa": "xh",
+    "Yiddish": "yi",
+    "Yoruba": "yo",
+    "Yucatec Maya": "yua",
+    "Zulu": "zu"
+}
+
+# Other codes clients commonly send for the same languages
+LANGUAGE_ALIASES = {
+    "iw": "he",
+    "jw": "jv",
+    "tl": "fil",
+    "nb": "no",
+    "zh": "zh-CN",
+    "zh-Hans": "zh-CN",
+    "zh-Hant": "zh-TW",
+    "mni": "mni-Mtei",
+}
+
+
+class LanguageRegistry:
+    """
+    Lookup tables for supported languages, built once.
+
+    Codes and names are matched case-insensitively, and aliases resolve to
+    the code the backends understand. The `/languages` response is
+    serialized up front together with its ETag.
+
+    Args:
+        languages (dict): Language name to code
+        aliases (dict): Alternative code to supported code
+    """
+
+    def __init__(self, languages: Dict[str, str], aliases: Optional[Dict[str, str]] = None):
+        self.languages = dict(languages)
+        self._names = {code: name for name, code in self.languages.items()}
+        self._codes = {code.lower(): code for code in self._names}
+        self._codes_by_name = {name.lower(): code for name, code in self.languages.items()}
+
+        # A real code always wins over an alias
+        for alias, code in (aliases or {}).items():
+            self._codes.setdefault(alias.lower(), self._codes[code.lower()])
+
+        entries = [{"name": name, "code": code} for name, code in self.languages.items()]
+        self.payload = json.dumps({"languages": entries, "count": len(entries)}, ensure_ascii=False).encode("utf-8")
+        self.etag = f'"{hashlib.sha256(self.payload).hexdigest()[:32]}"'
+
+    def resolve(self, code: str) -> Optional[str]:
+        """Return the supported code for a code or alias in any case, or None."""
+        return self._codes.get(code.lower())
+
+    def code_for_name(self, name: str) -> Optional[str]:
+        """Return the code of a language by its name in any case, or None."""
+        return self._codes_by_name.get(name.lower())
+
+    def name(self, code: str) -> Optional[str]:
+        """Return the name of a language by its code or alias, or None."""
+        code = self.resolve(code)
+        return self._names[code] if code else None
+
+    def codes(self) -> List[str]:
+        """Return every supported code."""
+        return list(self._names)
+
+    def __contains__(self, code: str) -> bool:
+        return self.resolve(code) is not None
+
+    def __len__(self) -> int:
+        return len(self.languages)
+
+
+LANGUAGES = LanguageRegistry(SUPPORTED_LANGUAGES, LANGUAGE_ALIASES)
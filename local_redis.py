@@ -0,0 +1,497 @@
+"""
+Small Redis-protocol server for offline testing.
+
+Keeps its data in memory and implements the commands the shared job
+queue, job store, result store and cache use, so several API processes
+can be run against one store without installing Redis:
+
+    python local_redis.py --port 6390
+    TRANSLATE_REDIS_URL=redis://127.0.0.1:6390/0 ...
+"""
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+from redis_client import RedisError, encode_command
+
+OK = "OK"
+
+
+class WrongTypeError(RedisError):
+    def __init__(self):
+        super().__init__("WRONGTYPE Operation against a key holding the wrong kind of value")
+
+
+class LocalRedisStore:
+    """
+    Data of one database: strings, lists, hashes and sorted sets with expiry.
+
+    Every command runs under one lock, like Redis runs them one at a time.
+    """
+
+    def __init__(self):
+        self.data: Dict[bytes, object] = {}
+        self.expires: Dict[bytes, float] = {}
+        self.lock = threading.Lock()
+        self.pushed = threading.Condition(self.lock)
+
+    def get(self, key: bytes, kind: type, create: bool = False):
+        """Return the value at key, checking its type and expiry. Caller must hold the lock."""
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.time():
+            self.delete(key)
+        value = self.data.get(key)
+        if value is None:
+            if create:
+                value = self.data[key] = kind()
+            return value
+        if not isinstance(value, kind):
+            raise WrongTypeError()
+        return value
+
+    def delete(self, key: bytes) -> bool:
+        self.expires.pop(key, None)
+        return self.data.pop(key, None) is not None
+
+    def exists(self, key: bytes) -> bool:
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.time():
+            self.delete(key)
+        return key in self.data
+
+
+def lex_bound(bound: bytes):
+    """Parse a ZRANGEBYLEX bound into (value, inclusive), None for - and +."""
+    if bound in (b"-", b"+"):
+        return bound, None
+    if bound[:1] == b"[":
+        return bound[1:], True
+    if bound[:1] == b"(":
+        return bound[1:], False
+    raise RedisError("ERR min or max not valid string range item")
+
+
+def in_lex_range(member: bytes, low, high) -> bool:
+    (low_value, low_inclusive), (high_value, high_inclusive) = low, high
+    if low_value == b"+" and low_inclusive is None:
+        return False
+    if low_inclusive is not None and (member < low_value or (member == low_value and not low_inclusive)):
+        return False
+    if high_value == b"-" and high_inclusive is None:
+        return False
+    if high_inclusive is not None and (member > high_value or (member == high_value and not high_inclusive)):
+        return False
+    return True
+
+
+class LocalRedisHandler(socketserver.StreamRequestHandler):
+    """Reads RESP commands from a connection and answers them in order."""
+
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        self.db = 0
+        # Commands queued since MULTI, None outside a transaction
+        self.transaction = None
+        while True:
+            try:
+                args = self.read_command()
+            except (ConnectionError, ValueError):
+                return
+            if args is None:
+                return
+            try:
+                reply = self.dispatch(args)
+            except RedisError as e:
+                reply = e
+            except (ValueError, IndexError):
+                reply = RedisError("ERR syntax error or value is not an integer")
+            try:
+                self.wfile.write(encode_reply(reply))
+            except OSError:
+                return
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if line[:1] != b"*":
+            # Inline command, as typed into telnet
+            return line.split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            header = self.rfile.readline()
+            length = int(header[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    @property
+    def store(self) -> LocalRedisStore:
+        return self.server.store(self.db)
+
+    def dispatch(self, args):
+        name = args[0].decode().upper()
+        command = getattr(self, f"cmd_{name.lower()}", None)
+        if command is None:
+            raise RedisError(f"ERR unknown command '{name}'")
+        if self.transaction is not None and name not in ("MULTI", "EXEC", "DISCARD"):
+            self.transaction.append((command, args[1:]))
+            return "QUEUED"
+        if name in ("BLPOP", "SELECT", "PING", "ECHO", "AUTH", "MULTI", "EXEC", "DISCARD"):
+            return command(*args[1:])
+        with self.store.lock:
+            return command(*args[1:])
+
+    # Connection
+
+    def cmd_ping(self, *args):
+        return args[0] if args else "PONG"
+
+    def cmd_echo(self, message):
+        return message
+
+    def cmd_auth(self, *args):
+        return OK
+
+    def cmd_select(self, db):
+        self.db = int(db)
+        return OK
+
+    # Transactions
+
+    def cmd_multi(self):
+        if self.transaction is not None:
+            raise RedisError("ERR MULTI calls can not be nested")
+        self.transaction = []
+        return OK
+
+    def cmd_exec(self):
+        if self.transaction is None:
+            raise RedisError("ERR EXEC without MULTI")
+        queued, self.transaction = self.transaction, None
+        replies = []
+        # All queued commands run under one lock, so no other client sees them half done
+        with self.store.lock:
+            for command, args in queued:
+                try:
+                    replies.append(command(*args))
+                except RedisError as e:
+                    replies.append(e)
+                except (ValueError, IndexError):
+                    replies.append(RedisError("ERR syntax error or value is not an integer"))
+        return replies
+
+    def cmd_discard(self):
+        if self.transaction is None:
+            raise RedisError("ERR DISCARD without MULTI")
+        self.transaction = None
+        return OK
+
+    # Keys
+
+    def cmd_del(self, *keys):
+        return sum(self.store.delete(key) for key in keys)
+
+    def cmd_exists(self, *keys):
+        return sum(self.store.exists(key) for key in keys)
+
+    def cmd_expire(self, key, seconds):
+        if not self.store.exists(key):
+            return 0
+        self.store.expires[key] = time.time() + int(seconds)
+        return 1
+
+    def cmd_persist(self, key):
+        return 1 if self.store.exists(key) and self.store.expires.pop(key, None) is not None else 0
+
+    def cmd_rename(self, key, new_key):
+        if not self.store.exists(key):
+            raise RedisError("ERR no such key")
+        value, deadline = self.store.data.pop(key), self.store.expires.pop(key, None)
+        self.store.delete(new_key)
+        self.store.data[new_key] = value
+        if deadline is not None:
+            self.store.expires[new_key] = deadline
+        return OK
+
+    def cmd_ttl(self, key):
+        if not self.store.exists(key):
+            return -2
+        deadline = self.store.expires.get(key)
+        return -1 if deadline is None else max(int(deadline - time.time() + 0.5), 0)
+
+    def cmd_scan(self, cursor, *options):
+        # Everything in one pass, cursor 0 ends the scan
+        options = list(options)
+        upper = [option.upper() for option in options]
+        pattern = options[upper.index(b"MATCH") + 1] if b"MATCH" in upper else b"*"
+        keys = [key for key in list(self.store.data) if self.store.exists(key) and fnmatch.fnmatchcase(key, pattern)]
+        return [b"0", keys]
+
+    def cmd_dbsize(self):
+        return sum(self.store.exists(key) for key in list(self.store.data))
+
+    def cmd_flushdb(self, *args):
+        self.store.data.clear()
+        self.store.expires.clear()
+        return OK
+
+    # Strings
+
+    def cmd_get(self, key):
+        return self.store.get(key, bytes)
+
+    def cmd_mget(self, *keys):
+        values = []
+        for key in keys:
+            value = self.store.data.get(key) if self.store.exists(key) else None
+            values.append(value if isinstance(value, bytes) else None)
+        return values
+
+    def cmd_set(self, key, value, *options):
+        options = [option.upper() for option in options]
+        ttl = None
+        if b"EX" in options:
+            ttl = int(options[options.index(b"EX") + 1])
+        if b"PX" in options:
+            ttl = int(options[options.index(b"PX") + 1]) / 1000
+        exists = self.store.exists(key)
+        if (b"NX" in options and exists) or (b"XX" in options and not exists):
+            return None
+        self.store.delete(key)
+        self.store.data[key] = value
+        if ttl is not None:
+            self.store.expires[key] = time.time() + ttl
+        return OK
+
+    def cmd_append(self, key, value):
+        current = self.store.get(key, bytes) or b""
+        self.store.data[key] = current + value
+        return len(current) + len(value)
+
+    def cmd_strlen(self, key):
+        return len(self.store.get(key, bytes) or b"")
+
+    def cmd_getrange(self, key, start, end):
+        value = self.store.get(key, bytes) or b""
+        start, end = int(start), int(end)
+        if start < 0:
+            start = max(len(value) + start, 0)
+        if end < 0:
+            end = len(value) + end
+        return value[start:end + 1]
+
+    def cmd_incr(self, key):
+        value = int(self.store.get(key, bytes) or b"0") + 1
+        self.store.data[key] = str(value).encode()
+        return value
+
+    # Hashes
+
+    def cmd_hset(self, key, *pairs):
+        if not pairs or len(pairs) % 2:
+            raise RedisError("ERR wrong number of arguments for 'hset' command")
+        fields = self.store.get(key, dict, create=True)
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in fields
+            fields[field] = value
+        return added
+
+    def cmd_hget(self, key, field):
+        return (self.store.get(key, dict) or {}).get(field)
+
+    def cmd_hmget(self, key, *names):
+        fields = self.store.get(key, dict) or {}
+        return [fields.get(name) for name in names]
+
+    def cmd_hgetall(self, key):
+        fields = self.store.get(key, dict) or {}
+        return [item for pair in fields.items() for item in pair]
+
+    def cmd_hdel(self, key, *names):
+        fields = self.store.get(key, dict) or {}
+        removed = sum(fields.pop(name, None) is not None for name in names)
+        if not fields:
+            self.store.delete(key)
+        return removed
+
+    # Lists
+
+    def cmd_rpush(self, key, *values):
+        items = self.store.get(key, deque, create=True)
+        items.extend(values)
+        self.store.pushed.notify_all()
+        return len(items)
+
+    def cmd_lpush(self, key, *values):
+        items = self.store.get(key, deque, create=True)
+        items.extendleft(values)
+        self.store.pushed.notify_all()
+        return len(items)
+
+    def cmd_lpop(self, key):
+        items = self.store.get(key, deque)
+        if not items:
+            return None
+        value = items.popleft()
+        if not items:
+            self.store.delete(key)
+        return value
+
+    def cmd_lrem(self, key, count, value):
+        items = self.store.get(key, deque)
+        if not items:
+            return 0
+        count = int(count)
+        matches = [i for i, item in enumerate(items) if item == value]
+        if count > 0:
+            matches = matches[:count]
+        elif count < 0:
+            matches = matches[count:]
+        removed = set(matches)
+        remaining = [item for i, item in enumerate(items) if i not in removed]
+        items.clear()
+        items.extend(remaining)
+        if not items:
+            self.store.delete(key)
+        return len(removed)
+
+    def cmd_llen(self, key):
+        return len(self.store.get(key, deque) or ())
+
+    def cmd_lindex(self, key, index):
+        items = self.store.get(key, deque) or ()
+        index = int(index)
+        return items[index] if -len(items) <= index < len(items) else None
+
+    def cmd_lrange(self, key, start, stop):
+        items = list(self.store.get(key, deque) or ())
+        start, stop = int(start), int(stop)
+        stop = len(items) + stop if stop < 0 else stop
+        return items[max(start, 0):stop + 1]
+
+    def cmd_blpop(self, *args):
+        keys, timeout = args[:-1], float(args[-1])
+        deadline = time.time() + timeout if timeout > 0 else None
+        store = self.store
+        with store.pushed:
+            while True:
+                for key in keys:
+                    value = self.cmd_lpop(key)
+                    if value is not None:
+                        return [key, value]
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                store.pushed.wait(remaining)
+
+    # Sorted sets
+
+    def cmd_zadd(self, key, *pairs):
+        members = self.store.get(key, dict, create=True)
+        added = 0
+        for score, member in zip(pairs[::2], pairs[1::2]):
+            added += member not in members
+            members[member] = float(score)
+        return added
+
+    def cmd_zrem(self, key, *names):
+        members = self.store.get(key, dict) or {}
+        removed = sum(members.pop(name, None) is not None for name in names)
+        if not members:
+            self.store.delete(key)
+        return removed
+
+    def cmd_zcard(self, key):
+        return len(self.store.get(key, dict) or {})
+
+    def cmd_zrange(self, key, start, stop):
+        members = sorted((self.store.get(key, dict) or {}).items(), key=lambda item: (item[1], item[0]))
+        start, stop = int(start), int(stop)
+        stop = len(members) + stop if stop < 0 else stop
+        return [member for member, _ in members[max(start, 0):stop + 1]]
+
+    def cmd_zrangebylex(self, key, low, high, *limit):
+        low, high = lex_bound(low), lex_bound(high)
+        members = sorted(member for member in (self.store.get(key, dict) or {}) if in_lex_range(member, low, high))
+        if limit:
+            offset, count = int(limit[1]), int(limit[2])
+            members = members[offset:] if count < 0 else members[offset:offset + count]
+        return members
+
+
+def encode_reply(reply) -> bytes:
+    """Encode a Python value as a RESP reply."""
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, RedisError):
+        message = str(reply)
+        if not message.split(" ", 1)[0].isupper():
+            message = f"ERR {message}"
+        return b"-%s\r\n" % message.encode("utf-8")
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode("utf-8")
+    if isinstance(reply, bool) or isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, bytes):
+        return encode_command([reply])[4:]
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(encode_reply(item) for item in reply)
+    raise TypeError(f"Can't encode {type(reply).__name__} as a reply")
+
+
+class LocalRedisServer(socketserver.ThreadingTCPServer):
+    """Threaded server holding every database in memory."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 256
+
+    def __init__(self, address):
+        super().__init__(address, LocalRedisHandler)
+        self._stores: Dict[int, LocalRedisStore] = {}
+        self._stores_lock = threading.Lock()
+
+    def store(self, db: int) -> LocalRedisStore:
+        with self._stores_lock:
+            if db not in self._stores:
+                self._stores[db] = LocalRedisStore()
+            return self._stores[db]
+
+
+def start_local_redis(host: str = "127.0.0.1", port: int = 0) -> LocalRedisServer:
+    """
+    Start the stand-in server on a background thread.
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind, 0 picks a free one
+
+    Returns:
+        LocalRedisServer: The running server, call shutdown() to stop it.
+        The URL is f"redis://{host}:{server.server_address[1]}/0".
+    """
+    server = LocalRedisServer((host, port))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run a local stand-in Redis server')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=6379, help='Port to bind (default: 6379)')
+    args = parser.parse_args()
+
+    server = start_local_redis(args.host, args.port)
+    print(f"Local Redis server running on redis://{args.host}:{server.server_address[1]}/0")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
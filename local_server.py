@@ -0,0 +1,127 @@
+"""
+Small HTTP translation server for offline testing.
+
+Speaks a LibreTranslate-style API so HTTP clients can be load-tested
+without touching the network:
+
+    POST /translate  {"q": "text" | ["text", ...], "source": "en", "target": "hi"}
+    ->               {"translatedText": "..." | ["...", ...]}
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backends import local_translate
+
+
+class LocalTranslateHandler(BaseHTTPRequestHandler):
+    """Request handler, configured through attributes on the server."""
+
+    # Keep connections open between requests, like a real service, and send
+    # small responses right away instead of waiting for the client's ACK
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/translate":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            query = payload["q"]
+            source_lang = payload.get("source", "auto")
+            target_lang = payload["target"]
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {"error": f"Invalid request: {e}"})
+            return
+
+        texts = query if isinstance(query, list) else [query]
+
+        server = self.server
+        delay = server.latency * len(texts)
+        if server.jitter:
+            delay += server.random.uniform(0, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if server.failure_rate and server.random.random() < server.failure_rate:
+            self._send_json(503, {"error": "Injected failure"})
+            return
+
+        translations = [local_translate(text, source_lang, target_lang) for text in texts]
+        self._send_json(200, {"translatedText": translations if isinstance(query, list) else translations[0]})
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+
+class LocalTranslateServer(ThreadingHTTPServer):
+    """Threaded server that accepts bursts of many concurrent connections."""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def start_local_server(host="127.0.0.1", port=0, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+    """
+    Start the stand-in server on a background thread.
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind, 0 picks a free one
+        latency (float): Seconds to wait per text
+        jitter (float): Extra random wait of up to this many seconds per request
+        failure_rate (float): Probability that a request returns 503
+        seed (int): Seed for jitter and failure injection
+
+    Returns:
+        LocalTranslateServer: The running server, call shutdown() to stop it.
+        The base URL is f"http://{host}:{server.server_port}".
+    """
+    server = LocalTranslateServer((host, port), LocalTranslateHandler)
+    server.latency = latency
+    server.jitter = jitter
+    server.failure_rate = failure_rate
+    server.random = random.Random(seed)
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run a local stand-in translation server')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=5000, help='Port to bind (default: 5000)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait per text (default: 0)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random wait per request (default: 0)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of requests that fail (default: 0)')
+    args = parser.parse_args()
+
+    server = start_local_server(args.host, args.port, args.latency, args.jitter, args.failure_rate)
+    print(f"Local translation server running on http://{args.host}:{server.server_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,84 @@
+import contextvars
+import json
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from typing import Optional
+
+# Job the current thread or task is working on, added to every log record
+JOB_ID: contextvars.ContextVar = contextvars.ContextVar("job_id", default=None)
+
+# Record attributes written as structured fields when present
+FIELDS = ("job_id", "chunk", "source_lang", "target_lang", "seconds", "characters", "attempt")
+
+
+class ContextFilter(logging.Filter):
+    """Fill in the job_id of records from the current context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "job_id", None) is None:
+            record.job_id = JOB_ID.get()
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    """`time level logger: message key=value ...`, readable in a terminal."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = [f"{name}={getattr(record, name)}" for name in FIELDS if getattr(record, name, None) is not None]
+        return f"{line} {' '.join(fields)}" if fields else line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log collectors."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None):
+    """
+    Send log records to stderr with job context, once per process.
+
+    Args:
+        level (str): Log level (default: $TRANSLATE_LOG_LEVEL or 'INFO')
+        fmt (str): 'text' or 'json' (default: $TRANSLATE_LOG_FORMAT or 'text')
+    """
+    root = logging.getLogger()
+    if any(getattr(handler, "translate_handler", False) for handler in root.handlers):
+        return
+
+    fmt = fmt or os.environ.get("TRANSLATE_LOG_FORMAT", "text")
+    handler = logging.StreamHandler(sys.stderr)
+    handler.translate_handler = True
+    handler.addFilter(ContextFilter())
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    root.addHandler(handler)
+    root.setLevel(level or os.environ.get("TRANSLATE_LOG_LEVEL", "INFO"))
+
+
+@contextmanager
+def job_context(job_id: str):
+    """Tag every log record written inside the block with job_id, including from asyncio tasks and to_thread calls."""
+    token = JOB_ID.set(job_id)
+    try:
+        yield
+    finally:
+        JOB_ID.reset(token)
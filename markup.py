@@ -0,0 +1,713 @@
+"""
+Translate structured documents without sending what isn't meant to be translated.
+
+HTML, Markdown, JSON, gettext PO and YAML files are split into a template
+and the segments a reader sees: text and alt/title attributes in HTML,
+headings, paragraphs, list items and table cells in Markdown, and string
+values in localization files. Code, tags, URLs, placeholders and numbers
+inside a segment are replaced by short tokens, so only words go to the
+backend, and everything is put back in place after translation.
+"""
+import html
+import json
+import os
+import re
+from functools import partial
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+from translation_memory import MASK_PATTERN
+
+# Formats with a parser, by file extension
+FORMATS = {
+    ".html": "html", ".htm": "html",
+    ".md": "markdown", ".markdown": "markdown",
+    ".json": "json",
+    ".po": "po", ".pot": "po",
+    ".yaml": "yaml", ".yml": "yaml",
+}
+
+# Extension of translated files, by format
+EXTENSIONS = {"html": ".html", "markdown": ".md", "json": ".json", "po": ".po", "yaml": ".yaml"}
+
+# Stand-in for a protected value inside a segment. Like packing markers, plain ASCII with digits.
+TOKEN = "##{}##"
+TOKEN_PATTERN = re.compile(r"#\s*#\s*(\d+)\s*#\s*#")
+
+# Values kept out of translation in any segment: template variables like
+# {{name}} and ${name}, and everything the translation memory masks
+PROTECT_PATTERN = re.compile(r"\{\{.*?\}\}|\$\{\w+\}|" + MASK_PATTERN.pattern)
+
+# A segment is only sent if it has a letter outside its tokens
+WORD_PATTERN = re.compile(r"[^\W\d_]")
+WHITESPACE = re.compile(r"[ \t\r\n\f]+")
+
+# String values that are identifiers rather than text: snake_case names, dotted keys and paths
+IDENTIFIER_PATTERN = re.compile(r"\w*_\w*|\w+(?:[.:/]\w+)+")
+
+# Part of a document: output text, or the index of a segment whose translation goes there
+Part = Union[str, int]
+# (text or protected value, protected), text may add how it was written as a third item
+Piece = Union[Tuple[Union[str, List[Part]], bool], Tuple[str, bool, str]]
+
+
+class Document:
+    """
+    A document split into translatable segments and the parts around them.
+
+    Parsers add parts in document order. Segments are what gets translated,
+    with their protected values replaced by tokens; render() puts the
+    translations back with each value restored where its token ended up,
+    and segments left untranslated back as they were written.
+    """
+
+    def __init__(self):
+        self.segments: List[str] = []
+        self.parts: List[Part] = []
+        self._escapes: List[Callable[[str], str]] = []
+        self._values: List[List[List[Part]]] = []
+        self._edges: List[Tuple[str, str]] = []
+        self._originals: List[List[Part]] = []
+
+    def add(self, *parts: Part):
+        """Append parts to the document."""
+        self.parts.extend(part for part in parts if part != "")
+
+    def segment(self, pieces: Sequence[Piece], escape: Optional[Callable[[str], str]] = None,
+                collapse: bool = False, quote: str = "") -> List[Part]:
+        """
+        Make a segment of a run of text.
+
+        Args:
+            pieces (list): (piece, protected) pairs. Text pieces are plain text, protected pieces
+                are kept as they are, either output text or a list of parts. Text pieces may
+                add the output text they were read from, like HTML with its entities, which
+                is written back if the segment stays untranslated.
+            escape (callable): Turns plain text into output text, e.g. html.escape for HTML
+            collapse (bool): Collapse runs of whitespace inside the segment into one space
+            quote (str): Put around the translation, for values that only need quoting once translated
+
+        Returns:
+            list: Parts that render the segment, or the text as it was if it has no words to translate
+        """
+        escape = escape or str
+        values: List[List[Part]] = []
+        original: List[Part] = []
+        for piece, protected, *written in pieces:
+            if protected:
+                original.extend(piece if isinstance(piece, list) else [piece])
+            else:
+                original.append(written[0] if written else escape(piece))
+        original = [part for part in original if part != ""]
+
+        def protect(value):
+            values.append(value if isinstance(value, list) else [value])
+            return TOKEN.format(len(values) - 1)
+
+        # Replace protected pieces and values inside text pieces by tokens
+        text = "".join(
+            protect(piece) if protected else PROTECT_PATTERN.sub(lambda match: protect(escape(match.group())), piece)
+            for piece, protected, *_ in pieces
+        )
+        stripped = text.strip()
+        if not WORD_PATTERN.search(TOKEN_PATTERN.sub("", stripped)):
+            return original
+
+        # Surrounding whitespace stays in the document, so layout survives translation
+        lead = text[:len(text) - len(text.lstrip())]
+        trail = text[len(text.rstrip()):]
+        self.segments.append(WHITESPACE.sub(" ", stripped) if collapse else stripped)
+        self._escapes.append(escape)
+        self._values.append(values)
+        self._edges.append((escape(lead) + quote, quote + escape(trail)))
+        self._originals.append(original)
+        return [len(self.segments) - 1]
+
+    def render(self, translations: Sequence[Optional[str]]) -> str:
+        """
+        Put the document back together with translated segments.
+
+        Args:
+            translations (list): Translation of each segment, None keeps the segment untranslated
+
+        Returns:
+            str: The translated document
+        """
+        return "".join(self._render(self.parts, translations))
+
+    def _render(self, parts: Sequence[Part], translations: Sequence[Optional[str]]) -> List[str]:
+        output = []
+        for part in parts:
+            if isinstance(part, str):
+                output.append(part)
+                continue
+            translation = translations[part]
+            if translation is None:
+                output.extend(self._render(self._originals[part], translations))
+                continue
+            lead, trail = self._edges[part]
+            output.append(lead)
+            output.extend(self._render(restore(self._escapes[part](translation.strip()), self._values[part]), translations))
+            output.append(trail)
+        return output
+
+
+def restore(text: str, values: List[List[Part]]) -> List[Part]:
+    """Replace the tokens in a segment's output text by the values they stand for."""
+    parts: List[Part] = []
+    used = set()
+    position = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        index = int(match.group(1))
+        if index >= len(values):
+            continue
+        parts.append(text[position:match.start()])
+        parts.extend(values[index])
+        used.add(index)
+        position = match.end()
+    parts.append(text[position:])
+
+    # Values whose token the translation dropped go at the end, so no tag or placeholder is lost
+    for index, value in enumerate(values):
+        if index not in used:
+            parts.append(" ")
+            parts.extend(value)
+    return [part for part in parts if part != ""]
+
+
+def string_value(document: Document, value: str, escape: Callable[[str], str], written: Optional[str] = None,
+                 quote: str = "") -> List[Part]:
+    """Make a segment of a string value in a localization file, unless it is an identifier."""
+    written = written if written is not None else escape(value)
+    if IDENTIFIER_PATTERN.fullmatch(value):
+        return [written]
+    return document.segment([(value, False, written)], escape, quote=quote)
+
+
+def is_translated(parts: Sequence[Part]) -> bool:
+    """Return True if parts contain a segment."""
+    return any(not isinstance(part, str) for part in parts)
+
+
+# HTML tags, comments, doctypes and processing instructions. Group 1 is the tag name.
+HTML_PATTERN = re.compile(
+    r"<!--.*?-->|<!\[CDATA\[.*?\]\]>|<[!?][^>]*>|</?([A-Za-z][\w:-]*)(?:\"[^\"]*\"|'[^']*'|[^'\">])*>",
+    re.S
+)
+
+# Elements whose content is never translated
+SKIP_ELEMENTS = {"script", "style", "pre", "code", "kbd", "samp", "var", "textarea", "svg", "math", "template"}
+
+# Elements that sit inside a sentence, they are protected within the surrounding segment
+INLINE_ELEMENTS = {
+    "a", "abbr", "b", "bdi", "bdo", "br", "cite", "code", "data", "del", "dfn", "em", "font", "i", "img",
+    "ins", "kbd", "mark", "q", "s", "samp", "small", "span", "strong", "sub", "sup", "time", "u", "var", "wbr"
+}
+
+# Elements without an end tag
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+# translate="no" and Google's notranslate class opt an element out
+NO_TRANSLATE_PATTERN = re.compile(r"""\stranslate\s*=\s*["']?no\b|\sclass\s*=\s*["'][^"']*\bnotranslate\b""", re.I)
+
+# Attributes shown to readers, and the content of description meta tags
+ATTRIBUTE_PATTERN = re.compile(r"""(\s(?:alt|title|placeholder|aria-label)\s*=\s*)("[^"]*"|'[^']*')""", re.I)
+META_PATTERN = re.compile(r"""\s(?:name|property)\s*=\s*["']?(?:description|og:title|og:description)\b""", re.I)
+CONTENT_PATTERN = re.compile(r"""(\scontent\s*=\s*)("[^"]*"|'[^']*')""", re.I)
+
+escape_html_text = partial(html.escape, quote=False)
+
+
+def element_end(source: str, name: str, start: int) -> int:
+    """Return the index just past the end tag of an element whose start tag ends at `start`."""
+    depth = 1
+    for match in re.finditer(rf"<(/?){re.escape(name)}\b(?:\"[^\"]*\"|'[^']*'|[^'\">])*>", source[start:], re.I):
+        if match.group(1):
+            depth -= 1
+            if depth == 0:
+                return start + match.end()
+        elif not match.group().endswith("/>"):
+            depth += 1
+    return len(source)
+
+
+def tag_parts(document: Document, tag: str, name: str) -> List[Part]:
+    """Split a start tag into parts, with its translatable attribute values as segments."""
+    pattern = CONTENT_PATTERN if name == "meta" and META_PATTERN.search(tag) else ATTRIBUTE_PATTERN
+    parts: List[Part] = []
+    position = 0
+    for match in pattern.finditer(tag):
+        start, end = match.start(2) + 1, match.end(2) - 1
+        parts.append(tag[position:start])
+        parts.extend(document.segment([(html.unescape(tag[start:end]), False, tag[start:end])], html.escape))
+        position = end
+    parts.append(tag[position:])
+    return parts
+
+
+def extract_html(document: Document, source: str):
+    """
+    Add HTML to a document.
+
+    Text between block-level tags is one segment. Inline tags like <a> and
+    <b> are protected within the segment, so sentences stay whole, and
+    elements like <code> and <script>, or marked translate="no", are kept
+    as they are.
+    """
+    pieces: List[Piece] = []
+    start = 0
+
+    def flush(end):
+        nonlocal pieces, start
+        # Runs without anything to translate are kept as they were written, entities and all
+        parts = document.segment(pieces, escape_html_text, collapse=True)
+        document.add(*(parts if is_translated(parts) else [source[start:end]]))
+        pieces, start = [], end
+
+    position = 0
+    while True:
+        match = HTML_PATTERN.search(source, position)
+        end = match.start() if match else len(source)
+        if end > position:
+            pieces.append((html.unescape(source[position:end]), False, source[position:end]))
+        if match is None:
+            flush(end)
+            break
+
+        tag, name = match.group(), (match.group(1) or "").lower()
+        position = match.end()
+        inline = name in INLINE_ELEMENTS
+        if not name:
+            # Comments, doctypes and processing instructions
+            flush(match.start())
+            document.add(tag)
+            start = position
+            continue
+
+        opening = not tag.startswith("</")
+        if opening and (name in SKIP_ELEMENTS or NO_TRANSLATE_PATTERN.search(tag)) \
+                and name not in VOID_ELEMENTS and not tag.endswith("/>"):
+            # Keep the whole element, inline ones as one protected value
+            position = element_end(source, name, position)
+            element = source[match.start():position]
+            if inline:
+                pieces.append((element, True))
+            else:
+                flush(match.start())
+                document.add(element)
+                start = position
+            continue
+
+        parts = tag_parts(document, tag, name) if opening else [tag]
+        if inline:
+            pieces.append((parts, True))
+        else:
+            flush(match.start())
+            document.add(*parts)
+            start = position
+
+
+def parse_html(source: str) -> Document:
+    """Split an HTML document or fragment into segments."""
+    document = Document()
+    extract_html(document, source)
+    return document
+
+
+# Markdown block syntax
+FENCE_PATTERN = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+RULE_PATTERN = re.compile(r"^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+SETEXT_PATTERN = re.compile(r"^ {0,3}(?:=+|-+)[ \t]*$")
+TABLE_DELIMITER_PATTERN = re.compile(r"^ {0,3}\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)+\|?[ \t]*$|^ {0,3}\|[ \t]*:?-+:?[ \t]*\|[ \t]*$")
+REFERENCE_PATTERN = re.compile(r"^ {0,3}\[[^\]]+\]:[ \t]*\S")
+HTML_BLOCK_PATTERN = re.compile(r"^ {0,3}<(/?[A-Za-z]|!--)")
+RAW_HTML_BLOCK_PATTERN = re.compile(r"^ {0,3}<(script|pre|style|textarea)\b", re.I)
+HEADING_PATTERN = re.compile(r"^( {0,3}(?:>[ \t]?)*#{1,6}[ \t]+)(.*?)([ \t]+#+)?[ \t]*$")
+ITEM_PATTERN = re.compile(r"^([ \t]*(?:>[ \t]?)*)([ \t]*(?:(?:[-*+]|\d{1,9}[.)])[ \t]+(?:\[[ xX]\][ \t]+)?)?)(.*)$")
+INDENTED_CODE_PATTERN = re.compile(r"^(?: {4}|\t)")
+TABLE_CELL_SEPARATOR = re.compile(r"([ \t]*(?<!\\)\|[ \t]*)")
+
+# Markdown inline syntax: code spans, images, links, autolinks, inline HTML and emphasis markers
+MARKDOWN_INLINE_PATTERN = re.compile(
+    r"(?P<code>`+).*?(?P=code)"
+    r"|!\[(?P<alt>[^\]]*)\](?P<source>\([^)]*\)|\[[^\]]*\])"
+    r"|\[(?P<label>[^\]]*)\](?P<target>\([^)]*\)|\[[^\]]*\])"
+    r"|<(?:https?://|mailto:)[^>]+>|</?[A-Za-z][^>]*>"
+    r"|\*{1,3}|~~|(?<!\w)_{1,3}|_{1,3}(?!\w)"
+)
+
+
+def markdown_pieces(document: Document, text: str) -> List[Piece]:
+    """Split inline Markdown into text and protected pieces, link labels and image alt text stay translatable."""
+    pieces: List[Piece] = []
+    position = 0
+    for match in MARKDOWN_INLINE_PATTERN.finditer(text):
+        pieces.append((text[position:match.start()], False))
+        if match.group("alt") is not None:
+            alt = document.segment([(match.group("alt"), False)])
+            pieces.append((["![", *alt, "]" + match.group("source")], True))
+        elif match.group("label") is not None:
+            pieces.append(("[", True))
+            pieces.extend(markdown_pieces(document, match.group("label")))
+            pieces.append(("]" + match.group("target"), True))
+        else:
+            pieces.append((match.group(), True))
+        position = match.end()
+    pieces.append((text[position:], False))
+    return pieces
+
+
+def parse_markdown(source: str) -> Document:
+    """
+    Split a Markdown document into segments.
+
+    Headings, list items, table cells and paragraphs are segments. Lines of
+    a paragraph are joined into one, so sentences that wrap are translated
+    whole, and the translation is written on one line. Code blocks, front
+    matter, link targets and reference definitions are kept as they are,
+    and HTML blocks go through the HTML parser.
+    """
+    document = Document()
+    lines = source.splitlines(keepends=True)
+    paragraph: List[str] = []
+    prefix = prefix_quote = ""
+    ending = ""
+    in_list = False
+    in_table = False
+
+    def flush():
+        nonlocal paragraph
+        if paragraph:
+            document.add(prefix, *document.segment(markdown_pieces(document, " ".join(paragraph))), ending)
+        paragraph = []
+
+    i = 0
+    # YAML front matter
+    if lines and lines[0].rstrip() == "---":
+        end = next((j for j in range(1, len(lines)) if lines[j].rstrip() in ("---", "...")), None)
+        if end is not None:
+            document.add(*lines[:end + 1])
+            i = end + 1
+
+    while i < len(lines):
+        line = lines[i]
+        content = line.rstrip("\r\n")
+        newline = line[len(content):]
+        i += 1
+
+        fence = FENCE_PATTERN.match(content)
+        if fence:
+            # Fenced code, up to a closing fence of the same kind at least as long
+            flush()
+            marker = fence.group(1)
+            document.add(line)
+            while i < len(lines):
+                document.add(lines[i])
+                i += 1
+                if lines[i - 1].strip().startswith(marker[0] * len(marker)) and not lines[i - 1].strip().strip(marker[0]):
+                    break
+            continue
+
+        if not content.strip():
+            flush()
+            in_table = False
+            document.add(line)
+            continue
+
+        if INDENTED_CODE_PATTERN.match(content) and not paragraph and not in_list:
+            document.add(line)
+            continue
+
+        if paragraph and SETEXT_PATTERN.match(content) or RULE_PATTERN.match(content) or REFERENCE_PATTERN.match(content):
+            flush()
+            in_list = False
+            document.add(line)
+            continue
+
+        if HTML_BLOCK_PATTERN.match(content):
+            # HTML blocks run to the next blank line, raw ones to their end tag
+            flush()
+            block = [line]
+            raw = RAW_HTML_BLOCK_PATTERN.match(content)
+            end_tag = f"</{raw.group(1).lower()}" if raw else None
+            while i < len(lines) and (end_tag and end_tag not in block[-1].lower() or not end_tag and lines[i].strip()):
+                block.append(lines[i])
+                i += 1
+            extract_html(document, "".join(block))
+            continue
+
+        # Tables, from a header row followed by a delimiter row to the first line without a pipe
+        if "|" in content and (in_table or i < len(lines) and TABLE_DELIMITER_PATTERN.match(lines[i].rstrip("\r\n"))):
+            flush()
+            in_table = True
+            for cell in TABLE_CELL_SEPARATOR.split(content):
+                if TABLE_CELL_SEPARATOR.fullmatch(cell) or TABLE_DELIMITER_PATTERN.match(content):
+                    document.add(cell)
+                else:
+                    document.add(*document.segment(markdown_pieces(document, cell)))
+            document.add(newline)
+            continue
+        in_table = False
+
+        heading = HEADING_PATTERN.match(content)
+        if heading:
+            flush()
+            in_list = False
+            document.add(heading.group(1), *document.segment(markdown_pieces(document, heading.group(2))),
+                         content[heading.end(2):], newline)
+            continue
+
+        # Lines with the open paragraph's quote markers and no list marker continue it
+        quote, bullet, text = ITEM_PATTERN.match(content).groups()
+        if paragraph and not bullet and quote.strip() == prefix_quote:
+            paragraph.append(text.strip())
+        else:
+            flush()
+            if bullet:
+                in_list = True
+            elif not content.startswith((" ", "\t")):
+                in_list = False
+            prefix, prefix_quote, paragraph = quote + bullet, quote.strip(), [text.strip()]
+        ending = newline
+
+        # A hard line break ends the segment, so the break stays where it was
+        if content.endswith(("  ", "\\")):
+            paragraph[-1] += content[len(content.rstrip()):]
+            flush()
+    flush()
+    return document
+
+
+def escape_json(text: str) -> str:
+    """Escape text for the inside of a JSON string."""
+    return json.dumps(text, ensure_ascii=False)[1:-1]
+
+
+# A JSON string, followed by a colon if it is an object key
+JSON_STRING_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"(\s*:)?')
+
+
+def parse_json(source: str) -> Document:
+    """
+    Split a JSON document into segments, one per string value.
+
+    Keys and the layout of the file are kept exactly, only string values
+    are replaced.
+
+    Raises:
+        ValueError: If the document isn't valid JSON
+    """
+    json.loads(source)
+    document = Document()
+    position = 0
+    for match in JSON_STRING_PATTERN.finditer(source):
+        if match.group(1):
+            continue
+        parts = string_value(document, json.loads(match.group()), escape_json, match.group()[1:-1])
+        if is_translated(parts):
+            document.add(source[position:match.start()], '"', *parts, '"')
+            position = match.end()
+    document.add(source[position:])
+    return document
+
+
+# gettext PO keywords with a quoted string, and continuation strings
+PO_FIELD_PATTERN = re.compile(r'^(msgctxt|msgid|msgid_plural|msgstr(?:\[(\d+)\])?)[ \t]+"(.*)"[ \t]*$')
+PO_CONTINUATION_PATTERN = re.compile(r'^[ \t]*"(.*)"[ \t]*$')
+PO_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", '"': '"', "\\": "\\"}
+
+
+def unescape_po(text: str) -> str:
+    """Decode the escapes of a PO string."""
+    return re.sub(r"\\(.)", lambda match: PO_ESCAPES.get(match.group(1), match.group(1)), text)
+
+
+def escape_po(text: str) -> str:
+    """Escape text for a PO string."""
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\t", "\\t").replace("\r", "\\r")
+
+
+def po_entry(document: Document, block: List[str]):
+    """Add one PO entry, filling in its msgstr if it has none yet."""
+    fields = []
+    for number, line in enumerate(block):
+        content = line.rstrip("\r\n")
+        match = PO_FIELD_PATTERN.match(content)
+        if match:
+            fields.append([match.group(1), int(match.group(2) or 0), unescape_po(match.group(3)), number, number])
+            continue
+        match = PO_CONTINUATION_PATTERN.match(content)
+        if match and fields and fields[-1][4] == number - 1:
+            fields[-1][2] += unescape_po(match.group(1))
+            fields[-1][4] = number
+
+    sources = {keyword: value for keyword, _, value, _, _ in fields if not keyword.startswith("msgstr")}
+    targets = [field for field in fields if field[0].startswith("msgstr")]
+
+    # The header, entries that are already translated and obsolete entries are kept as they are
+    if not sources.get("msgid") or not targets or any(value for _, _, value, _, _ in targets):
+        document.add(*block)
+        return
+
+    document.add(*block[:targets[0][3]])
+    for keyword, plural, _, first, last in targets:
+        source = sources.get("msgid_plural", sources["msgid"]) if plural else sources["msgid"]
+        line = block[last].rstrip("\r\n")
+        document.add(f'{keyword} "', *document.segment([(source, False)], escape_po), '"', block[last][len(line):])
+    document.add(*block[targets[-1][4] + 1:])
+
+
+def parse_po(source: str) -> Document:
+    """
+    Split a gettext PO file into segments, one per untranslated message.
+
+    Translations are written into the empty msgstr of each entry, plural
+    forms get the translation of msgid_plural. Comments, context and
+    entries that already have a translation are kept as they are.
+    """
+    document = Document()
+    block: List[str] = []
+    for line in source.splitlines(keepends=True):
+        if line.strip():
+            block.append(line)
+            continue
+        po_entry(document, block)
+        block = []
+        document.add(line)
+    po_entry(document, block)
+    return document
+
+
+# A YAML mapping key and/or list item markers, before the value
+YAML_PREFIX_PATTERN = re.compile(
+    r"[ \t]*(?:-[ \t]+)*(?P<key>(?:\"(?:[^\"\\]|\\.)*\"|'(?:[^']|'')*'|[^\s#\"'\-?:,\[\]{}][^#]*?)[ \t]*:(?:[ \t]+|$))?"
+)
+YAML_DOUBLE_QUOTED = re.compile(r'"(?:[^"\\]|\\.)*"')
+YAML_SINGLE_QUOTED = re.compile(r"'(?:[^']|'')*'")
+YAML_BLOCK_SCALAR = re.compile(r"[|>][+-]?\d*[+-]?")
+YAML_COMMENT = re.compile(r"[ \t]+#.*$|[ \t]*$")
+
+# Plain values YAML reads as something other than a string
+YAML_KEYWORD = re.compile(r"(?i:true|false|yes|no|on|off|null|~)")
+
+
+def indentation(line: str) -> int:
+    """Return the number of leading spaces of a line."""
+    return len(line) - len(line.lstrip(" "))
+
+
+def parse_yaml(source: str) -> Document:
+    """
+    Split a YAML string table into segments, one per string value.
+
+    Reads mappings and lists line by line, so comments, keys and layout are
+    kept exactly. Plain, quoted and block scalars are translated; plain
+    values are written back double-quoted, since a translation may contain
+    characters YAML reads as syntax. Flow collections, anchors, aliases,
+    tags and plain values that continue on the next line are kept as they
+    are.
+    """
+    document = Document()
+    lines = source.splitlines(keepends=True)
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        content = line.rstrip("\r\n")
+        newline = line[len(content):]
+        i += 1
+
+        stripped = content.strip()
+        prefix = YAML_PREFIX_PATTERN.match(content).group()
+        rest = content[len(prefix):]
+        if not stripped or stripped.startswith(("#", "%")) or stripped in ("---", "...") \
+                or not prefix.strip() or not rest or rest[0] in "[{&*!@`#":
+            document.add(line)
+            continue
+
+        if YAML_BLOCK_SCALAR.fullmatch(rest.split("#")[0].strip()):
+            # A block scalar: every following line indented deeper than the key
+            document.add(line)
+            block = []
+            while i < len(lines) and (not lines[i].strip() or indentation(lines[i]) > indentation(content)):
+                block.append(lines[i])
+                i += 1
+            while block and not block[-1].strip():
+                i -= 1
+                block.pop()
+            if not block:
+                continue
+            indent = min(indentation(block_line) for block_line in block if block_line.strip())
+            text = "".join(block_line[indent:] if block_line.strip() else "\n" for block_line in block).rstrip("\r\n")
+            escape = lambda value, indent=indent: value.replace("\n", "\n" + " " * indent)
+            written = "".join(block)[indent:].rstrip("\r\n")
+            parts = document.segment([(text, False, written)], escape, collapse=rest.startswith(">"))
+            if is_translated(parts):
+                document.add(" " * indent, *parts, block[-1][len(block[-1].rstrip("\r\n")):])
+            else:
+                document.add(*block)
+            continue
+
+        quoted = (YAML_DOUBLE_QUOTED if rest[0] == '"' else YAML_SINGLE_QUOTED if rest[0] == "'" else None)
+        match = quoted.match(rest) if quoted else None
+        if match:
+            comment = rest[match.end():]
+            if not YAML_COMMENT.fullmatch(comment):
+                document.add(line)
+                continue
+            if rest[0] == '"':
+                try:
+                    value = json.loads(match.group())
+                except ValueError:
+                    document.add(line)
+                    continue
+                quote, escape = '"', escape_json
+            else:
+                value = match.group()[1:-1].replace("''", "'")
+                quote, escape = "'", lambda text: text.replace("'", "''")
+            parts = string_value(document, value, escape, match.group()[1:-1])
+        else:
+            comment = YAML_COMMENT.search(rest)
+            value, comment = rest[:comment.start()], comment.group()
+            if rest[0] in "'\"|>" or YAML_KEYWORD.fullmatch(value):
+                document.add(line)
+                continue
+            # Plain values are only quoted if they get translated
+            quote, parts = "", string_value(document, value, escape_json, value, quote='"')
+
+        if is_translated(parts):
+            document.add(prefix, quote, *parts, quote, comment, newline)
+        else:
+            document.add(line)
+    return document
+
+
+PARSERS = {
+    "html": parse_html,
+    "markdown": parse_markdown,
+    "json": parse_json,
+    "po": parse_po,
+    "yaml": parse_yaml,
+}
+
+
+def parse_document(source: str, fmt: str) -> Document:
+    """
+    Split a document into translatable segments.
+
+    Args:
+        source (str): The document
+        fmt (str): 'html', 'markdown', 'json', 'po' or 'yaml'
+
+    Returns:
+        Document: The segments and the template to render their translations into
+
+    Raises:
+        ValueError: If the format is unknown or the document can't be parsed
+    """
+    if fmt not in PARSERS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of: {', '.join(PARSERS)}")
+    return PARSERS[fmt](source)
+
+
+def detect_format(path: str, default: str = "text") -> str:
+    """Return the format of a file from its extension, or `default` if it has no parser."""
+    return FORMATS.get(os.path.splitext(path)[1].lower(), default)
@@ -0,0 +1,247 @@
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Bucket bounds in seconds, from a fast cache hit to a slow browser start
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+LabelValues = Tuple[str, ...]
+
+
+class Metric(ABC):
+    """
+    Base class for metrics in the Prometheus text format.
+
+    Metrics with `labelnames` keep one series per combination of label
+    values, selected with `labels(...)`.
+
+    Args:
+        name (str): Metric name
+        documentation (str): Help text
+        labelnames (list): Names of the labels
+        registry (Registry): Registry to add the metric to (default: REGISTRY)
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[LabelValues, object] = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values, **named) -> "Metric":
+        """Return the series for the given label values."""
+        if named:
+            values = tuple(str(named[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(value) for value in values)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = self._child(values)
+        return series
+
+    def _child(self, values: LabelValues):
+        child = type(self).__new__(type(self))
+        child._init_child(self, values)
+        return child
+
+    def _init_child(self, parent: "Metric", values: LabelValues):
+        self.name = parent.name
+        self.labelnames = parent.labelnames
+        self.label_values = values
+        self._lock = threading.Lock()
+
+    def _default(self) -> "Metric":
+        """The series of a metric without labels."""
+        if self.labelnames and not hasattr(self, "label_values"):
+            raise ValueError(f"{self.name} has labels, use labels(...) first")
+        return self if hasattr(self, "label_values") else self.labels()
+
+    def _all_series(self) -> List["Metric"]:
+        with self._lock:
+            return list(self._series.values())
+
+    def _format_labels(self, values: LabelValues, extra: Sequence[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+        return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Return the sample lines of every series."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def _init_child(self, parent, values):
+        super()._init_child(parent, values)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        series = self._default()
+        with series._lock:
+            series.value += amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._format_labels(s.label_values)} {s.value}" for s in self._all_series()]
+
+
+class Gauge(Metric):
+    """A value that goes up and down, or is read from a function at scrape time."""
+
+    kind = "gauge"
+
+    def _init_child(self, parent, values):
+        super()._init_child(parent, values)
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        series = self._default()
+        with series._lock:
+            series.value = value
+
+    def inc(self, amount: float = 1.0):
+        series = self._default()
+        with series._lock:
+            series.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value from `function` whenever metrics are rendered."""
+        self._default().function = function
+
+    def samples(self) -> List[str]:
+        lines = []
+        for s in self._all_series():
+            try:
+                value = s.function() if s.function else s.value
+            except Exception:
+                continue
+            lines.append(f"{self.name}{self._format_labels(s.label_values)} {value}")
+        return lines
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in cumulative buckets.
+
+    Args:
+        buckets (list): Upper bounds of the buckets, +Inf is added
+        Other arguments as for Metric.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 registry: Optional["Registry"] = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _init_child(self, parent, values):
+        super()._init_child(parent, values)
+        self.buckets = parent.buckets
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        series = self._default()
+        index = bisect.bisect_left(series.buckets, value)
+        with series._lock:
+            series.counts[index] += 1
+            series.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the seconds spent in a `with` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for s in self._all_series():
+            with s._lock:
+                counts, total = list(s.counts), s.sum
+            cumulative = 0
+            for bound, count in zip([*s.buckets, float("inf")], counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f"{self.name}_bucket{self._format_labels(s.label_values, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(s.label_values)} {total}")
+            lines.append(f"{self.name}_count{self._format_labels(s.label_values)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# Content type of Registry.render()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Browser sessions
+BROWSER_STARTUP_SECONDS = Histogram("translate_browser_startup_seconds", "Seconds to start Chrome")
+PAGE_LOAD_SECONDS = Histogram("translate_page_load_seconds", "Seconds to open the translate page for a language pair")
+SESSIONS = Gauge("translate_sessions", "Open browser sessions by state", ["state"])
+
+# Chunks
+CHUNK_STAGE_SECONDS = Histogram(
+    "translate_chunk_stage_seconds",
+    "Seconds per chunk spent entering text (input), until the output first changes (wait) and until it settles (extract)",
+    ["stage"]
+)
+CHUNK_SECONDS = Histogram("translate_chunk_seconds", "Seconds per backend call for one chunk", ["backend"])
+CHUNKS = Counter("translate_chunks_total", "Chunks handled, by where the translation came from", ["source"])
+CHARACTERS = Counter("translate_characters_total", "Characters sent to the backend", ["backend"])
+CACHE_LOOKUPS = Counter("translate_cache_lookups_total", "Translation cache lookups", ["result"])
+RETRIES = Counter("translate_chunk_retries_total", "Chunk attempts that failed and were retried", ["backend"])
+FAILURES = Counter("translate_chunk_failures_total", "Chunks that failed after their last attempt", ["backend"])
+
+# Jobs
+QUEUE_WAIT_SECONDS = Histogram("translate_queue_wait_seconds", "Seconds jobs waited in the queue for a worker")
+JOB_SECONDS = Histogram("translate_job_seconds", "Seconds from job creation until it finished", ["kind", "status"])
+JOBS_COALESCED = Counter("translate_jobs_coalesced_total", "Requests attached to an existing job instead of starting one", ["kind"])
+QUEUE_DEPTH = Gauge("translate_queue_depth", "Jobs waiting for a worker")
+ACTIVE_JOBS = Gauge("translate_active_jobs", "Jobs currently running")
@@ -0,0 +1,177 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+
+class PacingPolicy:
+    """
+    Spaces out chunks sent through the same browser session.
+
+    Each session waits a random interval between `min_interval` and
+    `max_interval` seconds after its previous chunk, so several sessions
+    can work in parallel without any one of them sending text too fast.
+
+    Args:
+        min_interval (float): Minimum seconds between chunks on one session
+        max_interval (float): Maximum seconds between chunks on one session
+    """
+
+    def __init__(self, min_interval: float = 3.0, max_interval: float = 5.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+    def delay(self, session) -> float:
+        """Seconds `session` has to wait before its next chunk."""
+        if session.paced_at is None:
+            return 0.0
+        interval = random.uniform(self.min_interval, self.max_interval)
+        return max(0.0, session.paced_at + interval - time.monotonic())
+
+    def wait(self, session) -> float:
+        """Sleep until `session` may send its next chunk. Returns the seconds slept."""
+        delay = self.delay(session)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def wait_async(self, session) -> float:
+        """Like wait, but sleeps without blocking the event loop."""
+        delay = self.delay(session)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def mark(self, session):
+        """Record that `session` just finished a chunk."""
+        session.paced_at = time.monotonic()
+
+    def record(self, session, latency: Optional[float] = None, failed: bool = False):
+        """Record the outcome of a chunk on `session`. Fixed pacing ignores it."""
+
+
+class AdaptivePacing(PacingPolicy):
+    """
+    Pacing that finds the fastest sustainable interval for each session.
+
+    Works like AIMD congestion control: every chunk that succeeds at a normal
+    latency shortens the session's interval by `step`, while a failure or a
+    timeout multiplies it by `backoff`. A chunk much slower than the recent
+    average counts as a sign of throttling and lengthens the interval a little.
+    A session replacing a failed one starts from the last interval of its key.
+
+    Args:
+        min_interval (float): Shortest interval the policy will go down to
+        max_interval (float): Longest interval after repeated failures
+        initial_interval (float): Interval a new session starts with
+        step (float): Seconds taken off the interval after each good chunk
+        backoff (float): Factor the interval grows by after a failure
+        slow_factor (float): A chunk this many times slower than average is treated as throttling
+    """
+
+    def __init__(self, min_interval: float = 0.5, max_interval: float = 30.0, initial_interval: float = 3.0,
+                 step: float = 0.25, backoff: float = 2.0, slow_factor: float = 2.0):
+        super().__init__(min_interval, max_interval)
+        self.initial_interval = initial_interval
+        self.step = step
+        self.backoff = backoff
+        self.slow_factor = slow_factor
+        # Moving average of chunk latency across sessions
+        self.average_latency: Optional[float] = None
+        self._intervals = {}
+        self._lock = threading.Lock()
+
+    def delay(self, session) -> float:
+        if session.paced_at is None:
+            return 0.0
+
+        # Jitter keeps sessions from falling into lockstep
+        interval = self.interval(session) * random.uniform(0.8, 1.2)
+        return max(0.0, session.paced_at + interval - time.monotonic())
+
+    def interval(self, session) -> float:
+        """Current interval of `session`."""
+        if session.pace_interval is None:
+            with self._lock:
+                session.pace_interval = self._intervals.get(session.key, self.initial_interval)
+        return session.pace_interval
+
+    def record(self, session, latency: Optional[float] = None, failed: bool = False):
+        interval = self.interval(session)
+        with self._lock:
+            average = self.average_latency
+            if latency is not None and not failed:
+                self.average_latency = latency if average is None else 0.8 * average + 0.2 * latency
+
+        if failed:
+            interval *= self.backoff
+        elif latency is not None and average is not None and latency > self.slow_factor * average:
+            interval *= 1 + (self.backoff - 1) / 4
+        else:
+            interval -= self.step
+        session.pace_interval = min(self.max_interval, max(self.min_interval, interval))
+        with self._lock:
+            self._intervals[session.key] = session.pace_interval
+
+
+class RetryPolicy:
+    """
+    Retries with jittered exponential backoff.
+
+    The n-th retry waits a random time up to `base_delay * 2**n` seconds,
+    capped at `max_delay` ("full jitter"), so clients that failed together
+    don't retry together.
+
+    Args:
+        attempts (int): Total tries per unit of work, including the first
+        base_delay (float): Upper bound of the first retry delay
+        max_delay (float): Upper bound of any retry delay
+    """
+
+    def __init__(self, attempts: int = 4, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before retry number `retry`, counting from 0."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+
+class ConcurrencyLimiter:
+    """
+    Limit on chunks in flight that adapts to failures, for asyncio workers.
+
+    Starts at `max_limit`. Each failure halves the limit, each success raises
+    it by 1/limit, so it climbs back by about one per round of chunks.
+
+    Args:
+        max_limit (int): Highest number of chunks in flight
+    """
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max(1, max_limit)
+        self.limit = float(self.max_limit)
+        self.active = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    async def __aenter__(self):
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        async with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    def record(self, failed: bool):
+        """Adjust the limit after a chunk succeeded or failed."""
+        if failed:
+            self.limit = max(1.0, self.limit / 2)
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
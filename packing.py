@@ -0,0 +1,118 @@
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from chunker import Span, chunk_spans
+
+# Markers are plain ASCII with digits, which translation leaves alone
+MARKER = "@@{}@@"
+MARKER_PATTERN = re.compile(r"@@\s*(\d+)\s*@@")
+
+# Text that could pass for a marker once translated. Items containing it never share a chunk.
+MARKER_LIKE_PATTERN = re.compile(r"@\s*@")
+
+
+class Pack(NamedTuple):
+    """
+    One chunk of a batch.
+
+    Either several short items packed together behind markers, or one part
+    of an item too long to share a chunk, in which case `span` is set.
+    """
+
+    text: str
+    items: List[int]
+    span: Optional[Span] = None
+
+
+def pack_items(items: Sequence[str], chunk_size: int = 4000) -> List[Pack]:
+    """
+    Pack short items into as few chunks as possible.
+
+    Items are kept in order. Each item in a shared chunk is preceded by a
+    marker line with its index, so its translation can be found again.
+    Items that don't fit into a chunk with their marker are split with the
+    regular chunker and translated on their own, and so are items with
+    marker-like text, which would be mistaken for a marker. Items are
+    packed without their surrounding whitespace, see restore_whitespace.
+
+    Args:
+        items (list): Texts to translate
+        chunk_size (int): Maximum characters per chunk
+
+    Returns:
+        list: Packs covering every item
+    """
+    packs = []
+    parts: List[str] = []
+    members: List[int] = []
+    size = 0
+
+    def flush():
+        nonlocal parts, members, size
+        if members:
+            packs.append(Pack("\n".join(parts), members))
+        parts, members, size = [], [], 0
+
+    for index, item in enumerate(items):
+        entry = f"{MARKER.format(index)}\n{item.strip()}"
+        if len(entry) > chunk_size or MARKER_LIKE_PATTERN.search(item):
+            flush()
+            for span in chunk_spans(item, chunk_size):
+                offset, length = span
+                packs.append(Pack(item[offset:offset + length], [index], span))
+            continue
+
+        if size + len(entry) + 1 > chunk_size:
+            flush()
+        parts.append(entry)
+        members.append(index)
+        size += len(entry) + 1
+
+    flush()
+    return packs
+
+
+def unpack(translated: str, members: Sequence[int]) -> Dict[int, str]:
+    """
+    Split the translation of a packed chunk back into items.
+
+    Args:
+        translated (str): Translation of a pack's text
+        members (list): Item indices packed into the chunk
+
+    Returns:
+        dict: Item index to translation, for every item whose marker and the
+        marker of the item after it survived. When a marker is lost, its item's
+        text runs into the item before, so neither of them is returned.
+    """
+    following = dict(zip(members, [*members[1:], None]))
+    results = {}
+    matches = list(MARKER_PATTERN.finditer(translated))
+    for i, match in enumerate(matches):
+        index = int(match.group(1))
+        next_index = int(matches[i + 1].group(1)) if i + 1 < len(matches) else None
+        if index not in following or index in results or following[index] != next_index:
+            continue
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(translated)
+        results[index] = translated[match.end():end].strip()
+    return results
+
+
+def restore_whitespace(item: str, translation: Optional[str]) -> Optional[str]:
+    """
+    Put an item's leading and trailing whitespace back around its translation.
+
+    Args:
+        item (str): The original item
+        translation (str): Its translation, None if it has none
+
+    Returns:
+        str: The translation with the item's surrounding whitespace, the item itself if it is blank
+    """
+    if not item.strip():
+        return item
+    if translation is None:
+        return None
+    lead = item[:len(item) - len(item.lstrip())]
+    trail = item[len(item.rstrip()):]
+    return f"{lead}{translation.strip()}{trail}"
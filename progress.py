@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+# States of a single chunk within a job
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+CHUNK_STATES = (PENDING, IN_FLIGHT, DONE, FAILED)
+
+
+class JobProgress:
+    """
+    Translated chunks of a running job, in order, for streaming to clients.
+
+    The translation thread calls `publish` for each chunk, failed ones
+    included, and `finish` at the end. Any number of asyncio consumers can
+    `follow` the job, each one gets every chunk from the first one onwards.
+
+    Args:
+        total (int): Number of chunks in the job
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.translations: List[str] = []
+        self.failed: List[bool] = []
+        self.started_at = time.monotonic()
+        self.finished = False
+        self.error: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    def publish(self, index: int, translation: str, failed: bool = False):
+        """
+        Record the translation of chunk `index`. Chunks must be published in order.
+
+        A chunk that failed is published with `failed` set and its source text
+        as `translation`, so the chunks after it can still be streamed.
+        """
+        with self._lock:
+            if index != len(self.translations):
+                raise ValueError(f"Chunk {index} published out of order, expected {len(self.translations)}")
+            self.translations.append(translation)
+            self.failed.append(failed)
+        self._notify()
+
+    def finish(self, error: Optional[str] = None):
+        """Mark the job as done, optionally with an error."""
+        with self._lock:
+            self.finished = True
+            self.error = error
+        self._notify()
+
+    def eta_seconds(self, completed: int) -> Optional[float]:
+        """Estimate the seconds left after `completed` chunks, from the average pace so far."""
+        if completed <= 0:
+            return None
+        elapsed = time.monotonic() - self.started_at
+        return elapsed / completed * (self.total - completed)
+
+    async def follow(self) -> AsyncIterator[Tuple[int, str, bool]]:
+        """Yield (index, translation, failed) for every chunk, waiting for new ones until the job finishes."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        subscriber = (loop, event)
+        with self._lock:
+            self._subscribers.append(subscriber)
+
+        sent = 0
+        try:
+            while True:
+                event.clear()
+                with self._lock:
+                    new = list(zip(self.translations[sent:], self.failed[sent:]))
+                    finished = self.finished
+                for translation, failed in new:
+                    yield sent, translation, failed
+                    sent += 1
+                if finished:
+                    return
+                await event.wait()
+        finally:
+            with self._lock:
+                self._subscribers.remove(subscriber)
+
+    def _notify(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, event in subscribers:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The consumer's event loop is already closed
+                pass
+
+
+class ChunkStates:
+    """
+    State, translation and error of every chunk in a job.
+
+    Chunks move from pending to in_flight to done, or to failed once their
+    retries are used up. Failed chunks can be translated again later, chunks
+    that are done are never sent to the backend again.
+
+    Args:
+        total (int): Number of chunks in the job
+    """
+
+    def __init__(self, total: int):
+        self.states: List[str] = [PENDING] * total
+        self.translations: List[Optional[str]] = [None] * total
+        self.errors: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def start(self, index: int):
+        with self._lock:
+            self.states[index] = IN_FLIGHT
+
+    def done(self, index: int, translation: str):
+        with self._lock:
+            self.states[index] = DONE
+            self.translations[index] = translation
+            self.errors.pop(index, None)
+
+    def fail(self, index: int, error: str):
+        with self._lock:
+            self.states[index] = FAILED
+            self.errors[index] = error
+
+    def is_done(self, index: int) -> bool:
+        return self.states[index] == DONE
+
+    def failed(self) -> List[int]:
+        """Indices of failed chunks."""
+        with self._lock:
+            return [i for i, state in enumerate(self.states) if state == FAILED]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of chunks in each state."""
+        with self._lock:
+            return {state: self.states.count(state) for state in CHUNK_STATES}
+
+    def to_dict(self) -> Dict:
+        """Plain data for saving the states to disk."""
+        with self._lock:
+            return {"translations": list(self.translations), "errors": {str(i): e for i, e in self.errors.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ChunkStates":
+        """Restore states saved with to_dict. Chunks that were in flight count as failed."""
+        states = cls(len(data["translations"]))
+        for i, translation in enumerate(data["translations"]):
+            if translation is not None:
+                states.done(i, translation)
+            else:
+                states.fail(i, data["errors"].get(str(i), "Interrupted"))
+        return states
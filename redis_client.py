@@ -0,0 +1,214 @@
+"""
+Minimal client for the Redis protocol (RESP2).
+
+Covers what the shared job queue, job store, result store and cache need:
+plain commands, pipelines, transactions and blocking pops, over a small
+pool of connections. Works with Redis, Valkey, KeyDB and local_redis.py.
+
+Calls block on their socket, so async code runs them with asyncio.to_thread.
+"""
+import asyncio
+import os
+import socket
+import threading
+from typing import List, Optional, Sequence
+from urllib.parse import unquote, urlparse
+
+
+class RedisError(Exception):
+    """Raised when the server answers a command with an error."""
+
+
+class RedisConnection:
+    """One socket to the server, used by a single thread at a time."""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.timeout = timeout
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+
+    def send(self, commands: Sequence[Sequence]):
+        """Write commands in one go, replies are read with read_reply."""
+        self.sock.sendall(b"".join(encode_command(command) for command in commands))
+
+    def read_reply(self):
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by the Redis server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode("utf-8")
+        if kind == b"-":
+            return RedisError(body.decode("utf-8"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by the Redis server")
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            if count < 0:
+                return None
+            return [self.read_reply() for _ in range(count)]
+        raise ConnectionError(f"Unexpected reply from the Redis server: {line[:50]!r}")
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def on_event_loop() -> bool:
+    """Return True if the calling thread is running an asyncio event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def encode_command(args: Sequence) -> bytes:
+    """Encode one command as a RESP array of bulk strings."""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode("utf-8")
+        else:
+            data = str(arg).encode("ascii")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+class RedisClient:
+    """
+    Thread-safe Redis client with a pool of connections.
+
+    Replies come back as Python values: bulk strings as bytes, integers as
+    int, arrays as lists and nil as None. Error replies raise RedisError.
+    Calls block, and raise RuntimeError on a thread running an event loop.
+
+    Args:
+        url (str): Server address, redis://[:password@]host[:port][/db]
+        timeout (float): Socket timeout in seconds for commands that don't block
+        max_idle (int): Idle connections kept open for reuse
+    """
+
+    def __init__(self, url: str = "redis://127.0.0.1:6379/0", timeout: float = 10.0, max_idle: int = 16):
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported Redis URL '{url}', expected redis://host:port/db")
+        self.url = url
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.max_idle = max_idle
+
+        self._idle: List[RedisConnection] = []
+        self._lock = threading.Lock()
+
+    def execute(self, *args, timeout: Optional[float] = None):
+        """
+        Run one command and return its reply.
+
+        Args:
+            *args: Command name and arguments
+            timeout (float): Socket timeout for this command, for blocking commands like BLPOP
+
+        Raises:
+            RedisError: If the server answers with an error
+        """
+        reply = self.pipeline([args], timeout=timeout)[0]
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+    def pipeline(self, commands: Sequence[Sequence], timeout: Optional[float] = None) -> List:
+        """
+        Send several commands in one round-trip.
+
+        Returns:
+            list: One reply per command. Error replies are returned as RedisError instead of raised.
+
+        Raises:
+            RuntimeError: If called from an event loop, which the round-trip would stall
+        """
+        if not commands:
+            return []
+        if on_event_loop():
+            raise RuntimeError("Redis calls block, run them with asyncio.to_thread instead of on the event loop")
+        connection = self._acquire()
+        try:
+            if timeout is not None:
+                connection.sock.settimeout(timeout)
+            connection.send(commands)
+            replies = [connection.read_reply() for _ in commands]
+            if timeout is not None:
+                connection.sock.settimeout(self.timeout)
+        except BaseException:
+            # The connection may have unread replies, don't reuse it
+            connection.close()
+            raise
+        self._release(connection)
+        return replies
+
+    def ping(self) -> bool:
+        """Return True if the server answers."""
+        return self.execute("PING") == "PONG"
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def _acquire(self) -> RedisConnection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        connection = RedisConnection(self.host, self.port, self.timeout)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            connection.send(setup)
+            for _ in setup:
+                reply = connection.read_reply()
+                if isinstance(reply, RedisError):
+                    connection.close()
+                    raise reply
+        return connection
+
+    def _release(self, connection: RedisConnection):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+
+def create_redis_client(url: Optional[str] = None) -> RedisClient:
+    """
+    Create a Redis client.
+
+    Args:
+        url (str): Server address (default: $TRANSLATE_REDIS_URL or redis://127.0.0.1:6379/0)
+
+    Returns:
+        RedisClient: The client
+    """
+    return RedisClient(url or os.environ.get("TRANSLATE_REDIS_URL", "redis://127.0.0.1:6379/0"))
@@ -0,0 +1,205 @@
+import io
+import os
+import zlib
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional, Tuple
+
+from redis_client import create_redis_client
+
+# Bytes sent to Redis per command when uploading a result
+UPLOAD_BLOCK_SIZE = 1 << 20
+
+
+class ResultStore(ABC):
+    """
+    Storage for job result files, by name.
+
+    Workers write results to local files under `translations/` and then
+    call upload(path), after which any node can read them by that path.
+    """
+
+    @abstractmethod
+    def upload(self, path: str):
+        """Make a result file written on this node readable by every node under the same name."""
+
+    @abstractmethod
+    def read(self, name: str) -> Optional[str]:
+        """Return the text of a result, or None if there isn't one."""
+
+    @abstractmethod
+    def stat(self, name: str) -> Optional[Tuple[int, str]]:
+        """Return (size in bytes, ETag) of a result, or None if there isn't one."""
+
+    @abstractmethod
+    def open(self, name: str) -> BinaryIO:
+        """Open a result for reading as a binary file object that supports seek."""
+
+    @abstractmethod
+    def delete(self, name: str):
+        """Remove a result if it exists."""
+
+
+class FileResultStore(ResultStore):
+    """
+    Results kept as files, the name being the file path.
+
+    Every node sees the same results when `translations/` is on a shared
+    filesystem such as NFS, otherwise only the node that wrote them.
+    """
+
+    def upload(self, path: str):
+        # The file is already where readers look for it
+        pass
+
+    def read(self, name: str) -> Optional[str]:
+        if name and os.path.exists(name):
+            with open(name, "r", encoding="utf-8") as f:
+                return f.read()
+        return None
+
+    def stat(self, name: str) -> Optional[Tuple[int, str]]:
+        try:
+            stat = os.stat(name)
+        except (OSError, TypeError):
+            return None
+        return stat.st_size, f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+    def open(self, name: str) -> BinaryIO:
+        return open(name, "rb")
+
+    def delete(self, name: str):
+        try:
+            if name and os.path.exists(name):
+                os.remove(name)
+        except OSError:
+            pass
+
+
+class RedisResultStore(ResultStore):
+    """
+    Results kept in Redis, so every node can serve every result.
+
+    Uploaded files are removed locally. Results expire after `ttl_seconds`,
+    in line with the job store's TTL for finished jobs.
+
+    Args:
+        client (RedisClient): Connection to the server
+        prefix (str): Prefix of every key
+        ttl_seconds (int): How long results are kept, None to keep them until deleted
+    """
+
+    def __init__(self, client, prefix: str = "translate:", ttl_seconds: Optional[int] = 7 * 24 * 3600):
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    def upload(self, path: str):
+        key, etag_key = self._keys(path)
+        staging = f"{key}:upload"
+        checksum = 0
+        size = 0
+
+        # Upload in blocks under a staging key, then swap it in so readers never see half a result
+        self.client.execute("DEL", staging)
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(UPLOAD_BLOCK_SIZE)
+                if not block:
+                    break
+                self.client.execute("APPEND", staging, block)
+                checksum = zlib.crc32(block, checksum)
+                size += len(block)
+
+        commands = [("SET", staging, b"")] if size == 0 else []
+        commands += [("RENAME", staging, key), ("SET", etag_key, f'"{size:x}-{checksum:08x}"')]
+        if self.ttl_seconds is not None:
+            commands += [("EXPIRE", key, self.ttl_seconds), ("EXPIRE", etag_key, self.ttl_seconds)]
+        for reply in self.client.pipeline(commands):
+            if isinstance(reply, Exception):
+                raise reply
+        os.remove(path)
+
+    def read(self, name: str) -> Optional[str]:
+        if not name:
+            return None
+        data = self.client.execute("GET", self._keys(name)[0])
+        return data.decode("utf-8") if data is not None else None
+
+    def stat(self, name: str) -> Optional[Tuple[int, str]]:
+        if not name:
+            return None
+        key, etag_key = self._keys(name)
+        size, etag = self.client.pipeline([("STRLEN", key), ("GET", etag_key)])
+        if etag is None:
+            return None
+        return size, etag.decode("ascii")
+
+    def open(self, name: str) -> BinaryIO:
+        stat = self.stat(name)
+        if stat is None:
+            raise FileNotFoundError(name)
+        return RedisResultReader(self.client, self._keys(name)[0], stat[0])
+
+    def delete(self, name: str):
+        if name:
+            self.client.execute("DEL", *self._keys(name))
+
+    def _keys(self, name: str):
+        key = f"{self.prefix}result:{name}"
+        return key, f"{key}:etag"
+
+
+class RedisResultReader(io.RawIOBase):
+    """Read-only file object over a Redis string, reading ranges with GETRANGE."""
+
+    def __init__(self, client, key: str, size: int):
+        self.client = client
+        self.key = key
+        self.size = size
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.size}[whence]
+        self.position = max(base + offset, 0)
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        end = self.size if size is None or size < 0 else min(self.position + size, self.size)
+        if end <= self.position:
+            return b""
+        data = self.client.execute("GETRANGE", self.key, self.position, end - 1)
+        self.position += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def create_result_store(name: Optional[str] = None) -> ResultStore:
+    """
+    Create a result store by name.
+
+    Args:
+        name (str): 'file' or 'redis' (default: $TRANSLATE_RESULT_STORE or 'file').
+            The Redis server is taken from $TRANSLATE_REDIS_URL.
+
+    Returns:
+        ResultStore: The result store
+    """
+    name = name or os.environ.get("TRANSLATE_RESULT_STORE", "file")
+    if name == "file":
+        return FileResultStore()
+    if name == "redis":
+        return RedisResultStore(create_redis_client())
+    raise ValueError(f"Unknown result store '{name}', expected 'file' or 'redis'")
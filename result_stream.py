@@ -0,0 +1,140 @@
+import re
+import zlib
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bytes read from a result file at a time
+BLOCK_SIZE = 64 * 1024
+
+# Content codings we can produce, best first. Brotli is only offered when the brotli package is installed.
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# A single byte range: "bytes=0-99", "bytes=100-" or the last 100 bytes "bytes=-100"
+RANGE_PATTERN = re.compile(r"^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$")
+
+ByteRange = Tuple[int, int]
+
+
+class RangeNotSatisfiable(ValueError):
+    """Raised when a Range header lies entirely outside the file."""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[ByteRange]:
+    """
+    Parse a Range header against a file of `size` bytes.
+
+    Only single byte ranges are served. Malformed headers and multiple
+    ranges are ignored, so the whole file is sent, as HTTP allows.
+
+    Args:
+        header (str): Value of the Range header
+        size (int): Size of the file in bytes
+
+    Returns:
+        tuple: (start, end) with end exclusive, or None to send the whole file
+
+    Raises:
+        RangeNotSatisfiable: If the range starts past the end of the file
+    """
+    match = RANGE_PATTERN.match(header or "")
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range, the last `last` bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - length, 0), size
+
+    start = int(first)
+    end = min(int(last) + 1, size) if last else size
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the content coding to send from an Accept-Encoding header.
+
+    Args:
+        accept_encoding (str): Value of the Accept-Encoding header
+
+    Returns:
+        str: One of ENCODINGS, or None to send the file as is
+    """
+    weights = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        match = re.search(r"q\s*=\s*([0-9.]+)", params)
+        if match:
+            try:
+                weight = float(match.group(1))
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def iter_file(f: BinaryIO, byte_range: Optional[ByteRange] = None, encoding: Optional[str] = None,
+              block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """
+    Read a file, or a range of it, in blocks, compressing it on the way.
+
+    Only one block is held in memory at a time, however large the file.
+    The file is closed once it has been read.
+
+    Args:
+        f (file): Binary file object to read, from ResultStore.open
+        byte_range (tuple): (start, end) of the bytes to send, None for the whole file
+        encoding (str): 'gzip', 'br' or None to send the bytes as they are
+        block_size (int): Bytes to read at a time
+
+    Yields:
+        bytes: The next piece of the response body
+    """
+    if encoding == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        compress, flush = compressor.compress, compressor.flush
+    elif encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+        compress, flush = compressor.process, compressor.finish
+    else:
+        compress = flush = None
+
+    with f:
+        start, end = byte_range if byte_range else (0, None)
+        f.seek(start)
+        remaining = end - start if end is not None else None
+        while remaining is None or remaining > 0:
+            block = f.read(block_size if remaining is None else min(block_size, remaining))
+            if not block:
+                break
+            if remaining is not None:
+                remaining -= len(block)
+            block = compress(block) if compress else block
+            if block:
+                yield block
+
+    if flush:
+        yield flush()
@@ -0,0 +1,324 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class PooledSession:
+    """A warm session held by the pool, together with its bookkeeping."""
+
+    def __init__(self, key: Hashable, resource: Any):
+        self.key = key
+        self.resource = resource
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+        # When the session last finished a unit of work, maintained by PacingPolicy
+        self.paced_at = None
+        # Seconds between units of work, maintained by AdaptivePacing
+        self.pace_interval = None
+
+
+class SessionPool:
+    """
+    Pool of long-lived sessions keyed by (source_lang, target_lang).
+
+    Sessions are created lazily through `factory(key)` and handed out with
+    `checkout`/`checkin`, or `acheckout`/`acheckin` from asyncio code. Idle sessions are evicted after `max_idle_seconds`,
+    sessions are recycled after `max_uses` checkouts and at most `max_size`
+    sessions exist at any time across all keys.
+
+    Args:
+        factory (callable): Creates a new resource for a key
+        close (callable): Releases a resource
+        health_check (callable): Returns False if a resource is no longer usable
+        max_size (int): Maximum number of sessions across all keys
+        max_idle_seconds (float): Idle time after which a session is closed
+        max_uses (int): Number of checkouts after which a session is recycled
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[Hashable], Any],
+        close: Callable[[Any], None],
+        health_check: Optional[Callable[[Any], bool]] = None,
+        max_size: int = 4,
+        max_idle_seconds: float = 300.0,
+        max_uses: int = 50,
+    ):
+        self.factory = factory
+        self.close = close
+        self.health_check = health_check
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.max_uses = max_uses
+
+        self._idle: Dict[Hashable, List[PooledSession]] = {}
+        self._size = 0
+        self._condition = threading.Condition()
+        # Futures of asyncio tasks waiting for a session, with their loops
+        self._waiters: deque = deque()
+
+    def checkout(self, key: Hashable, timeout: Optional[float] = None) -> PooledSession:
+        """
+        Get a warm session for `key`, creating one if needed.
+
+        Blocks until a session is available when the pool is full.
+
+        Raises:
+            TimeoutError: If no session became available within `timeout`
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            while True:
+                taken = self._take(key)
+                if taken is not None:
+                    break
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No session available for {key} within {timeout} seconds")
+                self._condition.wait(remaining)
+
+        return self._prepare(key, *taken)
+
+    async def acheckout(self, key: Hashable, timeout: Optional[float] = None, executor: Optional[Executor] = None) -> PooledSession:
+        """
+        Get a warm session for `key` from asyncio code, see checkout.
+
+        Waits for a free session without holding a thread. Creating, checking
+        and closing sessions block, so they run on `executor`.
+
+        Raises:
+            TimeoutError: If no session became available within `timeout`
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        while True:
+            with self._condition:
+                taken = self._take(key)
+                if taken is None:
+                    waiter = loop.create_future()
+                    self._waiters.append((loop, waiter))
+            if taken is not None:
+                break
+
+            remaining = None if deadline is None else deadline - loop.time()
+            try:
+                if remaining is not None and remaining <= 0:
+                    raise asyncio.TimeoutError
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"No session available for {key} within {timeout} seconds") from None
+            finally:
+                with self._condition:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+
+        context = contextvars.copy_context()
+        future = loop.run_in_executor(executor, context.run, self._prepare, key, *taken)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Hand the session back once it's ready, nobody is going to use it
+            future.add_done_callback(lambda done: done.cancelled() or done.exception() or self.checkin(done.result()))
+            raise
+
+    def _take(self, key: Hashable) -> Optional[Tuple[Optional[PooledSession], List[PooledSession]]]:
+        """
+        Take an idle session for `key` or reserve a slot for a new one. Caller must hold the lock.
+
+        Returns:
+            tuple: (idle session or None for a new one, sessions to close), or None if the pool is full
+        """
+        stale = self._collect_expired()
+
+        idle = self._idle.get(key)
+        if idle:
+            return idle.pop(), stale
+
+        if self._size < self.max_size:
+            # Reserve a slot, the session is created outside the lock
+            self._size += 1
+            return None, stale
+
+        # Make room by closing an idle session held for another key
+        victim = self._pop_oldest_idle()
+        if victim is not None:
+            stale.append(victim)
+            self._size += 1
+            return None, stale
+        return None
+
+    def _prepare(self, key: Hashable, session: Optional[PooledSession], stale: List[PooledSession]) -> PooledSession:
+        """Close stale sessions and check or create the session taken by _take, outside the lock."""
+        for old in stale:
+            self._close(old, release_slot=False)
+
+        if session is not None and not self._is_healthy(session):
+            # Dead session, replace it in the same slot
+            self._close(session, release_slot=False)
+            session = None
+
+        if session is None:
+            try:
+                session = PooledSession(key, self.factory(key))
+            except Exception:
+                self._release_slot()
+                raise
+
+        session.uses += 1
+        return session
+
+    def checkin(self, session: PooledSession, healthy: bool = True):
+        """
+        Return a session to the pool.
+
+        Unhealthy sessions and sessions that reached `max_uses` are closed.
+        """
+        session.last_used = time.monotonic()
+
+        if not healthy or session.uses >= self.max_uses:
+            self._close(session)
+            return
+
+        with self._condition:
+            self._idle.setdefault(session.key, []).append(session)
+            self._notify()
+
+    async def acheckin(self, session: PooledSession, healthy: bool = True, executor: Optional[Executor] = None):
+        """Return a session to the pool from asyncio code, closing it on `executor` if needed."""
+        if not healthy or session.uses >= self.max_uses:
+            await asyncio.get_running_loop().run_in_executor(executor, self.checkin, session, healthy)
+        else:
+            self.checkin(session, healthy)
+
+    @contextmanager
+    def session(self, key: Hashable, timeout: Optional[float] = None):
+        """Check out a session for the duration of a `with` block."""
+        session = self.checkout(key, timeout=timeout)
+        try:
+            yield session
+        except Exception:
+            # Don't hand a session in an unknown state to the next job
+            self.checkin(session, healthy=False)
+            raise
+        else:
+            self.checkin(session)
+
+    @asynccontextmanager
+    async def asession(self, key: Hashable, timeout: Optional[float] = None, executor: Optional[Executor] = None):
+        """Check out a session for the duration of an `async with` block."""
+        session = await self.acheckout(key, timeout=timeout, executor=executor)
+        try:
+            yield session
+        except BaseException:
+            await self.acheckin(session, healthy=False, executor=executor)
+            raise
+        else:
+            await self.acheckin(session, executor=executor)
+
+    def evict_idle(self) -> int:
+        """Close idle sessions past `max_idle_seconds`. Returns how many were closed."""
+        with self._condition:
+            expired = self._collect_expired()
+        for session in expired:
+            self._close(session, release_slot=False)
+        return len(expired)
+
+    def close_all(self):
+        """
+        Close every idle session.
+
+        Sessions checked out at the time are left alone and go back to the pool
+        on checkin, so call this once no more work is running.
+        """
+        with self._condition:
+            sessions = [s for idle in self._idle.values() for s in idle]
+            self._idle.clear()
+            self._size -= len(sessions)
+            self._condition.notify_all()
+            for _ in range(len(self._waiters)):
+                self._notify()
+        for session in sessions:
+            self._close(session, release_slot=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of open and idle sessions."""
+        with self._condition:
+            idle = sum(len(sessions) for sessions in self._idle.values())
+            return {"size": self._size, "idle": idle, "in_use": self._size - idle, "max_size": self.max_size}
+
+    def _collect_expired(self) -> List[PooledSession]:
+        """Remove idle sessions past their idle timeout and free their slots. Caller must hold the lock."""
+        now = time.monotonic()
+        expired = []
+        for key in list(self._idle):
+            keep = []
+            for session in self._idle[key]:
+                if now - session.last_used > self.max_idle_seconds:
+                    expired.append(session)
+                else:
+                    keep.append(session)
+            if keep:
+                self._idle[key] = keep
+            else:
+                del self._idle[key]
+        self._size -= len(expired)
+        return expired
+
+    def _pop_oldest_idle(self) -> Optional[PooledSession]:
+        """Remove the least recently used idle session and free its slot. Caller must hold the lock."""
+        oldest_key = None
+        for key, sessions in self._idle.items():
+            if sessions and (oldest_key is None or sessions[0].last_used < self._idle[oldest_key][0].last_used):
+                oldest_key = key
+        if oldest_key is None:
+            return None
+        session = self._idle[oldest_key].pop(0)
+        if not self._idle[oldest_key]:
+            del self._idle[oldest_key]
+        self._size -= 1
+        return session
+
+    def _is_healthy(self, session: PooledSession) -> bool:
+        if self.health_check is None:
+            return True
+        try:
+            return bool(self.health_check(session.resource))
+        except Exception:
+            return False
+
+    def _close(self, session: PooledSession, release_slot: bool = True):
+        try:
+            self.close(session.resource)
+        except Exception:
+            pass
+        if release_slot:
+            self._release_slot()
+
+    def _release_slot(self):
+        with self._condition:
+            self._size -= 1
+            self._notify()
+
+    def _notify(self):
+        """Wake one waiting thread and one waiting asyncio task. Caller must hold the lock."""
+        self._condition.notify()
+        if self._waiters:
+            loop, waiter = self._waiters.popleft()
+            loop.call_soon_threadsafe(self._wake, waiter)
+
+    def _wake(self, waiter: asyncio.Future):
+        if waiter.done():
+            # The task stopped waiting meanwhile, pass the wakeup on
+            with self._condition:
+                self._notify()
+        else:
+            waiter.set_result(None)
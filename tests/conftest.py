@@ -0,0 +1,32 @@
+import pytest
+
+from local_redis import start_local_redis
+
+
+@pytest.fixture(scope="session")
+def api(tmp_path_factory):
+    """translate_api with the local backend, its job files in a temporary directory and no cache files"""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(tmp_path_factory.mktemp("api"))
+        patch.setenv("TRANSLATE_BACKEND", "local")
+        patch.setenv("TRANSLATE_CACHE_PATH", "")
+        patch.setenv("TRANSLATE_MEMORY_PATH", "")
+        import translate_api
+        yield translate_api
+
+
+@pytest.fixture
+def client(api):
+    from fastapi.testclient import TestClient
+
+    with TestClient(api.app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def redis_url():
+    """URL of a stand-in Redis server, tests keep apart by key prefix"""
+    server = start_local_redis()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
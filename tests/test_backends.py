@@ -0,0 +1,49 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backends import BackendError, HttpBackend
+
+
+def translate_with_response(body):
+    backend = HttpBackend(url="http://translate.test/translate")
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, **body)))
+    backend._client = lambda: client
+
+    async def run():
+        try:
+            return await backend.translate_batch(["one", "two"], "en", "hi")
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_translations_are_returned():
+    assert translate_with_response({"json": {"translatedText": ["eins", "zwei"]}}) == ["eins", "zwei"]
+
+
+@pytest.mark.parametrize("body", [
+    {"text": "not json"},
+    {"json": ["eins", "zwei"]},
+    {"json": {"error": "busy"}},
+    {"json": {"translatedText": None}},
+    {"json": {"translatedText": ["eins", None]}},
+    {"json": {"translatedText": ["eins"]}},
+])
+def test_malformed_responses_raise_backend_error(body):
+    with pytest.raises(BackendError):
+        translate_with_response(body)
+
+
+def test_aclose_closes_the_clients_of_the_loop():
+    backend = HttpBackend(url="http://translate.test/translate")
+
+    async def run():
+        client = backend._client()
+        await backend.aclose()
+        return client
+
+    assert asyncio.run(run()).is_closed
+    assert len(backend._clients) == 0
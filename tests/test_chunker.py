@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from chunker import chunk_spans, iter_file_chunks, join_translations, sentence_spans, span_texts
+
+
+def sample_text(seed=0, paragraphs=40):
+    words = random.Random(seed)
+    return "\n\n".join(
+        " ".join(
+            " ".join(words.choice(["alpha", "beta", "gamma", "delta", "epsilon"]) for _ in range(words.randint(3, 15))) + "."
+            for _ in range(words.randint(1, 8))
+        )
+        for _ in range(paragraphs)
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [20, 100, 1000])
+def test_chunks_fit_and_rejoin_exactly(chunk_size):
+    text = "  " + sample_text() + "\n\n"
+    spans = chunk_spans(text, chunk_size)
+    chunks = span_texts(text, spans)
+    assert all(0 < len(chunk) <= chunk_size for chunk in chunks)
+    assert all(chunk == chunk.strip() for chunk in chunks)
+    assert join_translations(text, spans, chunks) == text
+
+
+def test_chunks_end_at_paragraph_breaks_first():
+    text = "First paragraph. It has two sentences.\n\nSecond paragraph."
+    assert span_texts(text, chunk_spans(text, 50)) == ["First paragraph. It has two sentences.", "Second paragraph."]
+
+
+def test_chunks_end_at_sentence_breaks_before_spaces():
+    text = "One sentence here. Another sentence follows here."
+    assert span_texts(text, chunk_spans(text, 30)) == ["One sentence here.", "Another sentence follows here."]
+
+    text = "Hindi sentence।Next sentence"
+    assert span_texts(text, chunk_spans(text, 20)) == ["Hindi sentence।", "Next sentence"]
+
+
+def test_oversized_words_are_cut():
+    text = "short " + "x" * 25 + " tail"
+    spans = chunk_spans(text, 10)
+    assert span_texts(text, spans) == ["short", "x" * 10, "x" * 10, "x" * 5 + " tail"]
+    assert join_translations(text, spans, span_texts(text, spans)) == text
+
+
+def test_blank_text_has_no_chunks():
+    assert chunk_spans("") == []
+    assert chunk_spans(" \n\t ") == []
+    assert join_translations(" \n", [], []) == " \n"
+    with pytest.raises(ValueError):
+        chunk_spans("text", 0)
+
+
+def test_file_chunks_match_text_chunks(tmp_path):
+    text = sample_text(seed=1) + "\n"
+    path = tmp_path / "input.txt"
+    path.write_text(text, encoding="utf-8")
+
+    pieces = list(iter_file_chunks(str(path), chunk_size=100, block_size=64))
+    assert [chunk for _, chunk in pieces[:-1]] == span_texts(text, chunk_spans(text, 100))
+    assert pieces[-1][1] is None
+    assert "".join(separator + (chunk or "") for separator, chunk in pieces) == text
+
+
+def test_sentences_rejoin_exactly():
+    text = " Is it? Yes!  It is.\nNew line。次の文 "
+    spans = sentence_spans(text)
+    assert span_texts(text, spans) == ["Is it?", "Yes!", "It is.", "New line。", "次の文"]
+    assert join_translations(text, spans, span_texts(text, spans)) == text
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+import google_translate
+from backends import BackendError, LocalBackend
+from google_translate import SeleniumBackend, manifest_path, translate_chunk_list, translate_file
+from pacing import RetryPolicy
+from progress import ChunkStates
+from session_pool import SessionPool
+from translation_cache import TranslationCache
+
+
+class FailingBackend(LocalBackend):
+    """Local backend that fails every chunk containing 'fail'"""
+
+    async def translate_batch(self, chunks, source_lang, target_lang):
+        if any("fail" in chunk for chunk in chunks):
+            raise BackendError("injected failure")
+        return await super().translate_batch(chunks, source_lang, target_lang)
+
+
+class BrokenDriver:
+    """Driver whose page is gone"""
+
+    def find_element(self, *args):
+        raise WebDriverException("page crashed")
+
+
+def start_broken_browser(key):
+    raise WebDriverException("chrome not reachable")
+
+
+@pytest.mark.parametrize("factory", [start_broken_browser, lambda key: BrokenDriver()])
+def test_browser_failures_are_backend_errors(factory):
+    closed = []
+    pool = SessionPool(factory=factory, close=closed.append, max_size=1)
+    with pytest.raises(BackendError):
+        asyncio.run(SeleniumBackend(pool=pool).translate_batch(["chunk"], "en", "hi"))
+    # The broken session is closed instead of being handed to the next batch
+    assert pool.stats()["size"] == 0
+    assert len(closed) == (factory is not start_broken_browser)
+
+
+def test_only_identical_chunks_are_translated_once():
+    stats = {}
+    chunks = ["a  b", "a b", "a  b", "line\none"]
+    translations = asyncio.run(translate_chunk_list(
+        chunks, "en", "hi", LocalBackend(), TranslationCache(memory_size=0), stats=stats
+    ))
+    assert translations == ["[hi] a  b", "[hi] a b", "[hi] a  b", "[hi] line\n[hi] one"]
+    assert stats["unique_chunks"] == 3
+
+
+def test_failed_chunks_are_reported_in_order(monkeypatch):
+    monkeypatch.setattr(google_translate, "RETRY_POLICY", RetryPolicy(attempts=1))
+    reported = []
+    states = ChunkStates(3)
+    translations = asyncio.run(translate_chunk_list(
+        ["first", "fail here", "third"], "en", "hi", FailingBackend(), TranslationCache(memory_size=0),
+        on_chunk=lambda i, translation: reported.append((i, translation)), states=states
+    ))
+    assert translations == ["[hi] first", None, "[hi] third"]
+    assert reported == [(0, "[hi] first"), (1, None), (2, "[hi] third")]
+    assert states.failed() == [1]
+
+
+
+class FlakyBackend(LocalBackend):
+    """Local backend that fails chunks containing 'fail' while broken, and records the chunks it was sent"""
+
+    def __init__(self, broken):
+        super().__init__()
+        self.broken = broken
+        self.chunks = []
+
+    async def translate_batch(self, chunks, source_lang, target_lang):
+        self.chunks.extend(chunks)
+        if self.broken and any("fail" in chunk for chunk in chunks):
+            raise BackendError("injected failure")
+        return await super().translate_batch(chunks, source_lang, target_lang)
+
+
+def test_interrupted_files_resume_from_their_manifest(tmp_path, monkeypatch):
+    monkeypatch.setattr(google_translate, "RETRY_POLICY", RetryPolicy(attempts=1))
+    paragraphs = [f"Paragraph {n} of the file." for n in range(6)]
+    paragraphs[3] = "Paragraph 3 may fail."
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("\n\n".join(paragraphs), encoding="utf-8")
+    output_file = str(tmp_path / "output.txt")
+
+    def run(backend, resume):
+        return translate_file(
+            str(input_file), output_file, "en", "hi", backend=backend, cache=TranslationCache(memory_size=0),
+            chunk_size=30, resume=resume, batch_size=1, memory=False
+        )
+
+    # The run stops at the fourth chunk, with the three before it written and checkpointed
+    with pytest.raises(BackendError):
+        run(FlakyBackend(broken=True), resume=False)
+    with open(manifest_path(output_file), encoding="utf-8") as f:
+        assert json.load(f)["chunks_done"] == 3
+
+    # The next run only sends the chunks after the checkpoint
+    backend = FlakyBackend(broken=False)
+    assert run(backend, resume=True) == 6
+    assert backend.chunks == paragraphs[3:]
+    with open(output_file, encoding="utf-8") as f:
+        assert f.read() == "\n\n".join(f"[hi] {paragraph}" for paragraph in paragraphs)
+    assert not os.path.exists(manifest_path(output_file))
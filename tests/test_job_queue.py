@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import pytest
+
+from job_queue import JobScheduler, LocalJobQueue, QueueFullError, RedisJobQueue, SQLiteJobQueue
+from redis_client import RedisClient
+
+
+@pytest.fixture(params=["local", "sqlite", "redis"])
+def open_queue(request, tmp_path, redis_url):
+    """Open a view of one queue, like another process would for shared queues"""
+    prefix = f"{request.node.name}:"
+    opened = []
+
+    def open_queue(max_queue=100):
+        if request.param == "local":
+            queue = LocalJobQueue(max_queue)
+        elif request.param == "sqlite":
+            queue = SQLiteJobQueue(str(tmp_path / "queue.sqlite"), max_queue)
+        else:
+            queue = RedisJobQueue(RedisClient(redis_url), prefix=prefix, max_queue=max_queue)
+        opened.append(queue)
+        return queue
+
+    yield open_queue
+    for queue in opened:
+        queue.close()
+
+
+async def put(queue, job_id, priority="normal"):
+    # The Redis client blocks, so queues are only used from threads outside the event loop, like the API does
+    await asyncio.to_thread(queue.put, {"job_id": job_id}, priority)
+
+
+async def take(queue, count):
+    return [(await asyncio.wait_for(queue.get(), 5))["job_id"] for _ in range(count)]
+
+
+def test_jobs_are_taken_by_priority_then_in_order(open_queue):
+    async def run():
+        queue = open_queue()
+        for job_id, priority in [("low", "low"), ("first", "normal"), ("urgent", "high"), ("second", "normal")]:
+            await put(queue, job_id, priority)
+        assert await asyncio.to_thread(queue.depth) == 4
+        assert await asyncio.to_thread(queue.oldest) <= time.time()
+        assert await take(queue, 4) == ["urgent", "first", "second", "low"]
+        assert await asyncio.to_thread(queue.depth) == 0
+        assert await asyncio.to_thread(queue.oldest) is None
+
+    asyncio.run(run())
+
+
+def test_full_queues_refuse_jobs(open_queue):
+    async def run():
+        queue = open_queue(max_queue=2)
+        await put(queue, "one")
+        await put(queue, "two")
+        with pytest.raises(QueueFullError):
+            await put(queue, "three", "high")
+        assert await take(queue, 2) == ["one", "two"]
+        await put(queue, "three")
+
+    asyncio.run(run())
+
+
+def test_shared_jobs_are_taken_once(open_queue):
+    async def run():
+        queues = [open_queue(), open_queue()]
+        if not queues[0].shared:
+            pytest.skip("local queues are not shared")
+        for n in range(10):
+            await put(queues[n % 2], f"job-{n}")
+        taken = await asyncio.gather(take(queues[0], 5), take(queues[1], 5))
+        assert sorted(taken[0] + taken[1]) == sorted(f"job-{n}" for n in range(10))
+
+    asyncio.run(run())
+
+
+def test_jobs_taken_by_cancelled_workers_go_back_to_the_front(open_queue):
+    async def run():
+        queue = open_queue()
+        if not queue.shared:
+            pytest.skip("local queues hand jobs over on the event loop, a cancelled get takes nothing")
+        queue.poll_seconds = 0.5
+        getter = asyncio.create_task(queue.get())
+        await asyncio.sleep(0.1)
+        getter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await getter
+        # The cancelled worker's pop is still waiting on its thread and takes the first job
+        await put(queue, "claimed")
+        await put(queue, "next")
+        await asyncio.sleep(0.7)
+        assert await take(queue, 2) == ["claimed", "next"]
+
+    asyncio.run(run())
+
+
+def test_scheduler_runs_jobs_in_its_slots(open_queue):
+    async def run():
+        running, peak, done = 0, 0, []
+
+        async def handler(job):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+            if job["job_id"] == "broken":
+                raise RuntimeError("job failed")
+            done.append(job["job_id"])
+
+        scheduler = JobScheduler(handler, slots=2, queue=open_queue(max_queue=10))
+        await asyncio.to_thread(scheduler.submit, {"job_id": "broken"})
+        for n in range(3):
+            await asyncio.to_thread(scheduler.submit, {"job_id": f"job-{n}"})
+        stats = await asyncio.to_thread(scheduler.stats)
+        assert stats["queue_depth"] == 4 and stats["max_queue"] == 10 and stats["slots"] == 2
+
+        scheduler.start()
+        for n in range(3, 6):
+            await asyncio.to_thread(scheduler.submit, {"job_id": f"job-{n}"})
+        for _ in range(100):
+            if len(done) == 6:
+                break
+            await asyncio.sleep(0.05)
+        await scheduler.shutdown()
+
+        # A failing job doesn't stop its worker, and no more than two jobs ran at once
+        assert sorted(done) == [f"job-{n}" for n in range(6)]
+        assert peak == 2
+
+    asyncio.run(run())
@@ -0,0 +1,129 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from job_store import MemoryJobStore, RedisJobStore, SQLiteJobStore, cursor_of
+from redis_client import RedisClient
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def open_store(request, tmp_path, redis_url):
+    """Open a view of one job store, like another node or worker process would"""
+    memory = MemoryJobStore()
+    prefix = f"{request.node.name}:"
+
+    def open_store(**options):
+        if request.param == "memory":
+            return memory if not options else MemoryJobStore(**options)
+        if request.param == "sqlite":
+            return SQLiteJobStore(str(tmp_path / "jobs.sqlite"), **options)
+        return RedisJobStore(RedisClient(redis_url), prefix=prefix, **options)
+
+    return open_store
+
+
+def make_job(job_id, **fields):
+    return {"job_id": job_id, "status": "pending", "created_at": datetime.now().isoformat(), "completed_at": None,
+            "text_length": 1, "chunks": 1, "result": None, **fields}
+
+
+def test_racing_creates_store_one_job(open_store):
+    stores = [open_store() for _ in range(2)]
+    barrier = threading.Barrier(10)
+    holders = {}
+
+    def create(n):
+        barrier.wait()
+        holders[n] = stores[n % 2].create(make_job(f"job-{n}", request_key="same", idempotency_key=f"key-{n}"))
+
+    threads = [threading.Thread(target=create, args=(n,)) for n in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    created = [n for n, holder in holders.items() if holder is None]
+    assert len(created) == 1
+    assert {holder["job_id"] for holder in holders.values() if holder is not None} == {f"job-{created[0]}"}
+    assert stores[0].find("request_key", "same")["job_id"] == f"job-{created[0]}"
+    # Losing jobs are not stored and don't keep the keys they took
+    assert [job["job_id"] for job in stores[1].list()] == [f"job-{created[0]}"]
+    assert all(stores[0].find("idempotency_key", f"key-{n}") is None for n in range(10) if n != created[0])
+
+
+def test_released_keys_go_to_the_next_job(open_store):
+    store = open_store()
+    assert store.create(make_job("first", request_key="same")) is None
+    assert store.create(make_job("second", request_key="same"))["job_id"] == "first"
+
+    store.release("request_key", "same", "second")
+    assert store.find("request_key", "same")["job_id"] == "first"
+    store.release("request_key", "same", "first")
+    assert store.find("request_key", "same") is None
+    assert store.create(make_job("second", request_key="same")) is None
+    assert store.find("request_key", "same")["job_id"] == "second"
+    assert store.get("first") is not None
+
+
+def test_jobs_are_created_updated_and_deleted(open_store, tmp_path):
+    store = open_store()
+    job = make_job("one", target_languages=["hi", "fr"])
+    assert store.create(job) is None
+    assert store.get("one").items() >= job.items()
+    assert "one" in store and "other" not in store
+
+    result_file = tmp_path / "one.txt"
+    result_file.write_text("translated", encoding="utf-8")
+    assert store.update("one", status="completed", result_file=str(result_file), failed_chunks=[])
+    assert not store.update("other", status="completed")
+    updated = {**job, "status": "completed", "result_file": str(result_file), "failed_chunks": [], "result": "translated"}
+    assert store.get("one").items() >= updated.items()
+    assert store.get("one", include_result=False)["result"] is None
+
+    # Other views of the store see the same jobs
+    assert open_store().get("one", include_result=False)["status"] == "completed"
+
+    assert store.delete("one")["job_id"] == "one"
+    assert store.get("one") is None and store.delete("one") is None
+    assert not result_file.exists()
+
+
+def test_jobs_are_listed_oldest_first(open_store):
+    store = open_store()
+    for n in range(3):
+        store.create(make_job(f"job-{n}", created_at=f"2026-01-0{n + 1}T00:00:00"))
+    assert [job["job_id"] for job in store.list()] == ["job-0", "job-1", "job-2"]
+
+
+def test_finished_jobs_expire(open_store):
+    store = open_store(ttl_seconds=1)
+    store.create(make_job("running"))
+    store.create(make_job("finished"))
+    store.update("finished", status="completed")
+    time.sleep(1.2)
+
+    # SQLite sweeps expired jobs at most once a minute, start a new minute
+    store._last_sweep = 0
+    assert [job["job_id"] for job in store.list()] == ["running"]
+    assert store.get("finished") is None
+
+
+def test_pages_follow_cursors_and_filter_statuses(open_store):
+    store = open_store()
+    statuses = ["completed", "failed"] * 150
+    for n, status in enumerate(statuses):
+        store.create(make_job(f"job-{n:03}", status=status, created_at="2026-01-01T00:00:00"))
+
+    seen, after = [], None
+    while True:
+        page = store.page(after=after, limit=40, statuses=["failed"])
+        seen += [job["job_id"] for job in page]
+        if len(page) < 40:
+            break
+        after = cursor_of(page[-1])
+    assert seen == [f"job-{n:03}" for n in range(1, 300, 2)]
+
+    assert store.page(created_before="2026-01-01T00:00:00") == []
+    assert len(store.page(created_after="2026-01-01T00:00:00", limit=500)) == 300
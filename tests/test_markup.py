@@ -0,0 +1,93 @@
+import pytest
+
+from markup import parse_document
+
+
+def upper(document):
+    return document.render([segment.upper() for segment in document.segments])
+
+
+HTML = (
+    '<!DOCTYPE html>\n<html><head><title>Caf&eacute; menu</title><style>p { color: red; }</style></head>\n'
+    '<body>\n  <p title="It&#39;s here">Tea&nbsp;&amp; cake &copy; <b>today&#x27;s</b> <a href="/x?a=1&amp;b=2">offer</a></p>\n'
+    '  <img src="a.png" alt="A &quot;cat&quot;">\n  <pre>kept &lt;as&gt; is</pre>\n</body></html>\n'
+)
+
+MARKDOWN = (
+    "# Getting started\n\nRead the [install guide](docs/install.md) and run `make test` first.\n\n"
+    "- First *item* here\n- ![Diagram of the flow](flow.png)\n\n```python\nprint('kept')\n```\n\n"
+    "| Name | Notes |\n| --- | --- |\n| cache | Keeps results |\n"
+)
+
+JSON = '{\n  "title": "Caf\\u00e9 menu",\n  "key": "button_ok",\n  "quote": "Say \\"hello\\" to {name}",\n  "count": 3\n}\n'
+
+PO = (
+    'msgid ""\nmsgstr ""\n"Content-Type: text/plain; charset=UTF-8\\n"\n\n'
+    '#: app.py:1\nmsgid "Save \\"%s\\" now"\nmsgstr ""\n\n'
+    'msgid "Done"\nmsgstr "Fertig"\n'
+)
+
+YAML = (
+    "# Strings\ngreeting: Hello there # shown first\nquoted: \"Caf\\u00e9 time\"\n"
+    "single: 'It''s here'\nname: button_ok\nitems:\n  - First item\nbody: |\n  Two lines\n    of text\n"
+)
+
+
+@pytest.mark.parametrize("source,fmt", [
+    (HTML, "html"), (MARKDOWN, "markdown"), (JSON, "json"), (YAML, "yaml"),
+])
+def test_untranslated_document_comes_back_exactly(source, fmt):
+    document = parse_document(source, fmt)
+    assert document.segments
+    assert document.render([None] * len(document.segments)) == source
+
+
+def test_html_keeps_markup_and_the_entities_of_untranslated_text():
+    document = parse_document(HTML, "html")
+    assert document.segments == [
+        "Café menu", "It's here", "Tea\xa0& cake © ##0##today's##1## ##2##offer##3##", 'A "cat"',
+    ]
+    assert upper(document) == (
+        '<!DOCTYPE html>\n<html><head><title>CAFÉ MENU</title><style>p { color: red; }</style></head>\n'
+        '<body>\n  <p title="IT&#x27;S HERE">TEA\xa0&amp; CAKE © <b>TODAY\'S</b> <a href="/x?a=1&amp;b=2">OFFER</a></p>\n'
+        '  <img src="a.png" alt="A &quot;CAT&quot;">\n  <pre>kept &lt;as&gt; is</pre>\n</body></html>\n'
+    )
+
+    # Only the attribute is translated, the text around it keeps its entities
+    translations = [None] * len(document.segments)
+    translations[1] = "Ici"
+    assert '<p title="Ici">Tea&nbsp;&amp; cake &copy; <b>today&#x27;s</b>' in document.render(translations)
+
+
+def test_markdown_keeps_syntax():
+    document = parse_document(MARKDOWN, "markdown")
+    assert upper(document) == (
+        "# GETTING STARTED\n\nREAD THE [INSTALL GUIDE](docs/install.md) AND RUN `make test` FIRST.\n\n"
+        "- FIRST *ITEM* HERE\n- ![DIAGRAM OF THE FLOW](flow.png)\n\n```python\nprint('kept')\n```\n\n"
+        "| NAME | NOTES |\n| --- | --- |\n| CACHE | KEEPS RESULTS |\n"
+    )
+
+
+def test_json_translates_values_and_keeps_escapes_of_untranslated_ones():
+    document = parse_document(JSON, "json")
+    assert document.segments == ["Café menu", 'Say "hello" to ##0##']
+    assert upper(document) == (
+        '{\n  "title": "CAFÉ MENU",\n  "key": "button_ok",\n  "quote": "SAY \\"HELLO\\" TO {name}",\n  "count": 3\n}\n'
+    )
+    assert document.render([None, "Bonjour ##0##"]) == JSON.replace('Say \\"hello\\" to {name}', "Bonjour {name}")
+
+
+def test_po_fills_empty_messages_only():
+    document = parse_document(PO, "po")
+    assert document.segments == ['Save "##0##" now']
+    assert upper(document) == PO.replace('now"\nmsgstr ""', 'now"\nmsgstr "SAVE \\"%s\\" NOW"')
+    assert document.render([None]) == PO.replace('now"\nmsgstr ""', 'now"\nmsgstr "Save \\"%s\\" now"')
+
+
+def test_yaml_quotes_translated_plain_values():
+    document = parse_document(YAML, "yaml")
+    assert document.segments == ["Hello there", "Café time", "It's here", "First item", "Two lines\n  of text"]
+    assert upper(document) == (
+        "# Strings\ngreeting: \"HELLO THERE\" # shown first\nquoted: \"CAFÉ TIME\"\n"
+        "single: 'IT''S HERE'\nname: button_ok\nitems:\n  - \"FIRST ITEM\"\nbody: |\n  TWO LINES\n    OF TEXT\n"
+    )
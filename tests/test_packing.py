@@ -0,0 +1,58 @@
+from backends import LocalBackend
+from google_translate import translate_items
+from packing import MARKER_PATTERN, pack_items, restore_whitespace, unpack
+from translation_cache import TranslationCache
+
+
+class MarkerLosingBackend(LocalBackend):
+    """Local backend that drops the marker of item 1 from packed chunks, like a translator mangling it"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    async def translate_batch(self, chunks, source_lang, target_lang):
+        self.chunks.extend(chunks)
+        chunks = [MARKER_PATTERN.sub(lambda m: "" if m.group(1) == "1" else m.group(0), chunk) for chunk in chunks]
+        return await super().translate_batch(chunks, source_lang, target_lang)
+
+
+def translate(items, backend=None):
+    return translate_items(
+        items, "en", "hi", backend=backend or LocalBackend(), cache=TranslationCache(memory_size=0), memory=False
+    )
+
+
+def test_every_packed_item_is_translated():
+    items = ["first label", "second label\nwith two lines", "third label"]
+    assert len(pack_items(items)) == 1
+    assert translate(items) == ["[hi] first label", "[hi] second label\n[hi] with two lines", "[hi] third label"]
+
+
+def test_items_around_a_lost_marker_are_translated_on_their_own():
+    items = ["first label", "second label", "third label"]
+    assert unpack("@@0@@\n[hi] first label\n[hi] second label\n@@2@@\n[hi] third label", [0, 1, 2]) == {
+        2: "[hi] third label"
+    }
+
+    backend = MarkerLosingBackend()
+    assert translate(items, backend) == ["[hi] first label", "[hi] second label", "[hi] third label"]
+    assert backend.chunks[1:] == ["first label", "second label"]
+
+
+def test_marker_like_text_is_translated_on_its_own():
+    items = ["Use the @@1@@ token", "second label", "third @ @0 @ @ label"]
+    packs = pack_items(items)
+    shared = [pack for pack in packs if pack.span is None]
+    assert [pack.items for pack in shared] == [[1]]
+    assert unpack(shared[0].text, shared[0].items) == {1: "second label"}
+
+    assert translate(items) == ["[hi] Use the @@1@@ token", "[hi] second label", "[hi] third @ @0 @ @ label"]
+
+
+def test_surrounding_whitespace_is_kept():
+    assert restore_whitespace("  padded \n", "[hi] padded") == "  [hi] padded \n"
+    assert restore_whitespace("   ", None) == "   "
+    assert restore_whitespace("label", None) is None
+
+    assert translate(["  padded  ", "   ", "", "padded"]) == ["  [hi] padded  ", "   ", "", "[hi] padded"]
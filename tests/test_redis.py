@@ -0,0 +1,136 @@
+import asyncio
+import io
+import time
+
+import pytest
+
+import result_store
+from redis_client import RedisClient, RedisError
+from result_store import RedisResultStore
+from translation_cache import RedisTranslationCache
+
+
+@pytest.fixture
+def redis(redis_url):
+    client = RedisClient(redis_url)
+    yield client
+    client.close()
+
+
+def test_commands_and_pipelines(redis):
+    assert redis.ping()
+    assert redis.execute("SET", "client:key", "value") == "OK"
+    assert redis.execute("GET", "client:key") == b"value"
+    assert redis.execute("GET", "client:missing") is None
+
+    replies = redis.pipeline([("INCR", "client:counter"), ("HGET", "client:key", "field"), ("INCR", "client:counter")])
+    assert replies[0] == 1 and isinstance(replies[1], RedisError) and replies[2] == 2
+    with pytest.raises(RedisError):
+        redis.execute("HGET", "client:key", "field")
+
+    replies = redis.pipeline([("MULTI",), ("RPUSH", "client:list", "a"), ("LLEN", "client:list"), ("EXEC",)])
+    assert replies[-1] == [1, 1]
+
+
+def test_databases_are_separate(redis, redis_url):
+    other = RedisClient(redis_url[:-1] + "1")
+    redis.execute("SET", "client:db", "zero")
+    assert other.execute("GET", "client:db") is None
+    other.close()
+
+
+def test_keys_expire(redis):
+    redis.execute("SET", "client:short", "value", "EX", 1)
+    assert redis.execute("TTL", "client:short") == 1
+    time.sleep(1.1)
+    assert redis.execute("GET", "client:short") is None
+
+
+def test_calls_on_the_event_loop_are_refused(redis):
+    async def run():
+        with pytest.raises(RuntimeError):
+            redis.execute("PING")
+        assert await asyncio.to_thread(redis.ping)
+
+    asyncio.run(run())
+
+
+def test_results_upload_in_blocks_and_read_in_ranges(redis, tmp_path, monkeypatch):
+    monkeypatch.setattr(result_store, "UPLOAD_BLOCK_SIZE", 4)
+    store = RedisResultStore(redis, prefix="results:")
+    path = tmp_path / "job.txt"
+    path.write_bytes("translated text ✓".encode("utf-8"))
+
+    store.upload(str(path))
+    assert not path.exists()
+    assert store.read(str(path)) == "translated text ✓"
+    size, etag = store.stat(str(path))
+    assert size == len("translated text ✓".encode("utf-8")) and etag.startswith('"')
+    assert redis.execute("EXISTS", f"results:result:{path}:upload") == 0
+
+    reader = store.open(str(path))
+    assert reader.read(10) == b"translated"
+    reader.seek(-3, io.SEEK_END)
+    assert reader.read() == "✓".encode("utf-8")
+    assert reader.read() == b""
+    reader.seek(11)
+    buffer = bytearray(4)
+    assert reader.readinto(buffer) == 4 and bytes(buffer) == b"text"
+    assert io.BufferedReader(store.open(str(path)), buffer_size=3).read() == "translated text ✓".encode("utf-8")
+
+    store.delete(str(path))
+    assert store.read(str(path)) is None and store.stat(str(path)) is None
+    with pytest.raises(FileNotFoundError):
+        store.open(str(path))
+
+
+def test_failed_uploads_leave_the_previous_result(redis, tmp_path, monkeypatch):
+    monkeypatch.setattr(result_store, "UPLOAD_BLOCK_SIZE", 4)
+    store = RedisResultStore(redis, prefix="results:")
+    path = tmp_path / "job.txt"
+    path.write_text("first version", encoding="utf-8")
+    store.upload(str(path))
+    etag = store.stat(str(path))[1]
+
+    path.write_text("second version", encoding="utf-8")
+    execute = redis.execute
+    appends = []
+
+    def failing_execute(*args, **kwargs):
+        if args[0] == "APPEND":
+            appends.append(args)
+            if len(appends) == 2:
+                raise ConnectionError("connection lost")
+        return execute(*args, **kwargs)
+
+    monkeypatch.setattr(redis, "execute", failing_execute)
+    with pytest.raises(ConnectionError):
+        store.upload(str(path))
+    assert store.read(str(path)) == "first version" and store.stat(str(path))[1] == etag
+
+    monkeypatch.setattr(redis, "execute", execute)
+    store.upload(str(path))
+    assert store.read(str(path)) == "second version" and store.stat(str(path))[1] != etag
+
+
+def test_empty_results_can_be_uploaded(redis, tmp_path):
+    store = RedisResultStore(redis, prefix="results:")
+    path = tmp_path / "empty.txt"
+    path.write_text("", encoding="utf-8")
+    store.upload(str(path))
+    assert store.read(str(path)) == "" and store.stat(str(path))[0] == 0
+
+
+def test_cache_entries_are_shared_between_nodes(redis, redis_url):
+    caches = [RedisTranslationCache(RedisClient(redis_url), prefix="cache-test:") for _ in range(2)]
+    caches[0].put("key", "translation")
+    assert caches[1].get("key") == "translation"
+    assert caches[1].get("missing") is None
+    assert (caches[1].hits, caches[1].misses) == (1, 1)
+    assert 0 < redis.execute("TTL", "cache-test:cache:key") <= 30 * 24 * 3600
+
+    caches[0].clear()
+    caches[1].clear()
+    assert caches[1].get("key") is None
+    for cache in caches:
+        cache.close()
@@ -0,0 +1,144 @@
+import asyncio
+import itertools
+import threading
+import time
+
+import pytest
+
+from session_pool import SessionPool
+
+
+class Resources:
+    """Factory and close callbacks that record what the pool did"""
+
+    def __init__(self):
+        self.numbers = itertools.count()
+        self.closed = []
+        self.broken = set()
+
+    def factory(self, key):
+        return (key, next(self.numbers))
+
+    def close(self, resource):
+        self.closed.append(resource)
+
+    def healthy(self, resource):
+        return resource not in self.broken
+
+
+def make_pool(resources, **kwargs):
+    return SessionPool(resources.factory, resources.close, health_check=resources.healthy, **kwargs)
+
+
+def test_sessions_are_reused_for_their_key():
+    resources = Resources()
+    pool = make_pool(resources)
+    first = pool.checkout(("en", "hi"))
+    pool.checkin(first)
+    assert pool.checkout(("en", "hi")) is first
+    assert pool.checkout(("en", "fr")).resource == (("en", "fr"), 1)
+    assert pool.stats() == {"size": 2, "idle": 0, "in_use": 2, "max_size": 4}
+
+
+def test_checkout_blocks_while_full_and_times_out():
+    pool = make_pool(Resources(), max_size=1)
+    session = pool.checkout("a")
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pool.checkout("a", timeout=0.2)
+    assert time.monotonic() - started >= 0.2
+
+    # A checkin from another thread hands the session to the blocked checkout
+    threading.Timer(0.1, pool.checkin, [session]).start()
+    assert pool.checkout("a", timeout=5) is session
+
+
+def test_sessions_are_recycled_after_max_uses():
+    resources = Resources()
+    pool = make_pool(resources, max_uses=2)
+    first = pool.checkout("a")
+    pool.checkin(first)
+    assert pool.checkout("a") is first
+    pool.checkin(first)
+    assert resources.closed == [first.resource]
+
+    second = pool.checkout("a")
+    assert second is not first
+    assert pool.stats()["size"] == 1
+
+
+def test_idle_sessions_are_evicted():
+    resources = Resources()
+    pool = make_pool(resources, max_idle_seconds=0.05)
+    session = pool.checkout("a")
+    pool.checkin(session)
+    assert pool.evict_idle() == 0
+
+    time.sleep(0.1)
+    assert pool.evict_idle() == 1
+    assert resources.closed == [session.resource]
+    assert pool.stats()["size"] == 0
+
+
+def test_full_pool_closes_the_least_recently_used_idle_session_of_another_key():
+    resources = Resources()
+    pool = make_pool(resources, max_size=2)
+    older, newer = pool.checkout("a"), pool.checkout("b")
+    pool.checkin(older)
+    pool.checkin(newer)
+
+    session = pool.checkout("c")
+    assert session.resource == ("c", 2)
+    assert resources.closed == [older.resource]
+    assert pool.checkout("b", timeout=0) is newer
+    assert pool.stats() == {"size": 2, "idle": 0, "in_use": 2, "max_size": 2}
+
+
+def test_unhealthy_sessions_are_replaced_on_checkout():
+    resources = Resources()
+    pool = make_pool(resources, max_size=1)
+    session = pool.checkout("a")
+    pool.checkin(session)
+    resources.broken.add(session.resource)
+
+    replacement = pool.checkout("a")
+    assert replacement is not session
+    assert resources.closed == [session.resource]
+    assert pool.stats()["size"] == 1
+
+
+def test_sessions_failing_in_a_block_are_closed():
+    resources = Resources()
+    pool = make_pool(resources)
+    with pytest.raises(ValueError):
+        with pool.session("a") as session:
+            raise ValueError("page crashed")
+    assert resources.closed == [session.resource]
+    assert pool.stats()["size"] == 0
+
+
+def test_async_waiters_are_woken_by_checkin():
+    pool = make_pool(Resources(), max_size=1)
+
+    async def run():
+        session = await pool.acheckout("a")
+        waiter = asyncio.create_task(pool.acheckout("a", timeout=5))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        # A checkin from another thread, like a synchronous worker, wakes the task
+        await asyncio.to_thread(pool.checkin, session)
+        assert await waiter is session
+
+        with pytest.raises(TimeoutError):
+            await pool.acheckout("a", timeout=0.05)
+
+        # The task waiting for another key gets the slot of the idle session
+        other = asyncio.create_task(pool.acheckout("b", timeout=5))
+        await asyncio.sleep(0.05)
+        await pool.acheckin(session)
+        assert (await other).resource == ("b", 1)
+        assert pool.stats() == {"size": 1, "idle": 0, "in_use": 1, "max_size": 1}
+
+    asyncio.run(run())
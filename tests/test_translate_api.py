@@ -0,0 +1,172 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from job_store import RedisJobStore
+from redis_client import RedisClient
+
+
+def post_many(client, count, body, headers=None):
+    with ThreadPoolExecutor(count) as pool:
+        responses = list(pool.map(lambda _: client.post("/translate", json=body, headers=headers), range(count)))
+    assert all(response.status_code == 200 for response in responses)
+    return [response.json() for response in responses]
+
+
+def test_concurrent_identical_requests_share_one_job(api, client):
+    jobs = post_many(client, 10, {"text": "Shared by ten requests.", "source_language": "en", "target_language": "hi"})
+    assert len({job["job_id"] for job in jobs}) == 1
+    assert sum(not job["coalesced"] for job in jobs) == 1
+
+
+def test_concurrent_retries_share_one_job(api, client):
+    body = {"text": "Sent with a key.", "source_language": "en", "target_language": "hi"}
+    jobs = post_many(client, 5, body, headers={"Idempotency-Key": "retry-1"})
+    assert len({job["job_id"] for job in jobs}) == 1
+
+    body["text"] = "A different body."
+    assert client.post("/translate", json=body, headers={"Idempotency-Key": "retry-1"}).status_code == 422
+
+
+def test_request_keys_tell_item_boundaries_apart(api):
+    assert api.request_key("batch", "en", ["hi"], ["a\0b"]) != api.request_key("batch", "en", ["hi"], ["a", "b"])
+    assert api.request_key("batch", "en", ["hi"], ["a", "b"]) == api.request_key("batch", "en", ["hi"], ["a", "b"])
+
+
+def add_jobs(api, prefix, statuses, created_at="2001-01-01T00:00:00"):
+    """Store finished jobs that all share one creation time, so only their IDs order them"""
+    for n, status in enumerate(statuses):
+        api.job_store.create({
+            "job_id": f"{prefix}-{n}", "status": status, "created_at": created_at, "completed_at": None,
+            "text_length": 1, "chunks": 1, "result": None
+        })
+
+
+def list_ids(client, **params):
+    page = client.get("/translations", params=params).json()
+    return [job["job_id"] for job in page["jobs"]], page["next_cursor"]
+
+
+def test_listing_pages_stay_stable_while_jobs_change(api, client):
+    add_jobs(api, "stable", ["completed"] * 5)
+    window = {"created_after": "2001-01-01T00:00:00", "created_before": "2001-01-02T00:00:00", "limit": 2}
+
+    first, cursor = list_ids(client, **window)
+    assert first == ["stable-0", "stable-1"]
+    # Jobs removed or added before the cursor don't shift the next pages
+    api.job_store.delete("stable-0")
+    add_jobs(api, "early", ["completed"])
+    second, cursor = list_ids(client, cursor=cursor, **window)
+    third, last = list_ids(client, cursor=cursor, **window)
+    assert second + third == ["stable-2", "stable-3", "stable-4"]
+    assert last is None
+    assert client.get("/translations", params={"cursor": "not a cursor"}).status_code == 400
+
+
+def test_listing_filters_by_status_across_pages(api, client):
+    add_jobs(api, "filtered", ["completed", "failed", "pending", "failed", "completed", "failed"], "2002-01-01T00:00:00")
+    window = {"created_after": "2002-01-01T00:00:00", "created_before": "2002-01-02T00:00:00", "limit": 2}
+
+    ids, cursor = list_ids(client, status="failed", **window)
+    rest, last = list_ids(client, status="failed", cursor=cursor, **window)
+    assert ids + rest == ["filtered-1", "filtered-3", "filtered-5"]
+    assert last is None
+
+    ids, _ = list_ids(client, status=["pending", "completed"], **{**window, "limit": 10})
+    assert ids == ["filtered-0", "filtered-2", "filtered-4"]
+    assert client.get("/translations", params={"status": "lost"}).status_code == 422
+
+
+def test_jobs_without_heartbeat_are_failed_and_started_over(api, client):
+    text = "Its node stopped."
+    key = api.request_key("text", "en", ["hi"], [text])
+    stale = time.time() - api.JOB_LEASE_SECONDS - 1
+    for job_id, status in [("orphan-running", "in_progress"), ("orphan-queued", "pending")]:
+        api.job_store.create({
+            "job_id": job_id, "status": status, "created_at": datetime.now().isoformat(), "heartbeat_at": stale,
+            "completed_at": None, "text_length": len(text), "chunks": 1, "result": None,
+            "request_key": key if status == "in_progress" else None
+        })
+
+    api.fail_orphaned_jobs()
+    assert api.job_store.get("orphan-queued")["status"] == "failed"
+
+    # A request can come across such a job before the sweep does, it fails the job and starts a new one
+    api.job_store.update("orphan-running", status="in_progress", error=None)
+    job = client.post("/translate", json={"text": text, "source_language": "en", "target_language": "hi"}).json()
+    assert not job["coalesced"] and job["job_id"] != "orphan-running"
+    assert api.job_store.get("orphan-running")["status"] == "failed"
+    assert api.job_store.get("orphan-running")["error"].startswith("Job was interrupted")
+
+
+def read_events(client, job_id):
+    events = []
+    with client.stream("GET", f"/translate/{job_id}/stream") as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        for block in response.read().decode().split("\n\n"):
+            if block:
+                event, data = block.split("\n")
+                events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_jobs_stream_their_chunks_then_done(api, client, monkeypatch):
+    # Slow the backend down so the client connects while the job runs
+    monkeypatch.setattr(api.translation_backend, "latency", 0.2)
+    monkeypatch.setattr(api, "STREAM_POLL_SECONDS", 0.01)
+    text = "\n\n".join(" ".join([f"Paragraph {n} of the streamed text."] * 80) for n in range(3))
+    job = client.post("/translate", json={"text": text, "source_language": "en", "target_language": "hi"}).json()
+
+    events = read_events(client, job["job_id"])
+    chunks = [data for event, data in events if event == "chunk"]
+    assert [chunk["index"] for chunk in chunks] == [0, 1, 2]
+    assert all(chunk["total"] == 3 and not chunk["failed"] for chunk in chunks)
+    assert chunks[0]["translation"].startswith("[hi] Paragraph 0")
+
+    event, done = events[-1]
+    assert event == "done" and done["status"] == "completed" and "result" not in done
+    assert done["result_url"] == f"/translate/{job['job_id']}/result"
+    assert done["failed_chunks"] == []
+    assert client.get(done["result_url"]).text == "\n\n".join(chunk["translation"] for chunk in chunks)
+
+    # A client connecting after the job finished gets the whole result with done
+    assert read_events(client, job["job_id"]) == [("done", {**done, "result": client.get(done["result_url"]).text})]
+    assert client.get("/translate/missing/stream").status_code == 404
+
+
+@pytest.mark.parametrize("task,content", [
+    ("perform_translation", "Interrupted text."), ("perform_batch_translation", ["Interrupted item."])
+])
+def test_cancelled_jobs_are_marked_failed_in_redis(api, redis_url, monkeypatch, task, content):
+    # Redis clients refuse to block the event loop, so the cancellation handlers must not either
+    monkeypatch.setattr(api, "job_store", RedisJobStore(RedisClient(redis_url), prefix=f"cancelled-{task}:"))
+    monkeypatch.setattr(api.translation_backend, "latency", 5)
+    job_id = f"cancelled-{task}"
+    api.job_store.create({
+        "job_id": job_id, "status": "pending", "created_at": datetime.now().isoformat(), "completed_at": None,
+        "text_length": 1, "chunks": 1, "result": None
+    })
+
+    async def run():
+        job = asyncio.create_task(getattr(api, task)(job_id, content, "en", "hi"))
+        await asyncio.sleep(0.2)
+        job.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await job
+
+    asyncio.run(run())
+    job = api.job_store.get(job_id)
+    assert job["status"] == "failed" and job["error"] == api.INTERRUPTED_ERROR
+
+
+def test_batch_jobs_are_only_served_as_batches(api, client):
+    job = client.post("/translate", json={"text": "A text job.", "source_language": "en", "target_language": "hi"}).json()
+    batch = client.post("/translate/batch", json={"items": ["A batch item."], "source_language": "en", "target_language": "hi"}).json()
+    assert client.get(f"/translate/{job['job_id']}").status_code == 200
+    assert client.get(f"/translate/batch/{job['job_id']}").status_code == 404
+    assert client.get(f"/translate/batch/{batch['job_id']}").status_code == 200
+    assert client.get(f"/translate/{batch['job_id']}").status_code == 404
@@ -0,0 +1,10 @@
+from translation_cache import cache_key
+
+
+def test_keys_ignore_unicode_form_and_surrounding_whitespace():
+    assert cache_key("  Cafe\u0301 menu\n", "en", "hi") == cache_key("Café menu", "EN", "hi")
+
+
+def test_keys_keep_inner_whitespace():
+    assert cache_key("a  b", "en", "hi") != cache_key("a b", "en", "hi")
+    assert cache_key("line one\nline two", "en", "hi") != cache_key("line one line two", "en", "hi")
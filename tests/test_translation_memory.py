@@ -0,0 +1,21 @@
+from translation_memory import ChunkPlan, TranslationMemory
+
+
+def test_marker_like_sentence_sends_the_whole_chunk():
+    memory = TranslationMemory()
+    memory.add_many([("The first sentence.", "[hi] The first sentence.")], "en", "hi")
+
+    plan = ChunkPlan(memory, "The first sentence. Use the @@0@@ token.", "en", "hi")
+    assert plan.request == plan.chunk
+    assert plan.reused == 0
+    assert plan.finish("[hi] The first sentence. Use the @@0@@ token.") == "[hi] The first sentence. Use the @@0@@ token."
+
+
+def test_missing_sentences_are_packed():
+    memory = TranslationMemory()
+    memory.add_many([("The first sentence.", "[hi] The first sentence.")], "en", "hi")
+
+    plan = ChunkPlan(memory, "The first sentence. The second sentence.", "en", "hi")
+    assert plan.request != plan.chunk and plan.reused == 1
+    translated = plan.finish(plan.request.replace("The second", "[hi] The second"))
+    assert translated == "[hi] The first sentence. [hi] The second sentence."
@@ -1,213 +1,52 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Header, Query
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Literal, Set
 import uvicorn
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import logging
 import os
 import time
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 # Import the translation function from our existing script
-from google_translate import translate_text, chunk_text
-
-# Language data: name to ISO code mapping
-SUPPORTED_LANGUAGES = {
-    "Abkhaz": "ab",
-    "Acehnese": "ace",
-    "Acholi": "ach",
-    "Afrikaans": "af",
-    "Albanian": "sq",
-    "Alur": "alz",
-    "Amharic": "am",
-    "Arabic": "ar",
-    "Armenian": "hy",
-    "Assamese": "as",
-    "Awadhi": "awa",
-    "Aymara": "ay",
-    "Azerbaijani": "az",
-    "Balinese": "ban",
-    "Bambara": "bm",
-    "Bashkir": "ba",
-    "Basque": "eu",
-    "Batak Karo": "btx",
-    "Batak Simalungun": "bts",
-    "Batak Toba": "bbc",
-    "Belarusian": "be",
-    "Bemba": "bem",
-    "Bengali": "bn",
-    "Betawi": "bew",
-    "Bhojpuri": "bho",
-    "Bikol": "bik",
-    "Bosnian": "bs",
-    "Breton": "br",
-    "Bulgarian": "bg",
-    "Buryat": "bua",
-    "Cantonese": "yue",
-    "Catalan": "ca",
-    "Cebuano": "ceb",
-    "Chichewa (Nyanja)": "ny",
-    "Chinese (Simplified)": "zh-CN",
-    "Chinese (Traditional)": "zh-TW",
-    "Chuvash": "cv",
-    "Corsican": "co",
-    "Crimean Tatar": "crh",
-    "Croatian": "hr",
-    "Czech": "cs",
-    "Danish": "da",
-    "Dinka": "din",
-    "Divehi": "dv",
-    "Dogri": "doi",
-    "Dombe": "dov",
-    "Dutch": "nl",
-    "Dzongkha": "dz",
-    "English": "en",
-    "Esperanto": "eo",
-    "Estonian": "et",
-    "Ewe": "ee",
-    "Fijian": "fj",
-    "Filipino (Tagalog)": "fil",
-    "Finnish": "fi",
-    "French": "fr",
-    "French (French)": "fr-FR",
-    "French (Canadian)": "fr-CA",
-    "Frisian": "fy",
-    "Fulfulde": "ff",
-    "Ga": "gaa",
-    "Galician": "gl",
-    "Ganda (Luganda)": "lg",
-    "Georgian": "ka",
-    "German": "de",
-    "Greek": "el",
-    "Guarani": "gn",
-    "Gujarati": "gu",
-    "Haitian Creole": "ht",
-    "Hakha Chin": "cnh",
-    "Hausa": "ha",
-    "Hawaiian": "haw",
-    "Hebrew": "he",
-    "Hiligaynon": "hil",
-    "Hindi": "hi",
-    "Hmong": "hmn",
-    "Hungarian": "hu",
-    "Hunsrik": "hrx",
-    "Icelandic": "is",
-    "Igbo": "ig",
-    "Iloko": "ilo",
-    "Indonesian": "id",
-    "Irish": "ga",
-    "Italian": "it",
-    "Japanese": "ja",
-    "Javanese": "jv",
-    "Kannada": "kn",
-    "Kapampangan": "pam",
-    "Kazakh": "kk",
-    "Khmer": "km",
-    "Kiga": "cgg",
-    "Kinyarwanda": "rw",
-    "Kituba": "ktu",
-    "Konkani": "gom",
-    "Korean": "ko",
-    "Krio": "kri",
-    "Kurdish (Kurmanji)": "ku",
-    "Kurdish (Sorani)": "ckb",
-    "Kyrgyz": "ky",
-    "Lao": "lo",
-    "Latgalian": "ltg",
-    "Latin": "la",
-    "Latvian": "lv",
-    "Ligurian": "lij",
-    "Limburgan": "li",
-    "Lingala": "ln",
-    "Lithuanian": "lt",
-    "Lombard": "lmo",
-    "Luo": "luo",
-    "Luxembourgish": "lb",
-    "Macedonian": "mk",
-    "Maithili": "mai",
-    "Makassar": "mak",
-    "Malagasy": "mg",
-    "Malay": "ms",
-    "Malay (Jawi)": "ms-Arab",
-    "Malayalam": "ml",
-    "Maltese": "mt",
-    "Maori": "mi",
-    "Marathi": "mr",
-    "Meadow Mari": "chm",
-    "Meiteilon (Manipuri)": "mni-Mtei",
-    "Minang": "min",
-    "Mizo": "lus",
-    "Mongolian": "mn",
-    "Myanmar (Burmese)": "my",
-    "Ndebele (South)": "nr",
-    "Nepalbhasa (Newari)": "new",
-    "Nepali": "ne",
-    "Northern Sotho (Sepedi)": "nso",
-    "Norwegian": "no",
-    "Nuer": "nus",
-    "Occitan": "oc",
-    "Odia (Oriya)": "or",
-    "Oromo": "om",
-    "Pangasinan": "pag",
-    "Papiamento": "pap",
-    "Pashto": "ps",
-    "Persian": "fa",
-    "Polish": "pl",
-    "Portuguese": "pt",
-    "Portuguese (Portugal)": "pt-PT",
-    "Portuguese (Brazil)": "pt-BR",
-    "Punjabi": "pa",
-    "Punjabi (Shahmukhi)": "pa-Arab",
-    "Quechua": "qu",
-    "Romani": "rom",
-    "Romanian": "ro",
-    "Rundi": "rn",
-    "Russian": "ru",
-    "Samoan": "sm",
-    "Sango": "sg",
-    "Sanskrit": "sa",
-    "Scots Gaelic": "gd",
-    "Serbian": "sr",
-    "Sesotho": "st",
-    "Seychellois Creole": "crs",
-    "Shan": "shn",
-    "Shona": "sn",
-    "Sicilian": "scn",
-    "Silesian": "szl",
-    "Sindhi": "sd",
-    "Sinhala (Sinhalese)": "si",
-    "Slovak": "sk",
-    "Slovenian": "sl",
-    "Somali": "so",
-    "Spanish": "es",
-    "Sundanese": "su",
-    "Swahili": "sw",
-    "Swati": "ss",
-    "Swedish": "sv",
-    "Tajik": "tg",
-    "Tamil": "ta",
-    "Tatar": "tt",
-    "Telugu": "te",
-    "Tetum": "tet",
-    "Thai": "th",
-    "Tigrinya": "ti",
-    "Tsonga": "ts",
-    "Tswana": "tn",
-    "Turkish": "tr",
-    "Turkmen": "tk",
-    "Twi (Akan)": "ak",
-    "Ukrainian": "uk",
-    "Urdu": "ur",
-    "Uyghur": "ug",
-    "Uzbek": "uz",
-    "Vietnamese": "vi",
-    "Welsh": "cy",
-    "Xhosa": "xh",
-    "Yiddish": "yi",
-    "Yoruba": "yo",
-    "Yucatec Maya": "yua",
-    "Zulu": "zu"
-}
+from google_translate import translate_text_async, translate_text_multi_async, translate_items_async, translate_document_async, save_translation, create_backend, BACKENDS, SESSION_POOL, TRANSLATION_CACHE, TRANSLATION_MEMORY
+from job_store import FINISHED_STATUSES, create_job_store, cursor_of
+from job_queue import JobScheduler, QueueFullError, create_job_queue
+from result_store import create_result_store
+from chunker import chunk_spans
+from markup import EXTENSIONS, parse_document
+from progress import ChunkStates, JobProgress
+from result_stream import RangeNotSatisfiable, choose_encoding, iter_file, parse_range
+# SUPPORTED_LANGUAGES, the name to code table, is re-exported for code that imports it from here
+from languages import LANGUAGES, SUPPORTED_LANGUAGES
+from logs import configure_logging, job_context
+import metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the translation workers, job heartbeats and idle browser sweeps, and close the browsers, backend connections, the cache and the translation memory on shutdown"""
+    scheduler.start()
+    heartbeat = asyncio.create_task(keep_jobs_alive(), name="job-heartbeat")
+    sweeper = asyncio.create_task(close_idle_sessions(), name="session-sweeper")
+    yield
+    heartbeat.cancel()
+    sweeper.cancel()
+    await scheduler.shutdown(wait=False)
+    for backend in backends.values():
+        # HTTP backends keep connection pools open on this loop
+        if hasattr(backend, "aclose"):
+            await backend.aclose()
+    SESSION_POOL.close_all()
+    TRANSLATION_CACHE.close()
+    TRANSLATION_MEMORY.close()
 
 app = FastAPI(
     title="Google Translate API",
@@ -223,12 +62,21 @@ app = FastAPI(
     
     1. Submit text for translation using the `/translate` endpoint
     2. Receive a job ID that you can use to check translation status
-    3. Poll the `/translate/{job_id}` endpoint to check if translation is complete
+    3. Poll the `/translate/{job_id}` endpoint to check if translation is complete, or follow
+       `/translate/{job_id}/stream` to receive each translated chunk as soon as it is ready
     4. Once complete, the translation result will be available in the response
     
+    Jobs wait in a bounded queue for a free worker. When the queue is full, `/translate`
+    answers with 429 and a `Retry-After` header. Use `/queue` to see the current load.
+    Jobs run as tasks on the server's event loop and only the browser calls use threads,
+    so status requests are answered promptly however many jobs are running.
+    
     For large texts, the translation is processed in chunks and may take some time to complete.
+    Browser sessions are kept warm between jobs, so only the first job for a language pair
+    pays for starting Chrome.
     """,
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS to allow requests from any origin
@@ -240,27 +88,158 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Storage for translation jobs
-translation_jobs: Dict[str, Dict] = {}
+# Structured logs with the job_id of the job that wrote them
+configure_logging()
+logger = logging.getLogger("translate_api")
+
+# Storage for result files and translation jobs, selected with the TRANSLATE_RESULT_STORE
+# and TRANSLATE_JOB_STORE environment variables. Shared stores let any node answer for any job.
+result_store = create_result_store()
+job_store = create_job_store(results=result_store)
+
+# Worker tasks that run translation jobs from a bounded priority queue, selected with the
+# TRANSLATE_QUEUE environment variable. With a shared queue every node takes jobs from it,
+# and a node with TRANSLATE_WORKER_SLOTS=0 only serves requests.
+scheduler = JobScheduler(
+    lambda task: run_job(task),
+    slots=int(os.environ.get("TRANSLATE_WORKER_SLOTS", "32")),
+    queue=create_job_queue(max_queue=int(os.environ.get("TRANSLATE_MAX_QUEUE", "100")))
+)
+
+# Gauges read at scrape time
+metrics.QUEUE_DEPTH.set_function(lambda: scheduler.stats()["queue_depth"])
+metrics.ACTIVE_JOBS.set_function(lambda: scheduler.stats()["active"])
+metrics.SESSIONS.labels("in_use").set_function(lambda: SESSION_POOL.stats()["in_use"])
+metrics.SESSIONS.labels("idle").set_function(lambda: SESSION_POOL.stats()["idle"])
+
+# Jobs this process has in its local queue or is running. Their heartbeat is refreshed every
+# HEARTBEAT_SECONDS, and pending or running jobs without one for JOB_LEASE_SECONDS are taken
+# to belong to a node that stopped, so they are failed instead of having requests attached.
+owned_jobs: Set[str] = set()
+HEARTBEAT_SECONDS = float(os.environ.get("TRANSLATE_HEARTBEAT_SECONDS", "5"))
+JOB_LEASE_SECONDS = float(os.environ.get("TRANSLATE_JOB_LEASE_SECONDS", "30"))
+
+# Translated chunks of jobs running in this process, for streaming clients
+job_progress: Dict[str, JobProgress] = {}
+
+# Per-chunk states of jobs running in this process
+job_chunks: Dict[str, ChunkStates] = {}
+
+# Request and idempotency keys whose job this process is looking up or creating, with a lock and
+# the number of requests using it. Identical requests here wait for each other, the job store
+# settles races between nodes.
+claimed_keys: Dict[tuple, list] = {}
+
+# Backend used for jobs that don't ask for one, selected with the TRANSLATE_BACKEND environment variable
+translation_backend = create_backend()
+
+# Backends requested by name, created on first use
+backends: Dict[str, object] = {translation_backend.name: translation_backend}
+
+def get_backend(name: Optional[str] = None):
+    """Return the backend called `name`, or the default backend"""
+    if name is None:
+        return translation_backend
+    if name not in backends:
+        backends[name] = create_backend(name)
+    return backends[name]
+
+def validate_backend(name: Optional[str]) -> Optional[str]:
+    """Raise a 400 error if a backend name is not known"""
+    if name is not None and name not in BACKENDS:
+        raise HTTPException(status_code=400, detail=f"Backend '{name}' not supported, expected one of: {', '.join(BACKENDS)}")
+    return name
 
 # Define request and response models
 class TranslationRequest(BaseModel):
     text: str = Field(..., description="The text to translate")
     source_language: str = Field(default="en", description="Source language code (e.g., 'en' for English)")
     target_language: str = Field(default="hi", description="Target language code (e.g., 'hi' for Hindi)")
+    target_languages: Optional[List[str]] = Field(None, min_length=1, max_length=50, description="Several target language codes, overrides target_language")
+    workers: int = Field(default=1, ge=1, le=64, description="Number of chunks to translate in parallel")
+    priority: Literal["high", "normal", "low"] = Field(default="normal", description="Queue priority of the job")
+    backend: Optional[str] = Field(None, description="Backend to translate with, e.g. 'selenium' or 'http' (default: server setting)")
+    format: Literal["text", "html", "markdown", "json", "po", "yaml"] = Field(default="text", description="Structure of the text, only its translatable segments are sent")
     
+class BatchTranslationRequest(BaseModel):
+    items: List[str] = Field(..., min_length=1, max_length=100000, description="The texts to translate")
+    source_language: str = Field(default="en", description="Source language code (e.g., 'en' for English)")
+    target_language: str = Field(default="hi", description="Target language code (e.g., 'hi' for Hindi)")
+    workers: int = Field(default=1, ge=1, le=64, description="Number of chunks to translate in parallel")
+    priority: Literal["high", "normal", "low"] = Field(default="normal", description="Queue priority of the job")
+    backend: Optional[str] = Field(None, description="Backend to translate with, e.g. 'selenium' or 'http' (default: server setting)")
+
 class TranslationResponse(BaseModel):
     job_id: str = Field(..., description="Unique identifier for the translation job")
     status: str = Field(..., description="Status of the translation job")
+    coalesced: bool = Field(False, description="True if the request was attached to an existing job instead of starting one")
     
 class TranslationStatus(BaseModel):
     job_id: str = Field(..., description="Unique identifier for the translation job")
     status: str = Field(..., description="Status of the translation job")
     created_at: str = Field(..., description="When the job was created")
+    started_at: Optional[str] = Field(None, description="When a worker picked up the job")
     completed_at: Optional[str] = Field(None, description="When the job was completed")
     text_length: int = Field(..., description="Length of the source text")
     chunks: int = Field(..., description="Number of chunks the text was split into")
-    result: Optional[str] = Field(None, description="The translation result (if completed)")
+    unique_chunks: Optional[int] = Field(None, description="Number of distinct chunks that needed a translation")
+    dedup_ratio: Optional[float] = Field(None, description="Fraction of chunks served by translating an identical chunk once")
+    chunk_states: Optional[Dict[str, int]] = Field(None, description="Number of chunks pending, in flight, done and failed")
+    failed_chunks: Optional[List[int]] = Field(None, description="Indices of chunks that failed (if partial)")
+    error: Optional[str] = Field(None, description="Why the job failed or is partial")
+    result: Optional[str] = Field(None, description="The translation result (if completed, or partial with failed chunks left untranslated)")
+    target_languages: Optional[List[str]] = Field(None, description="Target languages of a multi-target job")
+    results: Optional[Dict[str, Optional[str]]] = Field(None, description="Translation result per target language (if completed)")
+
+class TranslationPage(BaseModel):
+    jobs: List[TranslationStatus] = Field(..., description="Jobs on this page, oldest first")
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to get the next page, null on the last page")
+
+class BatchItemResult(BaseModel):
+    index: int = Field(..., description="Position of the item in the request")
+    status: str = Field(..., description="Status of the item")
+    translation: Optional[str] = Field(None, description="The translation of the item (if completed)")
+
+class BatchTranslationStatus(BaseModel):
+    job_id: str = Field(..., description="Unique identifier for the translation job")
+    status: str = Field(..., description="Status of the translation job")
+    created_at: str = Field(..., description="When the job was created")
+    started_at: Optional[str] = Field(None, description="When a worker picked up the job")
+    completed_at: Optional[str] = Field(None, description="When the job was completed")
+    item_count: int = Field(..., description="Number of items in the batch")
+    chunks: int = Field(..., description="Number of chunks the items were packed into")
+    error: Optional[str] = Field(None, description="Why the job failed (if failed)")
+    items: List[BatchItemResult] = Field(..., description="Status and translation of every item")
+
+class QueueStats(BaseModel):
+    queue_depth: int = Field(..., description="Jobs waiting for a worker")
+    max_queue: int = Field(..., description="Maximum number of waiting jobs before requests are rejected")
+    active: int = Field(..., description="Jobs currently running")
+    slots: int = Field(..., description="Number of jobs that can run at the same time")
+    oldest_wait_seconds: float = Field(..., description="How long the oldest waiting job has been queued")
+    average_wait_seconds: float = Field(..., description="Average queue wait of recently started jobs")
+    max_wait_seconds: float = Field(..., description="Longest queue wait of recently started jobs")
+
+class CacheStats(BaseModel):
+    hits: int = Field(..., description="Chunk lookups served from the cache")
+    misses: int = Field(..., description="Chunk lookups that had to go to the backend")
+    evictions: int = Field(..., description="Entries dropped because of size limits or expiry")
+    memory_entries: int = Field(..., description="Entries in the in-memory tier")
+    disk_entries: int = Field(..., description="Entries in the on-disk tier")
+
+class MemoryStats(BaseModel):
+    hits: int = Field(..., description="Sentence lookups served from the translation memory")
+    fuzzy_hits: int = Field(..., description="Sentence lookups served from a similar stored sentence")
+    misses: int = Field(..., description="Sentence lookups that had to go to the backend")
+    segments: int = Field(..., description="Sentences stored in the translation memory")
+
+class MemoryMatch(BaseModel):
+    source: str = Field(..., description="Stored sentence, with the query's numbers and other values filled in")
+    translation: str = Field(..., description="Stored translation, with the query's values filled in")
+    similarity: float = Field(..., description="Jaccard similarity of the words and word pairs of the two sentences")
+
+class MemorySearchResults(BaseModel):
+    matches: List[MemoryMatch] = Field(..., description="Similar sentences, most similar first")
 
 class Language(BaseModel):
     name: str = Field(..., description="Full name of the language")
@@ -270,84 +249,558 @@ class LanguageList(BaseModel):
     languages: List[Language] = Field(..., description="List of supported languages")
     count: int = Field(..., description="Total number of supported languages")
 
-def perform_translation(job_id: str, text: str, source_lang: str, target_lang: str):
-    """Background task to perform translation"""
+def validate_language(code: str, kind: str) -> str:
+    """Return the supported code for a language code or alias, or raise a 400 error"""
+    supported = LANGUAGES.resolve(code)
+    if supported is None:
+        raise HTTPException(status_code=400, detail=f"{kind} language '{code}' not supported")
+    return supported
+
+# Jobs a repeated request can attach to, failed and partial ones are started over
+REUSABLE_STATUSES = {"pending", "in_progress", "completed"}
+
+def request_key(kind: str, source_lang: str, target_langs: List[str], content: List[str], backend: Optional[str] = None) -> str:
+    """Hash of everything that decides a job's result, identical requests get the same key"""
+    selected = get_backend(backend)
+    # JSON escapes every string, so no two different requests encode the same
+    encoded = json.dumps([kind, source_lang, target_langs, selected.name, selected.version, content])
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+def is_orphaned(job: Dict) -> bool:
+    """Return True if a pending or running job hasn't had a heartbeat from its node for JOB_LEASE_SECONDS"""
+    # Jobs waiting in a shared queue don't depend on the node that queued them
+    if job["status"] == "in_progress" or job["status"] == "pending" and not scheduler.queue.shared:
+        heartbeat = job.get("heartbeat_at") or datetime.fromisoformat(job["created_at"]).timestamp()
+        return time.time() - heartbeat > JOB_LEASE_SECONDS
+    return False
+
+def fail_orphaned(job: Dict) -> Dict:
+    """Mark a job whose node stopped as failed, and return it"""
+    fields = {
+        "status": "failed",
+        "error": "Job was interrupted: the node running it stopped",
+        "completed_at": datetime.now().isoformat()
+    }
+    job_store.update(job["job_id"], **fields)
+    return {**job, **fields}
+
+def fail_orphaned_jobs():
+    """Fail every pending or running job left behind by a node that stopped"""
+    after = None
+    while True:
+        page = job_store.page(after=after, limit=500, statuses=["pending", "in_progress"])
+        for job in page:
+            if is_orphaned(job):
+                fail_orphaned(job)
+        if len(page) < 500:
+            return
+        after = cursor_of(page[-1])
+
+# Seconds between checks for browsers idle longer than TRANSLATE_SESSION_IDLE_SECONDS
+SESSION_SWEEP_SECONDS = max(min(SESSION_POOL.max_idle_seconds / 2, 60.0), 1.0)
+
+async def close_idle_sessions():
+    """Close browsers that have been idle too long, also when no new job comes along to notice"""
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_SECONDS)
+        closed = await asyncio.to_thread(SESSION_POOL.evict_idle)
+        if closed:
+            logger.info(f"Closed {closed} idle browser sessions")
+
+async def keep_jobs_alive():
+    """Refresh the heartbeat of the jobs this process owns, and fail jobs left behind by stopped nodes"""
+    last_sweep = 0.0
+    while True:
+        now = time.time()
+        for job_id in list(owned_jobs):
+            await asyncio.to_thread(job_store.update, job_id, heartbeat_at=now)
+        if now - last_sweep >= JOB_LEASE_SECONDS:
+            last_sweep = now
+            try:
+                await asyncio.to_thread(fail_orphaned_jobs)
+            except Exception as e:
+                logger.warning(f"Could not check for orphaned jobs: {e}")
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+
+async def queue_job(task: Dict, priority: str):
+    """Queue a job's task, jobs in a local queue are kept alive by this process until they finish"""
+    if scheduler.queue.shared:
+        # Shared queues live in SQLite or Redis, the local queue is an asyncio queue and stays on the loop
+        await asyncio.to_thread(scheduler.submit, task, priority)
+    else:
+        scheduler.submit(task, priority=priority)
+    if not scheduler.queue.shared:
+        owned_jobs.add(task["job_id"])
+
+def find_existing_job(key: str, idempotency_key: Optional[str]) -> Optional[Dict]:
+    """Return the job a request should attach to instead of starting a new one, if there is one"""
+    # A retried request gets the job it started the first time, whatever its state
+    if idempotency_key:
+        job = job_store.find("idempotency_key", idempotency_key)
+        if job is not None:
+            if job.get("request_key") != key:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+            return fail_orphaned(job) if is_orphaned(job) else job
+    
+    # Otherwise share a running or finished job with the same content, unless its node stopped
+    job = job_store.find("request_key", key)
+    if job is not None and is_orphaned(job):
+        job = fail_orphaned(job)
+    if job is not None and job["status"] in REUSABLE_STATUSES:
+        return job
+    if job is not None:
+        # A failed or partial job is started over, the new job takes its key
+        job_store.release("request_key", key, job["job_id"])
+    return None
+
+def create_job(job: Dict) -> Optional[Dict]:
+    """Store a new job, or return the job an identical request created first"""
+    for _ in range(3):
+        holder = job_store.create(job)
+        if holder is None:
+            return None
+        existing = find_existing_job(job["request_key"], job["idempotency_key"])
+        if existing is not None:
+            return existing
+    raise HTTPException(status_code=409, detail="An identical request is being started over, retry it")
+
+@asynccontextmanager
+async def claiming_keys(key: str, idempotency_key: Optional[str]):
+    """Hold a request's keys in this process while its job is looked up and created"""
+    names = sorted({("request_key", key), ("idempotency_key", idempotency_key)} - {("idempotency_key", None)})
+    for name in names:
+        claimed_keys.setdefault(name, [asyncio.Lock(), 0])[1] += 1
+    acquired = []
+    try:
+        # Always in the same order, so two requests sharing only one key can't deadlock
+        for name in names:
+            await claimed_keys[name][0].acquire()
+            acquired.append(name)
+        yield
+    finally:
+        for name in acquired:
+            claimed_keys[name][0].release()
+        for name in names:
+            claimed_keys[name][1] -= 1
+            if not claimed_keys[name][1]:
+                del claimed_keys[name]
+
+async def run_job(task: Dict):
+    """Run the background task of a queued job with the job's id on its log records, and record how long the job took"""
+    job_id, kind = task["job_id"], task["kind"]
+    owned_jobs.add(job_id)
+    try:
+        # A job that waited in a shared queue has an old heartbeat, renew it before it counts as running
+        await asyncio.to_thread(job_store.update, job_id, heartbeat_at=time.time())
+        with job_context(job_id):
+            await TASKS[kind](job_id=job_id, **task["params"])
+    finally:
+        owned_jobs.discard(job_id)
+    
+    job = await asyncio.to_thread(job_store.get, job_id, include_result=False)
+    if job is not None:
+        elapsed = datetime.now() - datetime.fromisoformat(job["created_at"])
+        metrics.JOB_SECONDS.labels(kind, job["status"]).observe(elapsed.total_seconds())
+
+# Error of jobs cancelled by a shutdown
+INTERRUPTED_ERROR = "Job was interrupted: the server shut down"
+
+def save_chunk_file(chunk_file: str, text: str, spans: List, source_lang: str, target_lang: str, states: ChunkStates):
+    """Save what a retry of the job's failed chunks needs, where every node can read it"""
+    with open(chunk_file, "w", encoding="utf-8") as f:
+        json.dump({
+            "text": text,
+            "spans": spans,
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+            **states.to_dict()
+        }, f)
+    result_store.upload(chunk_file)
+
+async def perform_translation(job_id: str, text: str, source_lang: str, target_lang: str, workers: int = 1, spans: Optional[List] = None, retry: bool = False, backend: Optional[str] = None):
+    """Background task to perform translation, or to retry the failed chunks of a job"""
+    error = None
+    spans = [tuple(span) for span in spans] if spans is not None else chunk_spans(text, chunk_size=4000)
+    
+    # Define output files for this job, the chunk file is only kept while chunks are missing
+    output_file = f"translations/{job_id}.txt"
+    chunk_file = f"translations/{job_id}.chunks.json"
+    os.makedirs("translations", exist_ok=True)
+    
+    # A retry starts from the chunk states the last run saved
+    saved = await asyncio.to_thread(result_store.read, chunk_file) if retry else None
+    states = ChunkStates.from_dict(json.loads(saved)) if saved else ChunkStates(len(spans))
+    progress = job_progress[job_id] = JobProgress(total=len(spans))
+    job_chunks[job_id] = states
+    
+    def publish(index, translation):
+        # Failed chunks are streamed in the source language, as they appear in the result
+        if translation is None:
+            offset, length = spans[index]
+            progress.publish(index, text[offset:offset + length], failed=True)
+        else:
+            progress.publish(index, translation)
+    
     try:
         # Update job status to in progress
-        translation_jobs[job_id]["status"] = "in_progress"
-        
-        # Define output file for this job
-        output_file = f"translations/{job_id}.txt"
+        await asyncio.to_thread(job_store.update, job_id, status="in_progress", started_at=datetime.now().isoformat())
         
         # Perform translation
-        result = translate_text(
+        stats = {}
+        result = await translate_text_async(
             text_to_translate=text,
             output_file=output_file,
             source_lang=source_lang,
-            target_lang=target_lang
+            target_lang=target_lang,
+            backend=get_backend(backend),
+            cache=TRANSLATION_CACHE,
+            memory=TRANSLATION_MEMORY,
+            workers=workers,
+            spans=spans,
+            stats=stats,
+            on_chunk=publish,
+            states=states
+        )
+        
+        # Chunks that failed after their retries leave the job partial, ready to retry
+        failed = states.failed()
+        if failed:
+            error = f"{len(failed)} of {len(spans)} chunks failed: {states.errors[failed[0]]}"
+            await asyncio.to_thread(save_chunk_file, chunk_file, text, spans, source_lang, target_lang, states)
+        else:
+            await asyncio.to_thread(result_store.delete, chunk_file)
+        await asyncio.to_thread(result_store.upload, output_file)
+        
+        # Update job, the result itself stays in the output file
+        await asyncio.to_thread(
+            job_store.update,
+            job_id,
+            status="partial" if failed else "completed",
+            completed_at=datetime.now().isoformat(),
+            result_file=output_file,
+            chunk_file=chunk_file if failed else None,
+            unique_chunks=stats["unique_chunks"],
+            dedup_ratio=stats["dedup_ratio"],
+            chunk_states=states.counts(),
+            failed_chunks=failed,
+            error=error
+        )
+        
+    except asyncio.CancelledError:
+        # The server is shutting down, keep the chunks translated so far for a retry and re-raise
+        error = INTERRUPTED_ERROR
+        await asyncio.to_thread(save_chunk_file, chunk_file, text, spans, source_lang, target_lang, states)
+        await asyncio.to_thread(
+            job_store.update,
+            job_id,
+            status="failed",
+            error=error,
+            completed_at=datetime.now().isoformat(),
+            chunk_file=chunk_file,
+            chunk_states=states.counts()
+        )
+        raise
+    
+    except Exception as e:
+        # Update job with error, chunks translated so far are kept for a retry
+        error = str(e)
+        await asyncio.to_thread(save_chunk_file, chunk_file, text, spans, source_lang, target_lang, states)
+        await asyncio.to_thread(
+            job_store.update,
+            job_id,
+            status="failed",
+            error=error,
+            completed_at=datetime.now().isoformat(),
+            chunk_file=chunk_file,
+            chunk_states=states.counts()
+        )
+    
+    finally:
+        # Let streaming clients know the job is over, its final state is in the job store
+        progress.finish(error)
+        job_progress.pop(job_id, None)
+        job_chunks.pop(job_id, None)
+
+async def perform_multi_translation(job_id: str, text: str, source_lang: str, target_langs: List[str], workers: int = 1, spans: Optional[List] = None, backend: Optional[str] = None):
+    """Background task to translate one text into several languages"""
+    try:
+        await asyncio.to_thread(job_store.update, job_id, status="in_progress", started_at=datetime.now().isoformat())
+        
+        # One output file per target language
+        output_files = {lang: f"translations/{job_id}.{lang}.txt" for lang in target_langs}
+        
+        stats = {}
+        await translate_text_multi_async(
+            text_to_translate=text,
+            output_files=output_files,
+            source_lang=source_lang,
+            target_langs=target_langs,
+            backend=get_backend(backend),
+            cache=TRANSLATION_CACHE,
+            memory=TRANSLATION_MEMORY,
+            workers=workers,
+            spans=[tuple(span) for span in spans] if spans is not None else None,
+            stats=stats
         )
+        for output_file in output_files.values():
+            await asyncio.to_thread(result_store.upload, output_file)
         
-        # Update job with success
-        translation_jobs[job_id]["status"] = "completed"
-        translation_jobs[job_id]["completed_at"] = datetime.now().isoformat()
-        translation_jobs[job_id]["result"] = result
+        await asyncio.to_thread(
+            job_store.update,
+            job_id,
+            status="completed",
+            completed_at=datetime.now().isoformat(),
+            result_files=output_files,
+            # Every target shares the same chunks, so their dedup counts are the same
+            unique_chunks=stats[target_langs[0]]["unique_chunks"],
+            dedup_ratio=stats[target_langs[0]]["dedup_ratio"]
+        )
+        
+    except asyncio.CancelledError:
+        # The server is shutting down, record that the job won't finish and re-raise
+        await asyncio.to_thread(
+            job_store.update, job_id, status="failed", error=INTERRUPTED_ERROR, completed_at=datetime.now().isoformat()
+        )
+        raise
+    
+    except Exception as e:
+        await asyncio.to_thread(
+            job_store.update,
+            job_id,
+            status="failed",
+            error=str(e),
+            completed_at=datetime.now().isoformat()
+        )
+
+async def perform_batch_translation(job_id: str, items: List[str], source_lang: str, target_lang: str, workers: int = 1, backend: Optional[str] = None):
+    """Background task to translate a batch of items"""
+    try:
+        await asyncio.to_thread(job_store.update, job_id, status="in_progress", started_at=datetime.now().isoformat())
+        
+        stats = {}
+        translations = await translate_items_async(
+            items,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            backend=get_backend(backend),
+            cache=TRANSLATION_CACHE,
+            memory=TRANSLATION_MEMORY,
+            workers=workers,
+            stats=stats
+        )
+        
+        # Per-item results go to a JSON file next to the text results
+        output_file = f"translations/{job_id}.json"
+        await asyncio.to_thread(save_json, output_file, translations)
+        await asyncio.to_thread(result_store.upload, output_file)
         
+        await asyncio.to_thread(
+            job_store.update,
+            job_id,
+            status="completed",
+            completed_at=datetime.now().isoformat(),
+            result_file=output_file,
+            chunks=stats["chunks"]
+        )
+        
+    except asyncio.CancelledError:
+        # The server is shutting down, record that the job won't finish and re-raise
+        await asyncio.to_thread(
+            job_store.update, job_id, status="failed", error=INTERRUPTED_ERROR, completed_at=datetime.now().isoformat()
+        )
+        raise
+    
     except Exception as e:
-        # Update job with error
-        translation_jobs[job_id]["status"] = "failed"
-        translation_jobs[job_id]["error"] = str(e)
-        translation_jobs[job_id]["completed_at"] = datetime.now().isoformat()
+        await asyncio.to_thread(
+            job_store.update,
+            job_id,
+            status="failed",
+            error=str(e),
+            completed_at=datetime.now().isoformat()
+        )
+
+async def perform_document_translation(job_id: str, text: str, fmt: str, source_lang: str, target_langs: List[str], workers: int = 1, multi_target: bool = False, backend: Optional[str] = None):
+    """Background task to translate a structured document into one or more languages"""
+    try:
+        await asyncio.to_thread(job_store.update, job_id, status="in_progress", started_at=datetime.now().isoformat())
+        
+        # One output file per target language, with the document's own extension
+        output_files = {lang: f"translations/{job_id}.{lang}{EXTENSIONS[fmt]}" for lang in target_langs}
+        
+        chunks = 0
+        for lang in target_langs:
+            stats = {}
+            translation = await translate_document_async(
+                text,
+                fmt,
+                source_lang=source_lang,
+                target_lang=lang,
+                backend=get_backend(backend),
+                cache=TRANSLATION_CACHE,
+                memory=TRANSLATION_MEMORY,
+                workers=workers,
+                stats=stats
+            )
+            await asyncio.to_thread(save_translation, translation, output_files[lang])
+            await asyncio.to_thread(result_store.upload, output_files[lang])
+            chunks += stats["chunks"]
+        
+        result = {"result_files": output_files} if multi_target else {"result_file": output_files[target_langs[0]]}
+        await asyncio.to_thread(
+            job_store.update,
+            job_id,
+            status="completed",
+            completed_at=datetime.now().isoformat(),
+            chunks=chunks,
+            **result
+        )
+        
+    except asyncio.CancelledError:
+        # The server is shutting down, record that the job won't finish and re-raise
+        await asyncio.to_thread(
+            job_store.update, job_id, status="failed", error=INTERRUPTED_ERROR, completed_at=datetime.now().isoformat()
+        )
+        raise
+    
+    except Exception as e:
+        await asyncio.to_thread(
+            job_store.update,
+            job_id,
+            status="failed",
+            error=str(e),
+            completed_at=datetime.now().isoformat()
+        )
+
+# Background tasks by job kind. Queued jobs name their task, so any node can run them.
+TASKS = {
+    "text": perform_translation,
+    "multi": perform_multi_translation,
+    "batch": perform_batch_translation,
+    "document": perform_document_translation
+}
+
+def save_json(path: str, data):
+    """Write data to a JSON file"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+def format_event(event: str, data: Dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# Seconds between job store checks while streaming a job that hasn't started here
+STREAM_POLL_SECONDS = 1.0
+
+async def stream_events(job_id: str):
+    """Yield a `chunk` event per translated chunk, then a `done` event"""
+    # Wait until the job starts in this process, or finishes wherever it runs
+    progress = job_progress.get(job_id)
+    while progress is None:
+        job = await asyncio.to_thread(job_store.get, job_id, include_result=False)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            break
+        await asyncio.sleep(STREAM_POLL_SECONDS)
+        progress = job_progress.get(job_id)
+    
+    if progress is not None:
+        async for index, translation, failed in progress.follow():
+            completed = index + 1
+            yield format_event("chunk", {
+                "index": index,
+                "total": progress.total,
+                "translation": translation,
+                "failed": failed,
+                "eta_seconds": progress.eta_seconds(completed)
+            })
+    
+    job = await asyncio.to_thread(job_store.get, job_id, include_result=progress is None)
+    done = {"job_id": job_id, "status": job["status"] if job else "deleted", "error": job.get("error") if job else None}
+    if job is not None and job["status"] in ("completed", "partial"):
+        done["result_url"] = f"/translate/{job_id}/result"
+        done["failed_chunks"] = job.get("failed_chunks") or []
+    if progress is None and job is not None:
+        # The job finished before the client connected or on another node, send the whole result at once
+        done["result"] = job.get("result")
+    yield format_event("done", done)
 
 @app.get("/languages", response_model=LanguageList, tags=["Languages"])
-async def get_languages():
+async def get_languages(if_none_match: Optional[str] = Header(None)):
     """
     Get a list of all supported languages for translation.
     
     Returns a list of language names and their corresponding codes that can be used
-    with the translation endpoints.
+    with the translation endpoints. The list never changes while the server runs, so
+    clients can send the ETag back in `If-None-Match` and get a 304 instead.
     """
-    languages = [
-        Language(name=name, code=code) for name, code in SUPPORTED_LANGUAGES.items()
-    ]
-    return LanguageList(languages=languages, count=len(languages))
+    headers = {"ETag": LANGUAGES.etag, "Cache-Control": "public, max-age=86400"}
+    if if_none_match and LANGUAGES.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=LANGUAGES.payload, media_type="application/json", headers=headers)
 
 @app.get("/languages/{language_code}", response_model=Language, tags=["Languages"])
 async def get_language(language_code: str):
     """
     Get information about a specific language by its code.
     
-    Returns the language name and code if found.
+    Returns the language name and code if found. Aliases like 'iw' and
+    language names like 'Hindi' are accepted too.
     """
-    # Find language by code
-    for name, code in SUPPORTED_LANGUAGES.items():
-        if code.lower() == language_code.lower():
-            return Language(name=name, code=code)
+    # Find language by code, alias or name
+    code = LANGUAGES.resolve(language_code) or LANGUAGES.code_for_name(language_code)
+    if code is not None:
+        return Language(name=LANGUAGES.name(code), code=code)
     
     # If not found, raise 404
     raise HTTPException(status_code=404, detail=f"Language with code '{language_code}' not found")
 
 @app.post("/translate", response_model=TranslationResponse, tags=["Translation"])
-async def translate(request: TranslationRequest, background_tasks: BackgroundTasks):
+async def translate(request: TranslationRequest, idempotency_key: Optional[str] = Header(None)):
     """
     Translate text from one language to another using Google Translate.
     
     This endpoint creates a translation job that runs in the background.
-    Returns a job ID that can be used to check the status of the translation.
+    Returns a job ID that can be used to check the status of the translation,
+    or 429 if too many jobs are already waiting.
+    
+    A request with the same text and languages as a job that is still running or has
+    completed is attached to that job instead, with `coalesced` set in the response.
+    Send an `Idempotency-Key` header to retry a request safely: the same key always
+    returns the job it first created, and 422 if it's reused for a different request.
     
     - **text**: The text to translate
     - **source_language**: Source language code (e.g., 'en' for English)
     - **target_language**: Target language code (e.g., 'hi' for Hindi)
+    - **target_languages**: Several target language codes, translated in one job. The text is
+      chunked once and the results are returned per language under `results`
+    - **workers**: Number of chunks to translate in parallel (default: 1)
+    - **priority**: Queue priority, 'high', 'normal' or 'low' (default: normal)
+    - **backend**: Backend to translate with, e.g. 'http' for a translation service (default: server setting)
+    - **format**: 'html', 'markdown', 'json', 'po' or 'yaml' to translate only the text of a structured
+      document and return it with its markup, code, keys and placeholders intact (default: text)
     
     Use the `/languages` endpoint to get a list of all supported language codes.
     """
     # Validate language codes
-    source_found = any(code.lower() == request.source_language.lower() for code in SUPPORTED_LANGUAGES.values())
-    target_found = any(code.lower() == request.target_language.lower() for code in SUPPORTED_LANGUAGES.values())
+    source_language = validate_language(request.source_language, "Source")
+    target_languages = list(dict.fromkeys(
+        validate_language(target_language, "Target")
+        for target_language in request.target_languages or [request.target_language]
+    ))
+    multi_target = request.target_languages is not None
+    backend = validate_backend(request.backend)
+    
+    # Structured documents are checked up front, a malformed one fails the request rather than the job
+    if request.format != "text":
+        try:
+            parse_document(request.text, request.format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid {request.format} document: {e}")
     
-    if not source_found:
-        raise HTTPException(status_code=400, detail=f"Source language '{request.source_language}' not supported")
-    if not target_found:
-        raise HTTPException(status_code=400, detail=f"Target language '{request.target_language}' not supported")
+    # Attach to an identical job instead of translating the text twice
+    kind = "document" if request.format != "text" else "multi" if multi_target else "text"
+    content = [request.text] if kind != "document" else [request.format, request.text]
+    key = request_key(kind, source_language, target_languages, content, backend)
     
     # Create a unique job ID
     job_id = str(uuid.uuid4())
@@ -355,70 +808,451 @@ async def translate(request: TranslationRequest, background_tasks: BackgroundTas
     # Ensure translations directory exists
     os.makedirs("translations", exist_ok=True)
     
-    # Calculate chunks
-    chunks = chunk_text(request.text, chunk_size=4000)
-    
-    # Store job information
-    translation_jobs[job_id] = {
-        "job_id": job_id,
-        "status": "pending",
-        "created_at": datetime.now().isoformat(),
-        "completed_at": None,
-        "text_length": len(request.text),
-        "chunks": len(chunks),
-        "result": None
-    }
+    # Calculate chunks once, the same spans are used for translation. Documents are
+    # packed by segment, their chunk count is known once they are parsed.
+    spans = chunk_spans(request.text, chunk_size=4000) if kind != "document" else []
     
-    # Start translation in background
-    background_tasks.add_task(
-        perform_translation,
-        job_id=job_id,
-        text=request.text,
-        source_lang=request.source_language,
-        target_lang=request.target_language
-    )
+    # Store job information, unless an identical request got there first
+    async with claiming_keys(key, idempotency_key):
+        existing = await asyncio.to_thread(find_existing_job, key, idempotency_key)
+        if existing is None:
+            existing = await asyncio.to_thread(create_job, {
+                "job_id": job_id,
+                "status": "pending",
+                "created_at": datetime.now().isoformat(),
+                "heartbeat_at": time.time(),
+                "completed_at": None,
+                "text_length": len(request.text),
+                "chunks": len(spans),
+                "result": None,
+                "target_languages": target_languages if multi_target else None,
+                "backend": backend,
+                "request_key": key,
+                "idempotency_key": idempotency_key
+            })
+    if existing is not None:
+        metrics.JOBS_COALESCED.labels(kind).inc()
+        return TranslationResponse(job_id=existing["job_id"], status=existing["status"], coalesced=True)
+    
+    # Queue translation for a worker
+    try:
+        if kind == "document":
+            await queue_job({
+                "kind": "document",
+                "job_id": job_id,
+                "params": {
+                    "text": request.text,
+                    "fmt": request.format,
+                    "source_lang": source_language,
+                    "target_langs": target_languages,
+                    "workers": request.workers,
+                    "multi_target": multi_target,
+                    "backend": backend
+                }
+            }, priority=request.priority)
+        elif multi_target:
+            await queue_job({
+                "kind": "multi",
+                "job_id": job_id,
+                "params": {
+                    "text": request.text,
+                    "source_lang": source_language,
+                    "target_langs": target_languages,
+                    "workers": request.workers,
+                    "spans": spans,
+                    "backend": backend
+                }
+            }, priority=request.priority)
+        else:
+            await queue_job({
+                "kind": "text",
+                "job_id": job_id,
+                "params": {
+                    "text": request.text,
+                    "source_lang": source_language,
+                    "target_lang": target_languages[0],
+                    "workers": request.workers,
+                    "spans": spans,
+                    "backend": backend
+                }
+            }, priority=request.priority)
+    except QueueFullError as e:
+        await asyncio.to_thread(job_store.delete, job_id)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    
+    return TranslationResponse(job_id=job_id, status="pending")
+
+@app.post("/translate/batch", response_model=TranslationResponse, tags=["Translation"])
+async def translate_batch(request: BatchTranslationRequest, idempotency_key: Optional[str] = Header(None)):
+    """
+    Translate many short texts, like UI labels or product titles, in one job.
+    
+    Items are packed together into shared chunks behind numbered markers and split
+    back apart after translation, so thousands of items take tens of round-trips.
+    Returns a job ID for `/translate/batch/{job_id}`, or 429 if too many jobs are
+    already waiting. Identical batches and `Idempotency-Key` retries are attached to
+    the existing job, like for `/translate`.
+    
+    - **items**: The texts to translate
+    - **source_language**: Source language code (e.g., 'en' for English)
+    - **target_language**: Target language code (e.g., 'hi' for Hindi)
+    - **workers**: Number of chunks to translate in parallel (default: 1)
+    - **priority**: Queue priority, 'high', 'normal' or 'low' (default: normal)
+    - **backend**: Backend to translate with (default: server setting)
+    """
+    # Validate language codes
+    source_language = validate_language(request.source_language, "Source")
+    target_language = validate_language(request.target_language, "Target")
+    backend = validate_backend(request.backend)
+    
+    # Attach to an identical batch instead of translating the items twice
+    key = request_key("batch", source_language, [target_language], request.items, backend)
+    
+    job_id = str(uuid.uuid4())
+    os.makedirs("translations", exist_ok=True)
+    
+    # Store job information, the chunk count is known once items are packed
+    async with claiming_keys(key, idempotency_key):
+        existing = await asyncio.to_thread(find_existing_job, key, idempotency_key)
+        if existing is None:
+            existing = await asyncio.to_thread(create_job, {
+                "job_id": job_id,
+                "kind": "batch",
+                "status": "pending",
+                "created_at": datetime.now().isoformat(),
+                "heartbeat_at": time.time(),
+                "completed_at": None,
+                "text_length": sum(len(item) for item in request.items),
+                "item_count": len(request.items),
+                "chunks": 0,
+                "result": None,
+                "backend": backend,
+                "request_key": key,
+                "idempotency_key": idempotency_key
+            })
+    if existing is not None:
+        metrics.JOBS_COALESCED.labels("batch").inc()
+        return TranslationResponse(job_id=existing["job_id"], status=existing["status"], coalesced=True)
+    
+    try:
+        await queue_job({
+            "kind": "batch",
+            "job_id": job_id,
+            "params": {
+                "items": request.items,
+                "source_lang": source_language,
+                "target_lang": target_language,
+                "workers": request.workers,
+                "backend": backend
+            }
+        }, priority=request.priority)
+    except QueueFullError as e:
+        await asyncio.to_thread(job_store.delete, job_id)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
     
     return TranslationResponse(job_id=job_id, status="pending")
 
+@app.get("/translate/batch/{job_id}", response_model=BatchTranslationStatus, tags=["Translation"])
+async def get_batch_status(job_id: str):
+    """
+    Check the status of a batch job.
+    
+    Returns the job status and the status and translation of every item.
+    """
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None or job.get("kind") != "batch":
+        raise HTTPException(status_code=404, detail="Batch translation job not found")
+    
+    translations = json.loads(job["result"]) if job.get("result") else None
+    if translations is not None:
+        items = [
+            BatchItemResult(index=i, status="completed" if t is not None else "failed", translation=t)
+            for i, t in enumerate(translations)
+        ]
+    else:
+        # Items are only split apart once the whole batch is done
+        items = [BatchItemResult(index=i, status=job["status"]) for i in range(job["item_count"])]
+    
+    return BatchTranslationStatus(**{**job, "items": items})
+
 @app.get("/translate/{job_id}", response_model=TranslationStatus, tags=["Translation"])
 async def get_translation_status(job_id: str):
     """
     Check the status of a translation job.
     
-    Returns the current status and, if completed, the translation result.
+    Returns the current status and, if completed, the translation result. Batch
+    jobs are checked at `/translate/batch/{job_id}` instead.
+    """
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None or job.get("kind") == "batch":
+        raise HTTPException(status_code=404, detail="Translation job not found")
+    
+    # Running jobs report live chunk states
+    states = job_chunks.get(job_id)
+    if states is not None:
+        job["chunk_states"] = states.counts()
+    
+    return TranslationStatus(**job)
+
+@app.post("/translate/{job_id}/retry", response_model=TranslationResponse, tags=["Translation"])
+async def retry_translation(job_id: str, workers: int = Query(1, ge=1, le=64), priority: Literal["high", "normal", "low"] = "normal"):
+    """
+    Translate only the failed chunks of a partial or failed job again.
+    
+    Chunks that were already translated are kept, so a transient failure on one chunk
+    of a long text costs one chunk instead of the whole job. The job goes back to
+    `pending` and can be polled or streamed as before. Returns 409 if the job has
+    nothing to retry, or 429 if too many jobs are already waiting.
     """
-    if job_id not in translation_jobs:
+    job = await asyncio.to_thread(job_store.get, job_id, include_result=False)
+    if job is None:
         raise HTTPException(status_code=404, detail="Translation job not found")
+    chunk_file = job.get("chunk_file")
+    saved = await asyncio.to_thread(result_store.read, chunk_file) if job["status"] in ("partial", "failed") else None
+    if saved is None:
+        raise HTTPException(status_code=409, detail=f"Translation job is {job['status']} and has no failed chunks to retry")
+    saved = json.loads(saved)
     
-    return TranslationStatus(**translation_jobs[job_id])
+    # The worker picks the chunk states up from the chunk file
+    await asyncio.to_thread(job_store.update, job_id, status="pending", error=None, heartbeat_at=time.time())
+    try:
+        await queue_job({
+            "kind": "text",
+            "job_id": job_id,
+            "params": {
+                "text": saved["text"],
+                "source_lang": saved["source_lang"],
+                "target_lang": saved["target_lang"],
+                "workers": workers,
+                "spans": saved["spans"],
+                "retry": True,
+                "backend": job.get("backend")
+            }
+        }, priority=priority)
+    except QueueFullError as e:
+        await asyncio.to_thread(job_store.update, job_id, status=job["status"], error=job.get("error"))
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    
+    return TranslationResponse(job_id=job_id, status="pending")
+
+# Content types of result files, by extension
+MEDIA_TYPES = {
+    ".json": "application/json",
+    ".html": "text/html; charset=utf-8",
+    ".md": "text/markdown; charset=utf-8",
+    ".po": "text/x-gettext-translation; charset=utf-8",
+    ".yaml": "application/yaml"
+}
+
+@app.get("/translate/{job_id}/result", tags=["Translation"])
+async def get_translation_result(
+    job_id: str,
+    target: Optional[str] = None,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """
+    Download the result of a finished job straight from its result file.
+    
+    The file is streamed in blocks, never loaded whole. Text jobs return plain text, batch
+    jobs a JSON array with one translation per item, document jobs the translated document
+    in its own format, and multi-target jobs need `target`
+    to pick the language. Single byte ranges are served with 206 to resume downloads,
+    and the whole file is compressed with gzip, or brotli if installed, when the client
+    accepts it. Returns 409 while the job has no result yet.
+    """
+    job = await asyncio.to_thread(job_store.get, job_id, include_result=False)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Translation job not found")
+    
+    # Multi-target jobs keep one file per language
+    if job.get("result_files"):
+        if target not in job["result_files"]:
+            raise HTTPException(status_code=400, detail=f"target must be one of: {', '.join(job['result_files'])}")
+        path = job["result_files"][target]
+    else:
+        path = job.get("result_file")
+    stat = await asyncio.to_thread(result_store.stat, path) if job["status"] in ("completed", "partial") else None
+    if stat is None:
+        raise HTTPException(status_code=409, detail=f"Translation job is {job['status']} and has no result yet")
+    
+    size, etag = stat
+    media_type = MEDIA_TYPES.get(os.path.splitext(path)[1], "text/plain; charset=utf-8")
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Vary": "Accept-Encoding"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    # A range is only honoured if the file hasn't changed since the client's last download
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            headers.update({"Content-Range": f"bytes {start}-{end - 1}/{size}", "Content-Length": str(end - start)})
+            return StreamingResponse(iter_file(await asyncio.to_thread(result_store.open, path), byte_range), status_code=206, media_type=media_type, headers=headers)
+    
+    encoding = choose_encoding(accept_encoding)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    else:
+        headers["Content-Length"] = str(size)
+    return StreamingResponse(iter_file(await asyncio.to_thread(result_store.open, path), encoding=encoding), media_type=media_type, headers=headers)
+
+@app.get("/translate/{job_id}/stream", tags=["Translation"])
+async def stream_translation(job_id: str):
+    """
+    Stream the translation of a job as Server-Sent Events.
+    
+    Sends a `chunk` event for every chunk, in order, as soon as it and all chunks before
+    it are translated or have failed. Each event carries the chunk `index`, the `total`
+    number of chunks, the `translation`, `failed` for chunks left in the source language
+    and an `eta_seconds` estimate for the rest of the job. A final `done` event carries
+    the job status and, once there is a result, its `result_url` and `failed_chunks`. If
+    the job had already finished, or runs on another node, the `done` event also carries
+    the whole `result`.
+    """
+    if await asyncio.to_thread(job_store.get, job_id, include_result=False) is None:
+        raise HTTPException(status_code=404, detail="Translation job not found")
+    
+    return StreamingResponse(
+        stream_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def encode_cursor(job: Dict) -> str:
+    """Return an opaque cursor pointing just after a job"""
+    return base64.urlsafe_b64encode(json.dumps(cursor_of(job)).encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str):
+    """Turn a cursor from encode_cursor back into (created_at, job_id), or raise a 400 error"""
+    try:
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(created_at), str(job_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-@app.get("/translations", response_model=List[TranslationStatus], tags=["Translation"])
-async def list_translations():
+def parse_time(name: str, value: Optional[str]) -> Optional[str]:
+    """Normalize an ISO timestamp filter to the format of `created_at`, or raise a 400 error"""
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be an ISO 8601 timestamp")
+
+@app.get("/translations", response_model=TranslationPage, tags=["Translation"])
+async def list_translations(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    status: Optional[List[Literal["pending", "in_progress", "completed", "partial", "failed"]]] = Query(None),
+    created_after: Optional[str] = None,
+    created_before: Optional[str] = None,
+    summary: bool = True
+):
     """
-    List all translation jobs.
+    List translation jobs, oldest first, one page at a time.
+    
+    Pass the `next_cursor` of a page as `cursor` to get the next one. Jobs can be filtered
+    by `status` (repeat it to allow several) and by creation time with `created_after`
+    (inclusive) and `created_before` (exclusive) ISO timestamps. By default results are
+    left out; set `summary=false` to include them, or fetch a result on its own from
+    `/translate/{job_id}/result`.
     """
-    return [TranslationStatus(**job) for job in translation_jobs.values()]
+    after = decode_cursor(cursor) if cursor else None
+    created_after = parse_time("created_after", created_after)
+    created_before = parse_time("created_before", created_before)
+    
+    # One job more than asked for tells whether there is a next page
+    jobs = await asyncio.to_thread(
+        job_store.page,
+        after=after,
+        limit=limit + 1,
+        statuses=status,
+        created_after=created_after,
+        created_before=created_before,
+        include_result=not summary
+    )
+    next_cursor = encode_cursor(jobs[limit - 1]) if len(jobs) > limit else None
+    return TranslationPage(jobs=[TranslationStatus(**job) for job in jobs[:limit]], next_cursor=next_cursor)
 
 @app.delete("/translate/{job_id}", tags=["Translation"])
 async def delete_translation(job_id: str):
     """
     Delete a translation job.
     """
-    if job_id not in translation_jobs:
+    # Remove the job and its result file
+    job = await asyncio.to_thread(job_store.delete, job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Translation job not found")
     
-    # Remove from memory
-    job = translation_jobs.pop(job_id)
+    return {"status": "deleted", "job_id": job_id}
+
+@app.get("/queue", response_model=QueueStats, tags=["Translation"])
+async def get_queue_stats():
+    """
+    Get the depth of the job queue, running jobs and recent queue wait times.
+    """
+    return QueueStats(**await asyncio.to_thread(scheduler.stats))
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Monitoring"])
+async def get_metrics():
+    """
+    Get metrics in the Prometheus text format.
     
-    # Also delete the file if it exists
-    try:
-        file_path = f"translations/{job_id}.txt"
-        if os.path.exists(file_path):
-            os.remove(file_path)
-    except Exception:
-        pass
+    Includes histograms for browser startup, page load, each stage of a chunk, queue wait
+    and job time, counters for chunks, characters, cache lookups, retries and failures,
+    and gauges for browser sessions, queue depth and running jobs.
+    """
+    return PlainTextResponse(await asyncio.to_thread(metrics.REGISTRY.render), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/cache/stats", response_model=CacheStats, tags=["Cache"])
+async def get_cache_stats():
+    """
+    Get hit, miss and eviction counters for the translation cache.
+    """
+    return CacheStats(**await asyncio.to_thread(TRANSLATION_CACHE.stats))
+
+@app.get("/memory/stats", response_model=MemoryStats, tags=["Cache"])
+async def get_memory_stats():
+    """
+    Get hit and miss counters and the size of the sentence translation memory.
+    """
+    return MemoryStats(**await asyncio.to_thread(TRANSLATION_MEMORY.stats))
+
+@app.get("/memory/search", response_model=MemorySearchResults, tags=["Cache"])
+async def search_memory(
+    q: str = Query(..., min_length=1, description="Sentence to look for"),
+    source_language: str = Query("en", description="Source language code"),
+    target_language: str = Query("hi", description="Target language code"),
+    backend: Optional[str] = Query(None, description="Backend the translations came from (default: $TRANSLATE_BACKEND)"),
+    limit: int = Query(5, ge=1, le=50, description="Maximum number of matches"),
+    threshold: float = Query(0.5, ge=0.0, le=1.0, description="Minimum similarity of a match")
+):
+    """
+    Find stored sentences similar to `q` in the translation memory.
     
-    return {"status": "deleted", "job_id": job_id}
+    Numbers, dates, URLs and similar values are masked before comparing, so
+    sentences that differ only in those count as identical.
+    """
+    source_lang = validate_language(source_language, "Source")
+    target_lang = validate_language(target_language, "Target")
+    translator = get_backend(validate_backend(backend))
+    matches = await asyncio.to_thread(
+        TRANSLATION_MEMORY.search, q, source_lang, target_lang, f"{translator.name}:{translator.version}", limit=limit, threshold=threshold
+    )
+    return MemorySearchResults(matches=[MemoryMatch(**match._asdict()) for match in matches])
 
 if __name__ == "__main__":
-    uvicorn.run("translate_api:app", host="0.0.0.0", port=8080, reload=True) 
\ No newline at end of file
+    # Several processes need shared stores, TRANSLATE_RELOAD=1 restarts on code changes during development
+    uvicorn.run(
+        "translate_api:app",
+        host=os.environ.get("TRANSLATE_HOST", "0.0.0.0"),
+        port=int(os.environ.get("TRANSLATE_PORT", "8080")),
+        workers=int(os.environ.get("TRANSLATE_API_WORKERS", "1")),
+        reload=os.environ.get("TRANSLATE_RELOAD") == "1"
+    ) 
\ No newline at end of file
@@ -0,0 +1,299 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from redis_client import create_redis_client
+
+
+def normalize_chunk(text: str) -> str:
+    """Normalize a chunk so copies differing only in Unicode form or surrounding whitespace share a cache entry."""
+    # Whitespace inside the chunk is kept, it can be part of the text, like in code or poetry
+    return unicodedata.normalize("NFC", text).strip()
+
+
+def cache_key(text: str, source_lang: str, target_lang: str, backend_version: str = "") -> str:
+    """Content hash identifying one translation of one chunk."""
+    material = "\x00".join([normalize_chunk(text), source_lang.lower(), target_lang.lower(), backend_version])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    Two-tier cache of chunk translations.
+
+    Lookups go to a bounded in-memory LRU first and then to an optional
+    SQLite file. Entries on disk expire after `ttl_seconds` and the least
+    recently used ones are evicted once there are more than `max_disk_entries`.
+    Access times of disk hits are written in batches of `access_batch`, before
+    the next eviction or on close.
+
+    Args:
+        path (str): SQLite file for the persistent tier, None for memory only
+        memory_size (int): Maximum number of entries in the memory tier
+        ttl_seconds (float): Lifetime of an entry, None to keep entries forever
+        max_disk_entries (int): Maximum number of entries in the persistent tier
+        access_batch (int): Number of disk hits whose access time is written in one transaction
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        memory_size: int = 10000,
+        ttl_seconds: Optional[float] = 30 * 24 * 3600,
+        max_disk_entries: int = 1_000_000,
+        access_batch: int = 100,
+    ):
+        self.path = path
+        self.memory_size = memory_size
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.access_batch = access_batch
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_entries = 0
+        self._puts = 0
+        # Access time of disk hits not written yet, by key
+        self._accessed: Dict[str, float] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached translation for `key`, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                translation, created_at = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return translation
+                del self._memory[key]
+                self.evictions += 1
+
+            db = self._connect()
+            if db is not None:
+                row = db.execute("SELECT translation, created_at FROM translations WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    translation, created_at = row
+                    if not self._expired(created_at, now):
+                        self._accessed[key] = now
+                        if len(self._accessed) >= self.access_batch:
+                            self._flush_access()
+                            db.commit()
+                        self._remember(key, translation, created_at)
+                        self.hits += 1
+                        return translation
+                    db.execute("DELETE FROM translations WHERE key = ?", (key,))
+                    db.commit()
+                    self._disk_entries -= 1
+                    self.evictions += 1
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, translation: str):
+        """Store a translation in both tiers."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, translation, now)
+
+            db = self._connect()
+            if db is not None:
+                exists = db.execute("SELECT 1 FROM translations WHERE key = ?", (key,)).fetchone()
+                db.execute(
+                    "INSERT OR REPLACE INTO translations (key, translation, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, translation, now, now),
+                )
+                if not exists:
+                    self._disk_entries += 1
+                self._accessed.pop(key, None)
+                self._puts += 1
+                self._evict_disk()
+                db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and tier sizes."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_entries if self.path else 0,
+            }
+
+    def clear(self):
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._accessed.clear()
+            db = self._connect()
+            if db is not None:
+                db.execute("DELETE FROM translations")
+                db.commit()
+                self._disk_entries = 0
+
+    def close(self):
+        """Close the SQLite connection."""
+        with self._lock:
+            if self._db is not None:
+                self._flush_access()
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, translation: str, created_at: float):
+        """Insert into the memory tier. Caller must hold the lock."""
+        if self.memory_size <= 0:
+            return
+        self._memory[key] = (translation, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the SQLite tier on first use. Caller must hold the lock."""
+        if self.path is None:
+            return None
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, translation TEXT NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS translations_last_access ON translations (last_access)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS translations_created_at ON translations (created_at)")
+            self._db.commit()
+            self._disk_entries = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        return self._db
+
+    def _flush_access(self):
+        """Write the pending access times of disk hits, without committing. Caller must hold the lock."""
+        if self._accessed:
+            self._db.executemany(
+                "UPDATE translations SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._accessed.items()],
+            )
+            self._accessed.clear()
+
+    def _evict_disk(self):
+        """Expire old entries and trim the persistent tier. Caller must hold the lock."""
+        db = self._db
+        # Expired rows are also dropped on read, so sweeping only now and then is enough
+        if self.ttl_seconds is not None and self._puts % 1000 == 1:
+            cursor = db.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self._disk_entries -= cursor.rowcount
+            self.evictions += cursor.rowcount
+
+        excess = self._disk_entries - self.max_disk_entries
+        if excess > 0:
+            self._flush_access()
+            cursor = db.execute(
+                "DELETE FROM translations WHERE key IN "
+                "(SELECT key FROM translations ORDER BY last_access LIMIT ?)",
+                (excess,),
+            )
+            self._disk_entries -= cursor.rowcount
+            self.evictions += cursor.rowcount
+
+
+class RedisTranslationCache(TranslationCache):
+    """
+    Translation cache whose persistent tier is Redis, shared by every API node.
+
+    A chunk translated on one node is a cache hit on all the others. The
+    in-memory LRU tier stays per process. Entries expire in Redis after
+    `ttl_seconds`, and the server's maxmemory policy takes the place of
+    `max_disk_entries`, so `disk_entries` in stats is not counted.
+
+    Args:
+        client (RedisClient): Connection to the server
+        prefix (str): Prefix of every key
+        memory_size (int): Maximum number of entries in the memory tier
+        ttl_seconds (float): Lifetime of an entry, None to keep entries forever
+    """
+
+    def __init__(self, client, prefix: str = "translate:", memory_size: int = 10000, ttl_seconds: Optional[float] = 30 * 24 * 3600):
+        super().__init__(path=None, memory_size=memory_size, ttl_seconds=ttl_seconds)
+        self.client = client
+        self.prefix = f"{prefix}cache:"
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[1], now):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        # The network round-trip happens outside the lock
+        value = self.client.execute("GET", self.prefix + key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            translation = value.decode("utf-8")
+            self._remember(key, translation, now)
+            self.hits += 1
+            return translation
+
+    def put(self, key: str, translation: str):
+        with self._lock:
+            self._remember(key, translation, time.time())
+        if self.ttl_seconds is not None:
+            self.client.execute("SET", self.prefix + key, translation, "EX", int(self.ttl_seconds))
+        else:
+            self.client.execute("SET", self.prefix + key, translation)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        cursor = b"0"
+        while True:
+            cursor, keys = self.client.execute("SCAN", cursor, "MATCH", f"{self.prefix}*", "COUNT", 1000)
+            if keys:
+                self.client.execute("DEL", *keys)
+            if cursor == b"0":
+                break
+
+    def close(self):
+        self.client.close()
+
+
+def create_translation_cache(name: Optional[str] = None) -> TranslationCache:
+    """
+    Create the translation cache by name.
+
+    Args:
+        name (str): 'sqlite' or 'redis' (default: $TRANSLATE_CACHE_STORE or 'sqlite').
+            The SQLite file is taken from $TRANSLATE_CACHE_PATH, where an empty value keeps
+            the cache in memory only, and the Redis server from $TRANSLATE_REDIS_URL.
+
+    Returns:
+        TranslationCache: The cache
+    """
+    name = name or os.environ.get("TRANSLATE_CACHE_STORE", "sqlite")
+    if name == "sqlite":
+        return TranslationCache(path=os.environ.get("TRANSLATE_CACHE_PATH", "translation_cache.sqlite") or None)
+    if name == "redis":
+        return RedisTranslationCache(create_redis_client())
+    raise ValueError(f"Unknown cache store '{name}', expected 'sqlite' or 'redis'")
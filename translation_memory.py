@@ -0,0 +1,496 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from chunker import join_translations, sentence_spans, span_texts
+from packing import MARKER, MARKER_LIKE_PATTERN, unpack
+from translation_cache import normalize_chunk
+
+# Stand-in for a masked value. Private use characters don't occur in real
+# text, and masked sentences are never sent to a backend.
+PLACEHOLDER = "\ue000{}\ue001"
+PLACEHOLDER_PATTERN = re.compile("\ue000(\\d+)(?::(\\d+))?\ue001")
+
+# Values translation passes through unchanged: URLs, email addresses, format
+# placeholders, and numbers, dates, times and codes with at least one digit
+MASK_PATTERN = re.compile(
+    r"https?://[^\s<>\"]*[^\s<>\".,;:!?)\]]"
+    r"|[\w.+-]+@[\w-]+(?:\.[\w-]+)+"
+    r"|\{\w*\}|%(?:\(\w+\))?[sdif]"
+    r"|(?<!\w)(?=[\w-]*\d)[^\W_]+(?:[-_.:/,][^\W_]+)*(?!\w)"
+)
+
+# Every decimal digit in the Basic Multilingual Plane mapped to its ASCII digit.
+# Keeps string lengths, so positions found in the mapped text hold in the original.
+ASCII_DIGITS = {
+    code: ord("0") + unicodedata.decimal(chr(code))
+    for code in range(0x80, 0x10000)
+    if unicodedata.decimal(chr(code), None) is not None
+}
+
+# MinHash signature size and LSH bands. 8 bands of 4 rows find most
+# sentences at least about 60% similar and few below that.
+NUM_HASHES = 32
+BANDS = 8
+ROWS = NUM_HASHES // BANDS
+
+_BIN_BITS = 5
+_VALUE_MASK = (1 << (64 - _BIN_BITS)) - 1
+
+WORD = re.compile(r"\w+|[^\w\s]")
+
+
+class MemoryMatch(NamedTuple):
+    """A stored sentence similar to a query, with placeholders shown as {0}, {1}, ..."""
+
+    source: str
+    translation: str
+    similarity: float
+
+
+def mask(sentence: str) -> Tuple[str, List[str]]:
+    """
+    Replace the maskable values in a sentence with numbered placeholders.
+
+    Args:
+        sentence (str): The sentence to mask
+
+    Returns:
+        tuple: (masked sentence, values in order of their placeholders)
+    """
+    values = []
+
+    def replace(match):
+        values.append(match.group())
+        return PLACEHOLDER.format(len(values) - 1)
+
+    return MASK_PATTERN.sub(replace, normalize_chunk(sentence)), values
+
+
+def mask_translation(translation: str, values: List[str]) -> Optional[str]:
+    """
+    Replace the values of a source sentence in its translation with their placeholders.
+
+    Numbers are found whichever digits the translation writes them in, and
+    the digits are remembered with the placeholder. Each value must occur in
+    the translation as often as in the source.
+
+    Args:
+        translation (str): Translation of the source sentence
+        values (list): Values masked in the source sentence
+
+    Returns:
+        str: The masked translation, or None if a value can't be placed
+    """
+    plain = translation.translate(ASCII_DIGITS)
+    occurrences: Dict[str, List[int]] = {}
+    for index, value in enumerate(values):
+        occurrences.setdefault(value.translate(ASCII_DIGITS), []).append(index)
+
+    found = []
+    for value, indices in occurrences.items():
+        pattern = re.compile(r"(?<!\w)" + re.escape(value) + r"(?!\w)")
+        matches = list(pattern.finditer(plain))
+        if len(matches) != len(indices):
+            return None
+        found.extend((match.start(), match.end(), index) for match, index in zip(matches, indices))
+
+    found.sort()
+    parts = []
+    previous_end = 0
+    for start, end, index in found:
+        if start < previous_end:
+            return None
+        written = translation[start:end]
+        parts.append(translation[previous_end:start])
+        if written == values[index]:
+            parts.append(PLACEHOLDER.format(index))
+        else:
+            parts.append(PLACEHOLDER.format(f"{index}:{_digit_zero(written)}"))
+        previous_end = end
+    parts.append(translation[previous_end:])
+    return "".join(parts)
+
+
+def unmask(masked: str, values: List[str]) -> Optional[str]:
+    """Put values back into a masked text, or return None if it needs more values than given."""
+    if any(int(match.group(1)) >= len(values) for match in PLACEHOLDER_PATTERN.finditer(masked)):
+        return None
+
+    def replace(match):
+        value = values[int(match.group(1))]
+        return value if match.group(2) is None else _with_digits(value, int(match.group(2)))
+
+    return PLACEHOLDER_PATTERN.sub(replace, masked)
+
+
+def shingles(text: str) -> set:
+    """64 bit hashes of the words and word pairs of a text."""
+    words = WORD.findall(text.lower())
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    # Spread the CRC over 64 bits, its top bits pick the MinHash bin
+    return {(zlib.crc32(gram.encode("utf-8")) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF for gram in grams}
+
+
+def minhash(hashes: Iterable[int]) -> List[int]:
+    """
+    MinHash signature of a set of shingle hashes, with one permutation hashing.
+
+    Each hash falls into one of NUM_HASHES bins and every bin keeps its
+    smallest value, which needs one pass over the shingles instead of one per
+    signature value. Empty bins borrow from the next filled bin, so sentences
+    with few words still get comparable signatures.
+    """
+    signature = [None] * NUM_HASHES
+    for h in hashes:
+        index = h >> (64 - _BIN_BITS)
+        value = h & _VALUE_MASK
+        if signature[index] is None or value < signature[index]:
+            signature[index] = value
+    if all(value is None for value in signature):
+        return [0] * NUM_HASHES
+    for index in range(NUM_HASHES):
+        offset = 1
+        while signature[index] is None:
+            borrowed = signature[(index + offset) % NUM_HASHES]
+            if borrowed is not None:
+                signature[index] = (borrowed + offset) & _VALUE_MASK
+            offset += 1
+    return signature
+
+
+def _hash64(*parts: str) -> int:
+    """Signed 64 bit hash, usable as an SQLite integer key."""
+    digest = hashlib.blake2b("\x00".join(parts).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _band_keys(scope: str, signature: List[int]) -> List[int]:
+    return [_hash64(scope, str(band), repr(signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+def _digit_zero(text: str) -> int:
+    """Code point of zero in the digits text is written with."""
+    for char in text:
+        digit = unicodedata.decimal(char, None)
+        if digit is not None:
+            return ord(char) - digit
+    return ord("0")
+
+
+def _with_digits(value: str, zero: int) -> str:
+    """Write the digits of value starting at the code point `zero`."""
+    return "".join(chr(zero + int(char)) if "0" <= char <= "9" else char for char in value.translate(ASCII_DIGITS))
+
+
+def _display(masked: str, values: List[str]) -> str:
+    """A masked text with the given values filled in and placeholders without one shown as {n}."""
+    def replace(match):
+        index = int(match.group(1))
+        return values[index] if index < len(values) else "{" + match.group(1) + "}"
+
+    return PLACEHOLDER_PATTERN.sub(replace, masked)
+
+
+class TranslationMemory:
+    """
+    Sentence-level translation memory.
+
+    Sentences are stored with their numbers, dates, URLs and similar values
+    masked as placeholders, so a sentence that differs from a stored one only
+    in those values is translated from memory with its own values put back.
+    Stored sentences are also indexed with MinHash and LSH banding, which
+    finds similar sentences without scanning the whole memory.
+
+    Entries live in SQLite under a 64 bit hash of the language pair, backend
+    version and masked sentence, so an exact lookup is one primary key read
+    however many sentences are stored.
+
+    Args:
+        path (str): SQLite file, None to keep the memory in RAM only
+        min_similarity (float): Similarity a stored sentence needs to be reused. 1.0 only reuses
+            sentences that are identical once masked, lower values also reuse near matches verbatim.
+    """
+
+    def __init__(self, path: Optional[str] = None, min_similarity: float = 1.0):
+        self.path = path
+        self.min_similarity = min_similarity
+
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._segments = 0
+
+    def lookup(self, sentence: str, source_lang: str, target_lang: str, backend_version: str = "") -> Optional[str]:
+        """Return the translation of a sentence from memory, or None if it has to be translated."""
+        scope = _scope(source_lang, target_lang, backend_version)
+        masked, values = mask(sentence)
+        with self._lock:
+            db = self._connect()
+            translation = self._get(db, scope, masked)
+            if translation is None and values:
+                translation = self._get(db, scope, normalize_chunk(sentence))
+            if translation is not None:
+                self.hits += 1
+                return unmask(translation, values)
+
+            if self.min_similarity < 1.0:
+                for match in self._search(db, scope, masked, 1, self.min_similarity):
+                    translation = unmask(match[1], values)
+                    if translation is not None and len(PLACEHOLDER_PATTERN.findall(match[0])) == len(values):
+                        self.fuzzy_hits += 1
+                        return translation
+
+            self.misses += 1
+            return None
+
+    def add(self, sentence: str, translation: str, source_lang: str, target_lang: str, backend_version: str = ""):
+        """Store the translation of one sentence."""
+        self.add_many([(sentence, translation)], source_lang, target_lang, backend_version)
+
+    def add_many(self, pairs: Iterable[Tuple[str, str]], source_lang: str, target_lang: str, backend_version: str = ""):
+        """
+        Store (sentence, translation) pairs in one transaction.
+
+        Values that can't be found in the translation leave the sentence
+        stored as it is, so it is only reused when it comes back unchanged.
+        """
+        scope = _scope(source_lang, target_lang, backend_version)
+        rows = []
+        for sentence, translation in pairs:
+            translation = translation.strip()
+            if not translation:
+                continue
+            masked, values = mask(sentence)
+            masked_translation = mask_translation(translation, values) if values else translation
+            if masked_translation is None:
+                masked, masked_translation = normalize_chunk(sentence), translation
+            rows.append((_hash64(scope, masked), scope, masked, masked_translation))
+
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            for key, scope, masked, masked_translation in rows:
+                cursor = db.execute(
+                    "INSERT OR IGNORE INTO segments (key, scope, source, translation, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, scope, masked, masked_translation, now),
+                )
+                if not cursor.rowcount:
+                    db.execute("UPDATE segments SET translation = ?, created_at = ? WHERE key = ?", (masked_translation, now, key))
+                else:
+                    self._segments += 1
+                    db.executemany(
+                        "INSERT INTO bands (band, key) VALUES (?, ?)",
+                        [(band, key) for band in _band_keys(scope, minhash(shingles(masked)))],
+                    )
+            db.commit()
+
+    def learn(self, source_text: str, translated_text: str, source_lang: str, target_lang: str, backend_version: str = "") -> int:
+        """
+        Store the sentences of a translated text.
+
+        Sentences are paired up in order, so nothing is stored when the source
+        and the translation don't split into the same number of sentences.
+
+        Returns:
+            int: Number of sentences stored
+        """
+        source_spans = sentence_spans(source_text)
+        if len(source_spans) == 1:
+            pairs = [(source_text, translated_text)]
+        else:
+            target_spans = sentence_spans(translated_text)
+            if len(target_spans) != len(source_spans):
+                return 0
+            pairs = list(zip(span_texts(source_text, source_spans), span_texts(translated_text, target_spans)))
+        self.add_many(pairs, source_lang, target_lang, backend_version)
+        return len(pairs)
+
+    def search(self, sentence: str, source_lang: str, target_lang: str, backend_version: str = "", limit: int = 5,
+               threshold: float = 0.5) -> List[MemoryMatch]:
+        """
+        Find stored sentences similar to a sentence.
+
+        Args:
+            sentence (str): The sentence to look for
+            source_lang (str): Source language code
+            target_lang (str): Target language code
+            backend_version (str): Backend the translations must come from
+            limit (int): Maximum number of matches
+            threshold (float): Minimum Jaccard similarity of the masked sentences' words and word pairs
+
+        Returns:
+            list: Matches, most similar first, with the sentence's values filled in where they fit
+        """
+        scope = _scope(source_lang, target_lang, backend_version)
+        masked, values = mask(sentence)
+        with self._lock:
+            matches = self._search(self._connect(), scope, masked, limit, threshold)
+        return [MemoryMatch(_display(source, values), _display(translation, values), similarity)
+                for source, translation, similarity in matches]
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit and miss counters and the number of stored sentences."""
+        with self._lock:
+            self._connect()
+            return {
+                "hits": self.hits,
+                "fuzzy_hits": self.fuzzy_hits,
+                "misses": self.misses,
+                "segments": self._segments,
+            }
+
+    def clear(self):
+        """Drop every stored sentence."""
+        with self._lock:
+            db = self._connect()
+            db.execute("DELETE FROM segments")
+            db.execute("DELETE FROM bands")
+            db.commit()
+            self._segments = 0
+
+    def close(self):
+        """Close the SQLite connection. An in-memory store is lost."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _get(self, db: sqlite3.Connection, scope: str, masked: str) -> Optional[str]:
+        row = db.execute("SELECT source, translation FROM segments WHERE key = ?", (_hash64(scope, masked),)).fetchone()
+        # Guard against the rare 64 bit hash collision
+        if row is None or row[0] != masked:
+            return None
+        return row[1]
+
+    def _search(self, db: sqlite3.Connection, scope: str, masked: str, limit: int, threshold: float) -> List[Tuple[str, str, float]]:
+        """Candidates sharing the most LSH bands with masked, checked against their actual similarity."""
+        query = shingles(masked)
+        bands = _band_keys(scope, minhash(query))
+        rows = db.execute(
+            f"SELECT s.source, s.translation FROM segments s JOIN ("
+            f"SELECT key, COUNT(*) AS shared FROM bands WHERE band IN ({','.join('?' * len(bands))}) "
+            f"GROUP BY key ORDER BY shared DESC LIMIT ?) c ON s.key = c.key WHERE s.scope = ?",
+            (*bands, max(limit * 10, 50), scope),
+        ).fetchall()
+
+        matches = []
+        for source, translation in rows:
+            stored = shingles(source)
+            similarity = len(query & stored) / len(query | stored) if query | stored else 1.0
+            if similarity >= threshold:
+                matches.append((source, translation, similarity))
+        matches.sort(key=lambda match: match[2], reverse=True)
+        return matches[:limit]
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use. Caller must hold the lock."""
+        if self._db is None:
+            if self.path:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path or ":memory:", check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS segments ("
+                "key INTEGER PRIMARY KEY, scope TEXT NOT NULL, source TEXT NOT NULL, translation TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE TABLE IF NOT EXISTS bands (band INTEGER NOT NULL, key INTEGER NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS bands_band ON bands (band)")
+            self._db.commit()
+            self._segments = self._db.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return self._db
+
+
+class ChunkPlan:
+    """
+    How one chunk is translated with the help of a TranslationMemory.
+
+    Sentences found in memory are filled in right away. If all of them were
+    found, `request` is None and `translation` is complete. Otherwise
+    `request` is the text to send to the backend: the whole chunk when no
+    sentence was found, or only the missing sentences behind packing markers,
+    and `finish` turns its translation into the translation of the chunk.
+    A missing sentence that looks like a marker is never packed: the whole
+    chunk is sent instead.
+
+    Args:
+        memory (TranslationMemory): Memory to look sentences up in and store new ones
+        chunk (str): The chunk to translate
+        source_lang (str): Source language code
+        target_lang (str): Target language code
+        backend_version (str): Backend the translations come from
+    """
+
+    def __init__(self, memory: TranslationMemory, chunk: str, source_lang: str, target_lang: str, backend_version: str = ""):
+        self.memory = memory
+        self.chunk = chunk
+        self.languages = (source_lang, target_lang, backend_version)
+        self.spans = sentence_spans(chunk)
+        self.sentences = span_texts(chunk, self.spans)
+        self.found = [memory.lookup(sentence, *self.languages) for sentence in self.sentences]
+        self.missing = [i for i, translation in enumerate(self.found) if translation is None]
+        self.reused = len(self.sentences) - len(self.missing)
+        if any(MARKER_LIKE_PATTERN.search(self.sentences[i]) for i in self.missing):
+            # Packing markers can't be told apart from marker-like text
+            self.resend_whole()
+
+    @property
+    def translation(self) -> Optional[str]:
+        """Translation of the chunk, if every sentence was in memory."""
+        if self.missing:
+            return None
+        return join_translations(self.chunk, self.spans, self.found)
+
+    @property
+    def request(self) -> Optional[str]:
+        """Text to send to the backend, None if nothing is missing."""
+        if not self.missing:
+            return None
+        if len(self.missing) == len(self.sentences):
+            return self.chunk
+        return "\n".join(f"{MARKER.format(i)}\n{self.sentences[i]}" for i in self.missing)
+
+    def finish(self, translated: str) -> Optional[str]:
+        """
+        Store the new sentences and return the translation of the chunk.
+
+        Args:
+            translated (str): The backend's translation of `request`
+
+        Returns:
+            str: Translation of the chunk, or None if markers were lost and the
+                whole chunk has to be sent again, see resend_whole
+        """
+        if len(self.missing) == len(self.sentences):
+            self.memory.learn(self.chunk, translated, *self.languages)
+            return translated
+
+        parts = unpack(translated, self.missing)
+        if len(parts) < len(self.missing):
+            return None
+        self.memory.add_many([(self.sentences[i], parts[i]) for i in self.missing], *self.languages)
+        found = list(self.found)
+        for i in self.missing:
+            found[i] = parts[i]
+        return join_translations(self.chunk, self.spans, found)
+
+    def resend_whole(self):
+        """Translate the whole chunk instead of only its missing sentences."""
+        self.missing = list(range(len(self.sentences)))
+        self.reused = 0
+
+
+def _scope(source_lang: str, target_lang: str, backend_version: str) -> str:
+    return f"{source_lang.lower()}:{target_lang.lower()}:{backend_version}"